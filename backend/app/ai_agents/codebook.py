@@ -0,0 +1,96 @@
+"""Integer encoding of design variants.
+
+A :class:`Codebook` interns attribute names and their values as small
+integers. A variant is then a tuple with one value index per attribute, which
+is far smaller than a ``Dict[str, str]`` plus a label string and is cheap to
+compare, hash and deduplicate. Labels and dicts are only decoded on output.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+#: One value index per attribute id; ``MISSING`` where an attribute is unset.
+Code = Tuple[int, ...]
+
+MISSING = -1
+
+
+class Codebook:
+    """Intern attribute/value pairs and encode variants as index tuples.
+
+    Codes list value indices in attribute-id order and never carry trailing
+    ``MISSING`` entries, so equal variants always have equal codes. Building
+    a codebook from an options mapping assigns ids in declaration order, which
+    makes a code the same digit tuple ``Negotiator`` enumerates.
+    """
+
+    def __init__(self, options: Optional[Mapping[str, Sequence[str]]] = None) -> None:
+        self.attrs: List[str] = []
+        self.values: List[List[str]] = []
+        self._attr_ids: Dict[str, int] = {}
+        self._value_ids: List[Dict[str, int]] = []
+        for attr, vals in (options or {}).items():
+            a = self.attr_id(attr)
+            # keep positions exactly as declared so codes match the digits
+            # of a product over ``options``, even if a value repeats
+            self.values[a] = list(vals)
+            for i, v in enumerate(vals):
+                self._value_ids[a].setdefault(v, i)
+
+    def attr_id(self, attr: str) -> int:
+        """Return the id for ``attr``, interning it if new."""
+        a = self._attr_ids.get(attr)
+        if a is None:
+            a = self._attr_ids[attr] = len(self.attrs)
+            self.attrs.append(attr)
+            self.values.append([])
+            self._value_ids.append({})
+        return a
+
+    def value_id(self, attr_id: int, value: str) -> int:
+        """Return the index of ``value`` within attribute ``attr_id``, interning it if new."""
+        ids = self._value_ids[attr_id]
+        v = ids.get(value)
+        if v is None:
+            v = ids[value] = len(self.values[attr_id])
+            self.values[attr_id].append(value)
+        return v
+
+    def encode(self, items: Iterable[Tuple[str, str]]) -> Code:
+        """Encode ``(attribute, value)`` pairs; later pairs override earlier ones."""
+        code: List[int] = []
+        for attr, value in items:
+            a = self.attr_id(attr)
+            if a >= len(code):
+                code.extend([MISSING] * (a + 1 - len(code)))
+            code[a] = self.value_id(a, value)
+        return tuple(code)
+
+    def decode(self, code: Code) -> Dict[str, str]:
+        """Return the ``{attribute: value}`` dict for ``code``."""
+        return {
+            self.attrs[a]: self.values[a][v] for a, v in enumerate(code) if v != MISSING
+        }
+
+    def label(self, code: Code) -> str:
+        """Return ``attr:value`` pairs joined with underscores."""
+        return "_".join(f"{k}:{v}" for k, v in self.decode(code).items())
+
+    def join(self, code: Code) -> str:
+        """Return the values alone joined with underscores."""
+        return "_".join(
+            str(vals[v]) for vals, v in zip(self.values, code) if v != MISSING
+        )
+
+
+def content_hash(metadata: Mapping[str, str]) -> str:
+    """Return a stable digest of decoded variant metadata.
+
+    Unlike codes, which are only comparable within one codebook, the digest is
+    the same across runs and processes, so it can key stored candidates.
+    """
+    canonical = json.dumps(metadata, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
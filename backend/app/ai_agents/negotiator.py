@@ -1,5 +1,26 @@
-from itertools import product
-from typing import Dict, List, Optional
+import random
+from dataclasses import dataclass
+from itertools import islice, product
+from math import prod
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.ai_agents.codebook import Code, Codebook
+
+#: A pair of ``(attribute, value)`` choices that may not appear together.
+Exclusion = Tuple[Tuple[str, str], Tuple[str, str]]
+
+
+@dataclass
+class SearchStats:
+    """Counters filled in by :meth:`Negotiator.search`.
+
+    ``pruned`` counts complete combinations skipped because a subtree was cut,
+    so ``emitted + pruned`` equals the size of the unconstrained space once
+    the search has run to completion.
+    """
+
+    emitted: int = 0
+    pruned: int = 0
 
 
 class Negotiator:
@@ -8,14 +29,47 @@ class Negotiator:
     The negotiator holds a set of base options representing design attributes
     (e.g. color, material). ``generate_variants`` combines these attributes using
     a Cartesian product to produce concrete variant strings.
+
+    Internally a variant is a :data:`~app.ai_agents.codebook.Code`, the tuple
+    of value indices chosen per attribute; ``*_codes`` methods expose those
+    and the string methods decode them through :meth:`codebook` on output.
+
+    The design space is never materialised by the paging API: variants are
+    numbered in Cartesian-product order (last attribute varying fastest) and
+    variant ``i`` is decoded directly from ``i`` in mixed radix, so
+    ``count``, ``variant_at``, ``iter_variants`` and ``sample`` run in
+    constant memory however large the space is.
+
+    ``exclusions`` declares incompatible attribute values, e.g.
+    ``(("structure", "timber"), ("finish", "gloss"))``. They are applied by
+    :meth:`search`, which prunes whole subtrees during enumeration;
+    ``generate_variants`` and ``iter_variants`` go through it when exclusions
+    are set. ``count``, ``variant_at`` and ``sample`` always address the
+    unconstrained space.
     """
 
-    def __init__(self, base_options: Optional[Dict[str, List[str]]] = None) -> None:
+    def __init__(
+        self,
+        base_options: Optional[Dict[str, List[str]]] = None,
+        exclusions: Optional[Iterable[Exclusion]] = None,
+    ) -> None:
         self.base_options: Dict[str, List[str]] = base_options or {
             "color": ["red", "blue"],
             "material": ["steel", "plastic"],
             "finish": ["matte", "gloss"],
         }
+        self.exclusions: List[Exclusion] = list(exclusions or [])
+
+    def _resolve(self, options: Optional[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+        # ``None`` indicates that the caller wants to use the negotiator's
+        # ``base_options``. An explicit empty dict should be respected as-is
+        # to allow calls like ``generate_variants({})`` to yield an empty list.
+        return self.base_options if options is None else options
+
+    def codebook(self, options: Optional[Dict[str, List[str]]] = None) -> Codebook:
+        """Return the codebook that decodes this negotiator's variant codes."""
+
+        return Codebook(self._resolve(options))
 
     def generate_variants(
         self, options: Optional[Dict[str, List[str]]] = None
@@ -31,16 +85,217 @@ class Negotiator:
             underscores. An empty options mapping yields an empty list.
         """
 
-        # ``None`` indicates that the caller wants to use the negotiator's
-        # ``base_options``. An explicit empty dict should be respected as-is
-        # to allow calls like ``generate_variants({})`` to yield an empty list.
-        opts = self.base_options if options is None else options
+        opts = self._resolve(options)
         if not opts:
             return []
+        book = Codebook(opts)
+        return [book.join(code) for code in self.iter_codes(opts)]
 
-        combinations = product(*opts.values())
-        return ["_".join(map(str, combo)) for combo in combinations]
+    def count(self, options: Optional[Dict[str, List[str]]] = None) -> int:
+        """Return the number of variants without enumerating them."""
 
+        opts = self._resolve(options)
+        if not opts:
+            return 0
+        return prod(len(values) for values in opts.values())
 
-negotiator = Negotiator()
+    def code_at(
+        self, index: int, options: Optional[Dict[str, List[str]]] = None
+    ) -> Code:
+        """Return the code of the variant at ``index`` in ``generate_variants`` order.
+
+        Raises:
+            IndexError: If ``index`` is outside ``[-count, count)``.
+        """
+
+        opts = self._resolve(options)
+        total = self.count(opts)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError("variant index out of range")
+        return self._digits(index, list(opts.values()))
+
+    def variant_at(
+        self, index: int, options: Optional[Dict[str, List[str]]] = None
+    ) -> str:
+        """Return the variant at ``index`` in ``generate_variants`` order.
+
+        Raises:
+            IndexError: If ``index`` is outside ``[-count, count)``.
+        """
+
+        return self.codebook(options).join(self.code_at(index, options))
+
+    def iter_codes(
+        self,
+        options: Optional[Dict[str, List[str]]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Code]:
+        """Lazily yield variant codes starting at ``offset``.
 
+        Args:
+            options: As for :meth:`generate_variants`.
+            offset: Index of the first variant to yield.
+            limit: Maximum number of variants to yield; ``None`` for all.
+
+        Yields:
+            Code: One value index per attribute, in ``generate_variants`` order.
+        """
+
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must be non-negative")
+        opts = self._resolve(options)
+        if self.exclusions:
+            # excluded combinations leave gaps in the index space, so the
+            # offset cannot be decoded; skip through the pruned search
+            stop = None if limit is None else offset + limit
+            yield from islice(self.search_codes(opts), offset, stop)
+            return
+        if offset >= self.count(opts):
+            return
+        values = list(opts.values())
+        # Start the odometer at the decoded offset instead of skipping
+        # ``offset`` items of ``product``.
+        digits = list(self._digits(offset, values))
+        yield from islice(self._odometer(values, digits), limit)
+
+    def iter_variants(
+        self,
+        options: Optional[Dict[str, List[str]]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Lazily yield variant names; see :meth:`iter_codes`."""
+
+        book = self.codebook(options)
+        return (book.join(code) for code in self.iter_codes(options, offset, limit))
+
+    def sample(
+        self,
+        k: int,
+        options: Optional[Dict[str, List[str]]] = None,
+        rng: Optional[random.Random] = None,
+    ) -> List[str]:
+        """Return ``k`` distinct variants drawn uniformly at random.
+
+        Raises:
+            ValueError: If ``k`` exceeds the number of variants.
+        """
+
+        opts = self._resolve(options)
+        rng = rng or random.Random()
+        indices = rng.sample(range(self.count(opts)), k)
+        values = list(opts.values())
+        book = Codebook(opts)
+        return [book.join(self._digits(i, values)) for i in indices]
+
+    def search(
+        self,
+        options: Optional[Dict[str, List[str]]] = None,
+        stats: Optional[SearchStats] = None,
+    ) -> Iterator[str]:
+        """Yield variant names that satisfy ``exclusions``; see :meth:`search_codes`."""
+
+        book = self.codebook(options)
+        return (book.join(code) for code in self.search_codes(options, stats))
+
+    def search_codes(
+        self,
+        options: Optional[Dict[str, List[str]]] = None,
+        stats: Optional[SearchStats] = None,
+    ) -> Iterator[Code]:
+        """Yield codes of variants that satisfy ``exclusions``, pruning as it goes.
+
+        Attributes are assigned depth-first in declaration order. As soon as a
+        value conflicts with an earlier choice the whole subtree below it is
+        skipped, rather than generating its combinations and filtering them.
+
+        Args:
+            options: As for :meth:`generate_variants`.
+            stats: Optional counters updated with emitted and pruned totals.
+
+        Yields:
+            Code: Allowed variants in ``generate_variants`` order.
+        """
+
+        opts = self._resolve(options)
+        stats = stats if stats is not None else SearchStats()
+        if not opts:
+            return
+        values = list(opts.values())
+        conflicts = self._conflicts(list(opts), values)
+        depth = len(values)
+        # subtree[p]: number of complete combinations below a choice at p
+        subtree = [prod(len(v) for v in values[p + 1 :]) for p in range(depth)]
+        # attributes from ``free`` onwards take part in no exclusion, so once
+        # the constrained prefix is fixed every tail combination is allowed
+        free = max((p + 1 for p in range(depth) if any(conflicts[p])), default=0)
+        tail = [range(len(vals)) for vals in values[free:]]
+        cached = list(product(*tail)) if prod(len(v) for v in tail) <= 65536 else None
+        digits = [0] * free
+        pos = 0
+        while pos >= 0:
+            if pos == free:
+                prefix = tuple(digits)
+                for rest in cached if cached is not None else product(*tail):
+                    stats.emitted += 1
+                    yield prefix + rest
+                pos -= 1
+            elif digits[pos] == len(values[pos]):
+                digits[pos] = 0
+                pos -= 1
+            elif any(digits[q] == w for q, w in conflicts[pos][digits[pos]]):
+                stats.pruned += subtree[pos]
+                digits[pos] += 1
+                continue
+            else:
+                pos += 1
+                continue
+            if pos >= 0:
+                digits[pos] += 1
+
+    def _conflicts(
+        self, attrs: List[str], values: List[List[str]]
+    ) -> List[List[List[Tuple[int, int]]]]:
+        """Map each ``(position, value)`` to the earlier choices it excludes."""
+        index = {
+            (attr, str(v)): (p, i)
+            for p, (attr, vals) in enumerate(zip(attrs, values))
+            for i, v in enumerate(vals)
+        }
+        conflicts: List[List[List[Tuple[int, int]]]] = [
+            [[] for _ in vals] for vals in values
+        ]
+        for a, b in self.exclusions:
+            if a not in index or b not in index:
+                continue
+            (pa, ia), (pb, ib) = sorted([index[a], index[b]])
+            if pa != pb:
+                conflicts[pb][ib].append((pa, ia))
+        return conflicts
+
+    @staticmethod
+    def _digits(index: int, values: List[List[str]]) -> Code:
+        digits = [0] * len(values)
+        for pos in range(len(values) - 1, -1, -1):
+            index, digits[pos] = divmod(index, len(values[pos]))
+        return tuple(digits)
+
+    @staticmethod
+    def _odometer(values: List[List[str]], digits: List[int]) -> Iterator[Code]:
+        while True:
+            yield tuple(digits)
+            pos = len(digits) - 1
+            while pos >= 0:
+                digits[pos] += 1
+                if digits[pos] < len(values[pos]):
+                    break
+                digits[pos] = 0
+                pos -= 1
+            if pos < 0:
+                return
+
+
+negotiator = Negotiator()
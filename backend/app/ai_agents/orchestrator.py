@@ -2,20 +2,30 @@ from __future__ import annotations
 
 import asyncio
 import random
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from typing import Dict, List, Protocol
 from uuid import uuid4
 
-from pydantic import BaseModel
-
-from app.models import SiteContext, Weights, VariantOut, FeedbackIn
-from app.db.session import SessionLocal
-from app.db.models import (
-    Base,
-    Candidate as DBCandidate,
-    CandidateFeedback,
-    CandidateEmotionEvent,
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import select
+
+from app.ai_agents.codebook import Code, Codebook, content_hash
+from app.ai_agents.negotiator import Negotiator
+from app.ai_agents.registry import AGENTS, register_agent, stats_for
+from app.ai_agents.scoring import (
+    OBJECTIVES,
+    objective_matrix,
+    rank_order,
+    score_batch,
+    to_score_dicts,
 )
+from app.core.config import settings
+from app.models import AgentConfig, SiteContext, Weights, VariantOut, FeedbackIn
+from app.db.batch import BatchWriter
+from app.db.session import SessionLocal, ensure_candidate_tables
+from app.db.models import Candidate as DBCandidate
 
 
 @dataclass
@@ -24,83 +34,183 @@ class Proposal:
     data: Dict[str, str]
 
 
-@dataclass
+@dataclass(slots=True)
 class Candidate:
+    """A merged design held as an integer code into ``codebook``.
+
+    ``label`` and ``metadata`` are decoded on access; compare and hash
+    ``code`` to deduplicate candidates.
+    """
+
     id: str
-    label: str
-    metadata: Dict[str, str]
+    code: Code
+    codebook: Codebook = field(repr=False, compare=False)
+
+    @property
+    def label(self) -> str:
+        return self.codebook.label(self.code)
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        return self.codebook.decode(self.code)
 
 
 class DesignState(BaseModel):
     """Mutable state shared across rounds of generation."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     context: SiteContext | None = None
     feedback: List[FeedbackIn] = []
     emotion_stats: Dict[str, float] = {}
     seed: int = 0
+    codebook: Codebook = Field(default_factory=Codebook)
     candidates: List[Candidate] = []
 
 
 class Agent(Protocol):
+    """Proposes attribute values for a candidate.
+
+    Agents may also declare ``options``, the values each proposed attribute
+    can take, which lets distinct-candidate runs detect an exhausted space.
+    """
+
     name: str
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         ...
 
 
+def round_rng(seed: int, round_idx: int, stream: str) -> random.Random:
+    """Return the RNG for one agent (or the scorer) in one round.
+
+    Seeding per ``(seed, round, stream)`` keeps results independent of the
+    order in which concurrent rounds and agents happen to run.
+    """
+    return random.Random(f"{seed}:{round_idx}:{stream}")
+
+
+@register_agent
 class AestheticsAgent:
     name = "aesthetics"
+    options = {"color": ["red", "blue", "green"]}
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         await asyncio.sleep(0)
-        color = random.choice(["red", "blue", "green"])
+        color = rng.choice(self.options["color"])
         return Proposal(type=self.name, data={"color": color})
 
 
+@register_agent
 class SustainabilityAgent:
     name = "sustainability"
+    options = {"energy": ["solar", "geothermal"]}
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         await asyncio.sleep(0)
-        system = random.choice(["solar", "geothermal"])
+        system = rng.choice(self.options["energy"])
         return Proposal(type=self.name, data={"energy": system})
 
 
+@register_agent
 class CostAgent:
     name = "cost"
+    options = {"cost_level": ["low", "medium", "high"]}
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         await asyncio.sleep(0)
-        level = random.choice(["low", "medium", "high"])
+        level = rng.choice(self.options["cost_level"])
         return Proposal(type=self.name, data={"cost_level": level})
 
 
+@register_agent
 class AccessibilityAgent:
     name = "accessibility"
+    options = {"feature": ["ramp", "elevator"]}
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         await asyncio.sleep(0)
-        feature = random.choice(["ramp", "elevator"])
+        feature = rng.choice(self.options["feature"])
         return Proposal(type=self.name, data={"feature": feature})
 
 
+@register_agent
 class StructuralAgent:
     name = "structural"
+    options = {"structure": ["steel", "timber"]}
 
-    async def propose(self, state: DesignState) -> Proposal:
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
         await asyncio.sleep(0)
-        system = random.choice(["steel", "timber"])
+        system = rng.choice(self.options["structure"])
         return Proposal(type=self.name, data={"structure": system})
 
 
+class BoundAgent:
+    """An agent configured for one run, with a timeout and fallback.
+
+    Each call is timed into the agent's registry stats. A call that exceeds
+    ``timeout_s`` is cancelled, counted as a timeout and answered with the
+    fallback proposal, so one slow agent cannot stall the whole round.
+    """
+
+    def __init__(
+        self, agent: Agent, timeout_s: float | None, fallback: Dict[str, str] | None
+    ) -> None:
+        self.agent = agent
+        self.name = agent.name
+        self.timeout_s = timeout_s
+        options: Dict[str, List[str]] | None = getattr(agent, "options", None)
+        if fallback is None and options:
+            fallback = {key: values[0] for key, values in options.items()}
+        self.fallback = fallback
+        if options is not None and fallback:
+            # fallback values are part of the space the agent can produce
+            options = {key: list(values) for key, values in options.items()}
+            for key, value in fallback.items():
+                values = options.setdefault(key, [])
+                if value not in values:
+                    values.append(value)
+        self.options = options
+
+    async def propose(self, state: DesignState, rng: random.Random) -> Proposal:
+        stats = stats_for(self.name)
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self.agent.propose(state, rng), self.timeout_s)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            if self.fallback is None:
+                raise
+            return Proposal(type=self.name, data=dict(self.fallback))
+        finally:
+            stats.latency.observe(time.perf_counter() - start)
+
+
+def resolve_agents(configs: List[AgentConfig] | None = None) -> List[BoundAgent]:
+    """Instantiate the agents for a run from the registry.
+
+    Without ``configs`` the agents in ``settings.generation_agents`` are used
+    with ``settings.agent_timeout_s``.
+
+    Raises:
+        ValueError: If a config names an unregistered agent.
+    """
+    if configs is None:
+        configs = [AgentConfig(name=name) for name in settings.generation_agents]
+    bound = []
+    for cfg in configs:
+        if cfg.name not in AGENTS:
+            raise ValueError(f"unknown agent: {cfg.name}")
+        timeout = settings.agent_timeout_s if cfg.timeout_s is None else cfg.timeout_s
+        bound.append(BoundAgent(AGENTS[cfg.name](), timeout, cfg.fallback))
+    return bound
+
+
 class Synthesizer:
     @staticmethod
     def merge(proposals: List[Proposal], state: DesignState) -> Candidate:
-        meta: Dict[str, str] = {}
-        for p in proposals:
-            meta.update(p.data)
-        label = "_".join(f"{k}:{v}" for k, v in meta.items())
-        return Candidate(id=str(uuid4()), label=label, metadata=meta)
+        code = state.codebook.encode(item for p in proposals for item in p.data.items())
+        return Candidate(id=str(uuid4()), code=code, codebook=state.codebook)
 
 
 class Critic:
@@ -109,78 +219,250 @@ class Critic:
         return []
 
 
-def score_candidate(candidate: Candidate, weights: Weights) -> Dict[str, float]:
+def objective_scores(candidate: Candidate, rng: random.Random) -> List[float]:
+    """Return the candidate's raw objective scores in ``OBJECTIVES`` order."""
     # simple random scores for demonstration
-    scores = {
-        "aesthetic": random.random(),
-        "sustainability": random.random(),
-        "cost": random.random(),
-        "accessibility": random.random(),
-        "emotion": random.random(),
-    }
-    scores["composite"] = sum(scores[k] * getattr(weights, k) for k in weights.model_fields)
-    return scores
-
-
-def run_generation(n: int, weights: Weights) -> List[VariantOut]:
-    state = DesignState()
-    agents: List[Agent] = [
-        AestheticsAgent(),
-        SustainabilityAgent(),
-        CostAgent(),
-        AccessibilityAgent(),
-        StructuralAgent(),
-    ]
-
-    session = SessionLocal()
-    # Ensure tables exist for candidate persistence
-    engine = session.get_bind()
-    Base.metadata.create_all(
-        bind=engine,
-        tables=[
-            DBCandidate.__table__,
-            CandidateFeedback.__table__,
-            CandidateEmotionEvent.__table__,
-        ],
+    return [rng.random() for _ in OBJECTIVES]
+
+
+def score_candidate(
+    candidate: Candidate, weights: Weights, rng: random.Random | None = None
+) -> Dict[str, float]:
+    """Score a single candidate; use :func:`score_batch` for many."""
+    row = objective_scores(candidate, rng or random.Random())
+    return to_score_dicts(score_batch(np.array([row]), weights))[0]
+
+
+def design_space_size(agents: List[Agent] | List[BoundAgent]) -> int | None:
+    """Return how many distinct candidates ``agents`` can produce.
+
+    ``None`` if any agent does not declare its ``options``.
+    """
+    merged: Dict[str, List[str]] = {}
+    for agent in agents:
+        options = getattr(agent, "options", None)
+        if options is None:
+            return None
+        for key, values in options.items():
+            merged[key] = sorted(set(merged.get(key, [])) | set(values))
+    return Negotiator(merged).count()
+
+
+def run_generation(
+    n: int,
+    weights: Weights,
+    writer: BatchWriter | None = None,
+    concurrency: int | None = None,
+    seed: int | None = None,
+    distinct: bool = False,
+    agents: List[AgentConfig] | None = None,
+) -> List[VariantOut]:
+    """Blocking wrapper around :func:`run_generation_async`.
+
+    For scripts and Celery tasks; it must not be called from a running event
+    loop. Async callers should await :func:`run_generation_async` directly.
+    """
+    return asyncio.run(
+        run_generation_async(
+            n,
+            weights,
+            writer=writer,
+            concurrency=concurrency,
+            seed=seed,
+            distinct=distinct,
+            agents=agents,
+        )
     )
-    variants: List[VariantOut] = []
 
-    async def generate_round() -> VariantOut:
+
+async def run_generation_async(
+    n: int,
+    weights: Weights,
+    writer: BatchWriter | None = None,
+    concurrency: int | None = None,
+    seed: int | None = None,
+    distinct: bool = False,
+    agents: List[AgentConfig] | None = None,
+) -> List[VariantOut]:
+    """Generate ``n`` ranked variants and persist them as candidates.
+
+    ``agents`` selects and configures registered agents for this run (see
+    :func:`resolve_agents`); each has its own timeout and fallback proposal.
+
+    Up to ``concurrency`` rounds run at once (``settings.generation_concurrency``
+    by default). Every round draws from RNGs derived from ``seed``, so a fixed
+    seed yields the same candidates in the same order whatever the
+    concurrency.
+
+    A round that repeats an earlier candidate's metadata is the same
+    candidate: it is returned with that candidate's id and scores. With
+    ``distinct`` set, repeats are dropped before scoring instead, and
+    generation continues until ``n`` distinct candidates exist. It stops
+    early, returning fewer, once the agents' design space is exhausted or
+    after ``n * settings.generation_max_rounds_factor`` rounds.
+
+    Candidates are buffered in ``writer`` and written with bulk inserts in a
+    single transaction; inserts run in a worker thread so the event loop is
+    never blocked on the database. Each distinct metadata set is stored once,
+    keyed by its content hash: a candidate already in the table, including
+    one a concurrent run has just stored, reuses the stored id and objective
+    scores instead of being inserted again. When no writer is given one is
+    created from ``settings.candidate_batch_size`` and
+    ``settings.candidate_flush_interval_s``; pass your own to inspect
+    ``writer.flushes`` afterwards.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    concurrency = max(1, concurrency or settings.generation_concurrency)
+    state = DesignState(seed=seed)
+    bound = resolve_agents(agents)
+
+    session = None
+    if writer is None:
+        session = SessionLocal()
+        writer = BatchWriter(
+            session,
+            DBCandidate,
+            batch_size=settings.candidate_batch_size,
+            flush_interval=settings.candidate_flush_interval_s,
+        )
+    ensure_candidate_tables(writer.session.get_bind())
+
+    async def generate_round(idx: int) -> tuple[Candidate, List[float]]:
         # gather proposals concurrently
-        proposals = await asyncio.gather(*(a.propose(state) for a in agents))
+        proposals = await asyncio.gather(
+            *(a.propose(state, round_rng(seed, idx, a.name)) for a in bound)
+        )
         candidate = Synthesizer.merge(list(proposals), state)
         Critic.review(candidate, state)
-        scores = score_candidate(candidate, weights)
-        state.candidates.append(candidate)
-
-        # persist candidate
-        db_cand = DBCandidate(
-            id=candidate.id,
-            label=candidate.label,
-            meta=candidate.metadata,
-            scores=scores,
-        )
-        session.add(db_cand)
-        session.commit()
-
-        return VariantOut(
-            id=candidate.id,
-            label=candidate.label,
-            metadata=candidate.metadata,
-            score=scores,
-            rank=0,
-            assets=[],
-        )
+        return candidate, objective_scores(candidate, round_rng(seed, idx, "score"))
+
+    async def run_rounds(rounds: range) -> List[tuple[Candidate, List[float]]]:
+        # a fixed pool of workers pulls round indices, bounding both the
+        # number of rounds in flight and the number of live coroutines
+        results: List[tuple[Candidate, List[float]] | None] = [None] * len(rounds)
+        indices = iter(enumerate(rounds))
 
-    async def run_loop():
-        for _ in range(n):
-            variant = await generate_round()
-            variants.append(variant)
+        async def worker() -> None:
+            for slot, idx in indices:
+                results[slot] = await generate_round(idx)
 
-    asyncio.run(run_loop())
-    session.close()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(rounds)))))
+        return results  # type: ignore[return-value]
 
-    variants.sort(key=lambda v: v.score.get("composite", 0), reverse=True)
-    for idx, v in enumerate(variants, start=1):
-        v.rank = idx
+    candidates: List[Candidate] = []
+    rows: List[List[float]] = []
+    # index of each design's first candidate
+    first: Dict[Code, int] = {}
+    space = design_space_size(bound) if distinct else None
+    max_rounds = n * settings.generation_max_rounds_factor if distinct else n
+    next_round = 0
+    # rounds run in waves and are accepted in index order, so which duplicate
+    # is kept (the first) does not depend on scheduling
+    while len(candidates) < n and next_round < max_rounds:
+        if space is not None and len(first) >= space:
+            break
+        wave = max(n - len(candidates), concurrency)
+        rounds = range(next_round, min(next_round + wave, max_rounds))
+        next_round = rounds.stop
+        for candidate, row in await run_rounds(rounds):
+            if candidate.code in first:
+                if distinct:
+                    continue
+                j = first[candidate.code]
+                candidate.id, row = candidates[j].id, rows[j]
+            else:
+                first[candidate.code] = len(candidates)
+            candidates.append(candidate)
+            rows.append(row)
+            if len(candidates) == n:
+                break
+
+    ignore_conflicts = writer.ignore_conflicts
+    try:
+        hashes = [content_hash(candidate.metadata) for candidate in candidates]
+        stored = await asyncio.to_thread(_stored_candidates, writer.session, hashes)
+        _adopt(candidates, rows, hashes, stored)
+        # all composites in one matrix-vector product; score dicts are only
+        # built here, for the JSON column and the response
+        scored = score_batch(
+            np.array(rows).reshape(len(rows), len(OBJECTIVES)), weights
+        )
+        scores = to_score_dicts(scored)
+        new = [i for i in first.values() if hashes[i] not in stored]
+        # a concurrent run may insert the same designs first; its rows win
+        # and are adopted below instead of failing this run's transaction
+        writer.ignore_conflicts = True
+        for i in new:
+            candidate = candidates[i]
+            await writer.add_async(
+                {
+                    "id": candidate.id,
+                    "label": candidate.label,
+                    "meta": candidate.metadata,
+                    "scores": scores[i],
+                    "content_hash": hashes[i],
+                }
+            )
+        await writer.close_async()
+        if new:
+            winners = await asyncio.to_thread(
+                _stored_candidates, writer.session, [hashes[i] for i in new]
+            )
+            if _adopt(candidates, rows, hashes, winners):
+                scored = score_batch(np.array(rows), weights)
+                scores = to_score_dicts(scored)
+    finally:
+        writer.ignore_conflicts = ignore_conflicts
+        if session is not None:
+            session.close()
+
+    state.candidates = candidates
+    variants: List[VariantOut] = []
+    for rank, idx in enumerate(rank_order(scored).tolist(), start=1):
+        candidate = candidates[idx]
+        variants.append(
+            VariantOut(
+                id=candidate.id,
+                label=candidate.label,
+                metadata=candidate.metadata,
+                score=scores[idx],
+                rank=rank,
+                assets=[],
+            )
+        )
     return variants
+
+
+def _stored_candidates(
+    session, hashes: List[str], chunk: int = 500
+) -> Dict[str, tuple[str, List[float]]]:
+    """Map content hashes already stored to ``(id, objective scores)``."""
+    found: Dict[str, tuple[str, List[float]]] = {}
+    for start in range(0, len(hashes), chunk):
+        rows = session.execute(
+            select(DBCandidate.content_hash, DBCandidate.id, DBCandidate.scores).where(
+                DBCandidate.content_hash.in_(hashes[start : start + chunk])
+            )
+        )
+        for digest, id_, scores in rows:
+            found[digest] = (id_, objective_matrix([scores or {}])[0].tolist())
+    return found
+
+
+def _adopt(
+    candidates: List[Candidate],
+    rows: List[List[float]],
+    hashes: List[str],
+    stored: Dict[str, tuple[str, List[float]]],
+) -> bool:
+    """Give candidates the id and objectives of their stored rows.
+
+    Returns whether any candidate changed.
+    """
+    changed = False
+    for i, digest in enumerate(hashes):
+        if digest in stored and candidates[i].id != stored[digest][0]:
+            candidates[i].id, rows[i] = stored[digest]
+            changed = True
+    return changed
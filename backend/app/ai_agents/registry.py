@@ -0,0 +1,102 @@
+"""Registry of proposal agents and per-agent latency metrics.
+
+Agents register themselves by name with :func:`register_agent`; generation
+runs pick the agents they need from :data:`AGENTS` per request. Every call is
+timed into a per-agent :class:`LatencyHistogram`, and timeouts are counted,
+so slow agents that hold back generation are visible in :func:`snapshot`.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Type
+
+#: Agent classes by ``name``.
+AGENTS: Dict[str, Type[Any]] = {}
+
+
+def register_agent(cls: Type[Any]) -> Type[Any]:
+    """Class decorator adding ``cls`` to :data:`AGENTS` under ``cls.name``."""
+    AGENTS[cls.name] = cls
+    return cls
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates.
+
+    Buckets double from 0.1 ms up to about 105 s, with one overflow bucket.
+    Percentiles report the upper bound of the bucket holding the requested
+    rank, capped at the largest value observed.
+    """
+
+    BOUNDS: tuple[float, ...] = tuple(0.0001 * 2**i for i in range(21))
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Return the estimated ``q`` quantile (``0 < q <= 1``) in seconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                bound = self.BOUNDS[idx] if idx < len(self.BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max  # pragma: no cover
+
+
+class AgentStats:
+    """Call latency and timeout counters for one agent."""
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.timeouts = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lat = self.latency
+        return {
+            "calls": lat.count,
+            "timeouts": self.timeouts,
+            "mean_ms": lat.total / lat.count * 1000 if lat.count else 0.0,
+            "p50_ms": lat.percentile(0.50) * 1000,
+            "p95_ms": lat.percentile(0.95) * 1000,
+            "p99_ms": lat.percentile(0.99) * 1000,
+            "max_ms": lat.max * 1000,
+        }
+
+
+_stats: Dict[str, AgentStats] = {}
+_stats_lock = threading.Lock()
+
+
+def stats_for(name: str) -> AgentStats:
+    """Return the process-wide stats for agent ``name``."""
+    stats = _stats.get(name)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(name, AgentStats())
+    return stats
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Return metrics for every agent that has been called."""
+    return {name: stats.snapshot() for name, stats in sorted(_stats.items())}
+
+
+def reset_metrics() -> None:
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,76 @@
+"""Vectorized composite scoring for candidate batches.
+
+Objective scores for ``N`` candidates are held as an ``(N, len(OBJECTIVES))``
+float matrix, and composite scores are a single matrix-vector product with
+the :class:`~app.models.Weights` vector. Results stay in a compact structured
+array; per-candidate dicts are only built at the API boundary with
+:func:`to_score_dicts`.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+
+from app.models import Weights
+
+#: Objective names in column order; matches the fields of ``Weights``.
+OBJECTIVES: tuple[str, ...] = tuple(Weights.model_fields)
+
+SCORE_DTYPE = np.dtype(
+    [(k, np.float64) for k in OBJECTIVES] + [("composite", np.float64)]
+)
+
+
+def weight_vector(weights: Weights) -> np.ndarray:
+    """Return ``weights`` as a vector aligned with :data:`OBJECTIVES`."""
+    return np.array([getattr(weights, k) for k in OBJECTIVES], dtype=np.float64)
+
+
+def objective_matrix(scores: Iterable[Mapping[str, float]]) -> np.ndarray:
+    """Build an ``(N, len(OBJECTIVES))`` matrix from score mappings.
+
+    Objectives missing from a mapping are scored as ``0.0``.
+    """
+    rows = [[float(s.get(k) or 0.0) for k in OBJECTIVES] for s in scores]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(OBJECTIVES))
+
+
+def score_batch(objectives: np.ndarray, weights: Weights) -> np.ndarray:
+    """Score ``objectives`` (shape ``(N, len(OBJECTIVES))``) under ``weights``.
+
+    Returns:
+        np.ndarray: Structured array of length ``N`` with one field per
+        objective plus ``composite``.
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    if objectives.ndim != 2 or objectives.shape[1] != len(OBJECTIVES):
+        raise ValueError(f"expected an (N, {len(OBJECTIVES)}) objective matrix")
+    scored = np.empty(len(objectives), dtype=SCORE_DTYPE)
+    for col, k in enumerate(OBJECTIVES):
+        scored[k] = objectives[:, col]
+    scored["composite"] = objectives @ weight_vector(weights)
+    return scored
+
+
+def rank_order(scored: np.ndarray) -> np.ndarray:
+    """Return indices of ``scored`` by descending composite, ties in input order."""
+    return np.argsort(-scored["composite"], kind="stable")
+
+
+def top_k(scored: np.ndarray, k: int) -> List[int]:
+    """Return indices of the ``k`` best composites, best first.
+
+    Uses a heap-based partial sort, so only ``k`` entries are kept ordered;
+    ties keep input order, giving stable ranks across calls.
+    """
+    composite = scored["composite"].tolist()
+    return heapq.nlargest(k, range(len(composite)), key=composite.__getitem__)
+
+
+def to_score_dicts(scored: np.ndarray) -> List[Dict[str, float]]:
+    """Expand a structured score array into one dict per candidate."""
+    names = scored.dtype.names
+    return [dict(zip(names, row)) for row in scored.tolist()]
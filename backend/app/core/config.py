@@ -10,6 +10,42 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     cors_origins: list[str] = ["*"]
     redis_url: str = "redis://redis:6379/0"
+    candidate_batch_size: int = 500
+    candidate_flush_interval_s: float | None = None
+    generation_concurrency: int = 16
+    generation_max_rounds_factor: int = 10
+    generation_agents: list[str] = [
+        "aesthetics",
+        "sustainability",
+        "cost",
+        "accessibility",
+        "structural",
+    ]
+    agent_timeout_s: float = 5.0
+    stage0_batch_concurrency: int = 16
+    stage0_batch_max_sites: int = 1000
+    context_store_backend: str = "sql"
+    context_store_max_entries: int = 1024
+    context_store_max_bytes: int = 64 * 1024 * 1024
+    context_store_local_ttl_s: float = 30.0
+    context_store_ttl_s: int = 7 * 24 * 3600
+    context_store_index_refresh_s: float = 30.0
+    stage0_sweep_max_points: int = 1_000_000
+    stage0_validate_max_features: int = 100_000
+    stage0_upload_max_bytes: int = 512 * 1024 * 1024
+    stage0_upload_chunk_features: int = 1000
+    boundary_simplify_tolerance: float = 1e-6
+    boundary_simplify_min_vertices: int = 64
+    boundary_precision_decimals: int | None = 7
+    policy_base_prob: float = 0.1
+    policy_keywords: dict[str, float] = {
+        "upzone": 0.2,
+        "tod": 0.2,
+        "density bonus": 0.2,
+        "overlay": -0.1,
+        "heritage": -0.1,
+    }
+    policy_max_documents: int = 10_000
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -1,2 +1,3 @@
 from .models import Base, Project, Job, Variant, Feedback, EmotionEvent  # noqa: F401
 from .session import SessionLocal, get_db  # noqa: F401
+from .batch import BatchWriter  # noqa: F401
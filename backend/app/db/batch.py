@@ -0,0 +1,122 @@
+"""Buffered bulk inserts for high-volume tables."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# dialects with INSERT ... ON CONFLICT DO NOTHING
+_CONFLICT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class BatchWriter:
+    """Buffer rows for an ORM model and write them with bulk inserts.
+
+    Rows are flushed once ``batch_size`` rows are buffered or when
+    ``flush_interval`` seconds have passed since the previous flush. Nothing
+    is committed until :meth:`close`, so a whole run lands in one transaction.
+    ``flushes`` records the number of rows written by each flush.
+
+    With ``ignore_conflicts`` set, rows that would violate a unique
+    constraint are skipped with ``ON CONFLICT DO NOTHING`` on SQLite and
+    PostgreSQL, so concurrent writers of the same rows do not fail each
+    other's transactions; ``flushes`` then counts only rows inserted.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        model: Any,
+        batch_size: int = 500,
+        flush_interval: Optional[float] = None,
+        ignore_conflicts: bool = False,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.session = session
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ignore_conflicts = ignore_conflicts
+        self.flushes: List[int] = []
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def rows_written(self) -> int:
+        return sum(self.flushes)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Buffer ``row``, flushing if the batch is full or the interval elapsed."""
+        self._buffer.append(row)
+        if self._should_flush():
+            self.flush()
+
+    def flush(self) -> int:
+        """Insert all buffered rows and return how many were written."""
+        return self._write(self._take())
+
+    def close(self) -> None:
+        """Flush any remaining rows and commit the transaction."""
+        try:
+            self.flush()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    async def add_async(self, row: Dict[str, Any]) -> None:
+        """Like :meth:`add`, but run the insert in a worker thread."""
+        self._buffer.append(row)
+        if self._should_flush():
+            await self.flush_async()
+
+    async def flush_async(self) -> int:
+        """Like :meth:`flush`, without blocking the event loop."""
+        # take the rows on the loop thread so concurrent adds land in the
+        # next batch; the lock keeps the session to one thread at a time
+        rows = self._take()
+        async with self._lock:
+            return await asyncio.to_thread(self._write, rows)
+
+    async def close_async(self) -> None:
+        """Like :meth:`close`, without blocking the event loop."""
+        await self.flush_async()
+        async with self._lock:
+            await asyncio.to_thread(self.close)
+
+    def _should_flush(self) -> bool:
+        return len(self._buffer) >= self.batch_size or self._interval_elapsed()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        rows, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        return rows
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        written = len(rows)
+        dialect_insert = _CONFLICT_INSERTS.get(self.session.get_bind().dialect.name)
+        if self.ignore_conflicts and dialect_insert is not None:
+            stmt = dialect_insert(self.model.__table__).on_conflict_do_nothing()
+            written = self.session.connection().execute(stmt, rows).rowcount
+        else:
+            self.session.execute(insert(self.model), rows)
+        self.flushes.append(written)
+        logger.debug("flushed %d %s rows", written, self.model.__tablename__)
+        return written
+
+    def _interval_elapsed(self) -> bool:
+        if self.flush_interval is None:
+            return False
+        return time.monotonic() - self._last_flush >= self.flush_interval
@@ -1,6 +1,17 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -76,6 +87,7 @@ class Candidate(Base):
     label = Column(String, nullable=False)
     meta = Column("metadata", JSON, nullable=True)
     scores = Column(JSON, nullable=True)
+    content_hash = Column(String, nullable=True, unique=True, index=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     feedback = relationship("CandidateFeedback", back_populates="candidate", cascade="all, delete-orphan")
@@ -104,3 +116,46 @@ class CandidateEmotionEvent(Base):
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     feedback = relationship("CandidateFeedback", back_populates="emotion_events")
+
+
+class SiteContextRecord(Base):
+    """A Stage 0 site context shared by all workers, encoded by ``shared.codec``."""
+
+    __tablename__ = "site_contexts"
+
+    context_id = Column(String, primary_key=True)
+    site_name = Column(String, nullable=False, index=True)
+    payload = Column(LargeBinary, nullable=False)
+    # WKB of the boundary (or bbox) for the spatial index
+    geometry = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+
+class SiteContextBoundaryRecord(Base):
+    """Full-resolution boundary of a context whose stored boundary was reduced."""
+
+    __tablename__ = "site_context_boundaries"
+
+    context_id = Column(String, primary_key=True)
+    # zlib-compressed GeoJSON, exactly as received
+    geojson = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class SiteContextPatchRecord(Base):
+    """Patch history of a context, so patches can be reverted."""
+
+    __tablename__ = "site_context_patches"
+
+    context_id = Column(String, primary_key=True)
+    # msgpack map: the context before its first patch, that context's saved
+    # full boundary, and the patches applied since, oldest first
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
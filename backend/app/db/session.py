@@ -4,6 +4,15 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.models import (
+    Base,
+    Candidate,
+    CandidateEmotionEvent,
+    CandidateFeedback,
+    SiteContextBoundaryRecord,
+    SiteContextPatchRecord,
+    SiteContextRecord,
+)
 
 engine = create_engine(settings.database_url, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
@@ -15,3 +24,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+_candidate_tables_ready: set = set()
+_context_tables_ready: set = set()
+
+
+def ensure_candidate_tables(bind=None) -> None:
+    """Create the candidate tables once per engine rather than once per call."""
+    bind = bind or engine
+    if bind in _candidate_tables_ready:
+        return
+    Base.metadata.create_all(
+        bind=bind,
+        tables=[
+            Candidate.__table__,
+            CandidateFeedback.__table__,
+            CandidateEmotionEvent.__table__,
+        ],
+    )
+    _candidate_tables_ready.add(bind)
+
+
+def ensure_context_tables(bind=None) -> None:
+    """Create the site context tables once per engine."""
+    bind = bind or engine
+    if bind in _context_tables_ready:
+        return
+    Base.metadata.create_all(
+        bind=bind,
+        tables=[
+            SiteContextRecord.__table__,
+            SiteContextBoundaryRecord.__table__,
+            SiteContextPatchRecord.__table__,
+        ],
+    )
+    _context_tables_ready.add(bind)
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
@@ -19,8 +21,16 @@ from app.routers import (
     stage11,
     v1,
 )
+from shared import stage0_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await stage0_client.aclose()
+
 
-app = FastAPI(title=settings.app_name)
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +18,7 @@ from .generation import (
     Weights,
     VariantAsset,
     VariantOut,
+    AgentConfig,
     GenerateRequest,
     JobOut,
     JobEvent,
@@ -43,6 +44,7 @@ __all__ = [
     "Weights",
     "VariantAsset",
     "VariantOut",
+    "AgentConfig",
     "GenerateRequest",
     "JobOut",
     "JobEvent",
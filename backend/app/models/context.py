@@ -81,6 +81,10 @@ class Stage0Request(BaseModel):
     horizon_years: int = 30
 
 
+class Stage0BatchRequest(BaseModel):
+    requests: List[Stage0Request]
+
+
 class SiteContext(BaseModel):
     context_id: str = Field(default_factory=lambda: str(uuid4()))
     site_name: str
@@ -30,9 +30,17 @@ class VariantOut(BaseModel):
     assets: list[VariantAsset] = []
 
 
+class AgentConfig(BaseModel):
+    name: str
+    timeout_s: Optional[float] = None
+    fallback: Optional[Dict[str, str]] = None
+
+
 class GenerateRequest(BaseModel):
     n: int = 3
     weights: Weights = Weights()
+    distinct: bool = False
+    agents: Optional[list[AgentConfig]] = None
 
 
 class JobStatus(str, Enum):
@@ -1,18 +1,30 @@
 """Stage 0 ultra context router."""
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
+from shapely.geometry import Point, shape
+from typing import Dict, List, Optional
 
-from ..models.context import SiteContext, Stage0Request
+from ..core.config import settings
+from ..models.context import SiteContext, Stage0BatchRequest, Stage0Request
+from ..services.geojson_stream import UploadTooLarge, iter_values
 from ..services.stage0_context import (
-    CTX_CACHE,
-    build_site_context,
+    CONTEXTS,
+    build_site_context_async,
+    build_site_contexts,
     validate_boundary,
+    validate_boundaries,
     parse_upload,
+    validate_upload,
     apply_patch,
+    revert_patch,
     run_counterfactual,
+    sweep_counterfactuals,
     policy_watch,
+    policy_watch_many,
 )
 
 router = APIRouter(prefix="/stage0", tags=["Stage0"])
@@ -21,7 +33,20 @@ router = APIRouter(prefix="/stage0", tags=["Stage0"])
 @router.post("/context/build", response_model=SiteContext)
 async def build_context(req: Stage0Request) -> SiteContext:
     """Build a deterministic SiteContext."""
-    return build_site_context(req)
+    return await build_site_context_async(req)
+
+
+@router.post("/context/build/batch")
+async def build_contexts(req: Stage0BatchRequest) -> StreamingResponse:
+    """Build contexts for many sites, streamed as NDJSON as each completes."""
+    if len(req.requests) > settings.stage0_batch_max_sites:
+        raise HTTPException(
+            status_code=413,
+            detail=f"at most {settings.stage0_batch_max_sites} sites per batch",
+        )
+    return StreamingResponse(
+        build_site_contexts(req.requests), media_type="application/x-ndjson"
+    )
 
 
 class BoundaryRequest(BaseModel):
@@ -34,28 +59,130 @@ async def validate_ctx(req: BoundaryRequest) -> Dict:
     return validate_boundary(req.boundary_geojson)
 
 
+class BulkValidateRequest(BaseModel):
+    features: List[dict]
+    repair: bool = False
+
+
+@router.post("/context/validate/batch")
+async def validate_ctx_batch(req: BulkValidateRequest) -> Dict:
+    """Validate, and optionally repair, many boundaries in one call."""
+    if len(req.features) > settings.stage0_validate_max_features:
+        raise HTTPException(
+            status_code=413,
+            detail=f"at most {settings.stage0_validate_max_features} features per batch",
+        )
+    return await asyncio.to_thread(validate_boundaries, req.features, req.repair)
+
+
 @router.post("/context/upload")
 async def upload_boundary(file: UploadFile = File(...)) -> Dict:
     """Parse an uploaded boundary file."""
-    boundary = parse_upload(file)
+    _check_upload_size(file)
+    try:
+        boundary = await asyncio.to_thread(parse_upload, file)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {"boundary_geojson": boundary}
 
 
+@router.post("/context/upload/validate")
+async def upload_validate(
+    file: UploadFile = File(...), repair: bool = Query(False)
+) -> StreamingResponse:
+    """Validate every feature of an uploaded GeoJSON or NDJSON file, streamed as NDJSON."""
+    _check_upload_size(file)
+    return StreamingResponse(
+        validate_upload(file.file, repair), media_type="application/x-ndjson"
+    )
+
+
+def _check_upload_size(file: UploadFile) -> None:
+    if file.size is not None and file.size > settings.stage0_upload_max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"upload exceeds {settings.stage0_upload_max_bytes} bytes",
+        )
+
+
 @router.get("/context/{context_id}", response_model=SiteContext)
 async def get_context(context_id: str) -> SiteContext:
-    """Retrieve a cached context by id."""
-    ctx = CTX_CACHE.get(context_id)
+    """Retrieve a stored context by id."""
+    ctx = await CONTEXTS.aget(context_id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context not found")
     return ctx
 
 
+@router.get("/context/{context_id}/boundary")
+async def get_context_boundary(context_id: str, full: bool = Query(False)) -> Dict:
+    """Return a context's stored boundary, or with ``full`` the one originally received."""
+    ctx = await CONTEXTS.aget(context_id)
+    if not ctx:
+        raise HTTPException(status_code=404, detail="Context not found")
+    boundary = (
+        await CONTEXTS.afull_boundary(context_id) if full else ctx.boundary_geojson
+    )
+    return {"context_id": context_id, "full": full, "boundary_geojson": boundary}
+
+
+@router.delete("/context/{context_id}")
+async def evict_context(context_id: str) -> Dict:
+    """Evict a context from the in-process cache and the shared store."""
+    if not await CONTEXTS.aevict(context_id):
+        raise HTTPException(status_code=404, detail="Context not found")
+    return {"evicted": context_id}
+
+
+@router.get("/contexts/stats")
+async def context_store_stats() -> Dict:
+    """Report context store size, hit rates and in-process memory use."""
+    return await asyncio.to_thread(CONTEXTS.stats)
+
+
 @router.get("/sources")
 async def list_sources() -> Dict:
     """List available data sources."""
     return {"online_default": False, "adapters": ["offline_synthetic_v2", "osm_stub", "cmip_stub"]}
 
 
+@router.get("/contexts/bbox")
+async def contexts_in_bbox(
+    minx: float, miny: float, maxx: float, maxy: float, limit: int = Query(1000, ge=1)
+) -> Dict:
+    """List stored contexts whose geometry intersects a lon/lat box."""
+    index = await asyncio.to_thread(CONTEXTS.spatial_index)
+    return {"context_ids": index.bbox(minx, miny, maxx, maxy)[:limit]}
+
+
+class IntersectsRequest(BaseModel):
+    geometry: dict
+    limit: int = 1000
+
+
+@router.post("/contexts/intersects")
+async def contexts_intersecting(req: IntersectsRequest) -> Dict:
+    """List stored contexts whose geometry intersects a GeoJSON geometry."""
+    try:
+        geom = shape(req.geometry)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"invalid geometry: {exc}")
+    index = await asyncio.to_thread(CONTEXTS.spatial_index)
+    return {"context_ids": index.intersects(geom)[: req.limit]}
+
+
+@router.get("/contexts/nearest")
+async def nearest_contexts(
+    lon: float, lat: float, k: int = Query(5, ge=1, le=1000)
+) -> Dict:
+    """List the ``k`` stored contexts closest to a point, in degrees."""
+    index = await asyncio.to_thread(CONTEXTS.spatial_index)
+    hits = index.nearest(Point(lon, lat), k)
+    return {"results": [{"context_id": cid, "distance": d} for cid, d in hits]}
+
+
 class ResolveRequest(BaseModel):
     context_id: str
     patch: Dict
@@ -64,10 +191,22 @@ class ResolveRequest(BaseModel):
 @router.post("/resolve", response_model=SiteContext)
 async def resolve_context(req: ResolveRequest) -> SiteContext:
     """Apply human patch overrides to a context."""
-    ctx = CTX_CACHE.get(req.context_id)
+    ctx = await CONTEXTS.aget(req.context_id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context not found")
-    return apply_patch(ctx, req.patch)
+    try:
+        return await asyncio.to_thread(apply_patch, ctx, req.patch)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/resolve/{context_id}/revert", response_model=SiteContext)
+async def revert_context(context_id: str) -> SiteContext:
+    """Undo the most recent ``/resolve`` patch of a context."""
+    ctx = await asyncio.to_thread(revert_patch, context_id)
+    if ctx is None:
+        raise HTTPException(status_code=404, detail="No patch to revert")
+    return ctx
 
 
 class CounterfactualRequest(BaseModel):
@@ -78,7 +217,7 @@ class CounterfactualRequest(BaseModel):
 @router.post("/counterfactual")
 async def counterfactual(req: CounterfactualRequest) -> Dict:
     """Run a simple counterfactual analysis."""
-    ctx = CTX_CACHE.get(req.context_id)
+    ctx = await CONTEXTS.aget(req.context_id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context not found")
     before = ctx
@@ -87,6 +226,24 @@ async def counterfactual(req: CounterfactualRequest) -> Dict:
     return {"before": before, "after": after, "deltas": deltas}
 
 
+class SweepRequest(BaseModel):
+    context_id: str
+    deltas: Optional[List[Dict[str, float]]] = None
+    grid: Optional[Dict[str, List[float]]] = None
+
+
+@router.post("/counterfactual/sweep")
+async def counterfactual_sweep(req: SweepRequest) -> Dict:
+    """Evaluate risk scores over many deltas, returned as columns."""
+    ctx = await CONTEXTS.aget(req.context_id)
+    if not ctx:
+        raise HTTPException(status_code=404, detail="Context not found")
+    try:
+        return await asyncio.to_thread(sweep_counterfactuals, ctx, req.deltas, req.grid)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 class PolicyWatchRequest(BaseModel):
     text: Optional[str] = None
     url: Optional[str] = None
@@ -96,3 +253,27 @@ class PolicyWatchRequest(BaseModel):
 async def policy_watch_ep(req: PolicyWatchRequest) -> Dict:
     """Estimate zoning change probability from policy text."""
     return policy_watch(req.text, req.url)
+
+
+class PolicyWatchBatchRequest(BaseModel):
+    documents: List[PolicyWatchRequest]
+
+
+@router.post("/policy/watch/batch")
+async def policy_watch_batch(req: PolicyWatchBatchRequest) -> StreamingResponse:
+    """Scan many policy documents, streamed as NDJSON with keyword offsets."""
+    if len(req.documents) > settings.policy_max_documents:
+        raise HTTPException(
+            status_code=413,
+            detail=f"at most {settings.policy_max_documents} documents per batch",
+        )
+    docs = (doc.model_dump() for doc in req.documents)
+    return StreamingResponse(policy_watch_many(docs), media_type="application/x-ndjson")
+
+
+@router.post("/policy/watch/upload")
+async def policy_watch_upload(file: UploadFile = File(...)) -> StreamingResponse:
+    """Scan an NDJSON archive of ``{"text", "url"}`` documents as it is read."""
+    _check_upload_size(file)
+    docs = iter_values(file.file, settings.stage0_upload_max_bytes)
+    return StreamingResponse(policy_watch_many(docs), media_type="application/x-ndjson")
@@ -1,9 +1,13 @@
 """API router for Stage 1 variant generation endpoints."""
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from typing import Dict, List
 
-from app.models import StageResult, Weights
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models import AgentConfig, StageResult, Weights
 from app.services import stage1
 
 router = APIRouter(prefix="/stage1", tags=["Stage 1"])
@@ -12,10 +16,62 @@ router = APIRouter(prefix="/stage1", tags=["Stage 1"])
 class GenerateRequest(BaseModel):
     n_variants: int = 3
     weights: Weights | None = None
+    distinct: bool = False
+    agents: List[AgentConfig] | None = None
 
 
 @router.post("/generate", response_model=StageResult)
-def generate(req: GenerateRequest) -> StageResult:
+async def generate(req: GenerateRequest) -> StageResult:
     """Generate design variants for stage 1."""
 
-    return stage1.run(req.n_variants, req.weights)
+    try:
+        return await stage1.run_async(
+            req.n_variants, req.weights, req.distinct, req.agents
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/agents/metrics", response_model=StageResult)
+def agent_metrics() -> StageResult:
+    """Per-agent latency percentiles and timeout counts."""
+
+    return stage1.agent_metrics()
+
+
+class RerankRequest(BaseModel):
+    weights: Weights = Weights()
+    top_k: int = Field(10, ge=1)
+
+
+@router.post("/rerank", response_model=StageResult)
+def rerank(req: RerankRequest, db: Session = Depends(get_db)) -> StageResult:
+    """Re-rank stored candidates under new weights."""
+
+    return stage1.rerank(db, req.weights, req.top_k)
+
+
+class VariantPageRequest(BaseModel):
+    options: Dict[str, List[str]] | None = None
+    offset: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1, le=1000)
+
+
+@router.post("/variants", response_model=StageResult)
+def variants(req: VariantPageRequest) -> StageResult:
+    """Page through the combinatorial design space."""
+
+    return stage1.page_variants(req.options, req.offset, req.limit)
+
+
+class VariantSampleRequest(BaseModel):
+    options: Dict[str, List[str]] | None = None
+    k: int = Field(10, ge=1, le=1000)
+    seed: int | None = None
+
+
+@router.post("/variants/sample", response_model=StageResult)
+def sample_variants(req: VariantSampleRequest) -> StageResult:
+    """Sample distinct variants from the combinatorial design space."""
+
+    return stage1.sample_variants(req.options, req.k, req.seed)
@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException, WebSocket
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sse_starlette.sse import EventSourceResponse
 
+from app.ai_agents.orchestrator import run_generation_async
 from app.core.config import settings
 from app.models import (
     FeedbackIn,
@@ -48,15 +49,24 @@ async def generate(
     req: GenerateRequest, credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> JobOut:
     verify_token(credentials)
+    try:
+        variants = await run_generation_async(
+            req.n, req.weights, distinct=req.distinct, agents=req.agents
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    for variant in variants:
+        VARIANTS[str(variant.id)] = variant
+    payload = {"variants": [v.model_dump(mode="json") for v in variants]}
     workflow = chain(
-        celery_app.signature("workers.render.render"),
+        celery_app.signature("workers.render.render", args=(payload,)),
         celery_app.signature("workers.massing.massing"),
         celery_app.signature("workers.export.export"),
     )
     result = workflow.apply_async()
     job_id = uuid.UUID(result.id)
     JOBS[str(job_id)] = result
-    return JobOut(id=job_id, status=JobStatus.queued)
+    return JobOut(id=job_id, status=JobStatus.queued, variants=variants)
 
 
 @router.get("/jobs/{job_id}", response_model=JobOut)
@@ -0,0 +1,74 @@
+"""Reduce the detail of site boundaries before they are stored.
+
+Clients often send survey-grade boundaries with tens of thousands of
+vertices and 15-digit coordinates, and every cache entry, counterfactual and
+response carries a copy. :func:`reduce_boundary` simplifies such boundaries
+with a topology-preserving Douglas-Peucker pass and snaps coordinates to a
+decimal grid, which keeps the result valid while shrinking it by orders of
+magnitude. The original is kept separately by the context store and can be
+fetched on demand.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import shapely
+
+from app.core.config import settings
+
+# default for arguments where ``None`` is meaningful
+_SETTING: Any = object()
+
+
+def reduce_boundary(
+    boundary: Dict[str, Any],
+    tolerance: Optional[float] = None,
+    decimals: Optional[int] = _SETTING,
+    min_vertices: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """Return a simplified, quantized copy of a GeoJSON geometry or ``Feature``.
+
+    Geometries with more than ``min_vertices`` coordinates are simplified
+    within ``tolerance`` (in coordinate units, i.e. degrees); coordinates
+    are then rounded to ``decimals`` places. Arguments default to the
+    ``boundary_*`` settings; a tolerance of ``0`` skips simplification and
+    ``decimals=None`` skips rounding, in the argument or the setting.
+
+    Returns ``None`` when the boundary is unchanged, cannot be parsed, or
+    would not survive reduction as a valid non-empty geometry, so callers
+    keep the original.
+    """
+    tolerance = settings.boundary_simplify_tolerance if tolerance is None else tolerance
+    if decimals is _SETTING:
+        decimals = settings.boundary_precision_decimals
+    if min_vertices is None:
+        min_vertices = settings.boundary_simplify_min_vertices
+    feature = boundary.get("type") == "Feature"
+    source = boundary.get("geometry") if feature else boundary
+    try:
+        geom = shapely.from_geojson(json.dumps(source))
+    except Exception:
+        return None
+    if geom is None or geom.is_empty:
+        return None
+    reduced = geom
+    if tolerance and shapely.get_num_coordinates(geom) > min_vertices:
+        reduced = shapely.simplify(reduced, tolerance, preserve_topology=True)
+    if decimals is not None:
+        coords = shapely.get_coordinates(reduced)
+        if not np.array_equal(np.round(coords, decimals), coords):
+            # snap on GEOS's grid first so collapsed rings are handled, then
+            # round so coordinates serialize as short decimals; snapping
+            # normalizes ring order, so restore RFC 7946 orientation
+            reduced = shapely.set_precision(reduced, 10.0**-decimals)
+            reduced = shapely.orient_polygons(reduced)
+            reduced = shapely.transform(reduced, lambda c: np.round(c, decimals))
+    if reduced.is_empty or (geom.is_valid and not reduced.is_valid):
+        return None
+    out = json.loads(shapely.to_geojson(reduced))
+    if out == source:
+        return None
+    return {**boundary, "geometry": out} if feature else out
@@ -0,0 +1,151 @@
+"""Copy-on-write views of a :class:`SiteContext`.
+
+A :class:`ContextOverlay` shares its base context and records changes as a
+stack of :class:`Layer` objects holding only the fields, or the entries of
+dict fields such as ``environment``, that differ. Building a counterfactual
+or applying a patch therefore costs time proportional to the change rather
+than to the context, which includes boundary GeoJSON. Layers can be stacked,
+and popped to revert. :meth:`ContextOverlay.materialize` builds a plain
+``SiteContext`` on demand that reuses every unchanged field object of the
+base, so nothing is mutated and nothing is deep-copied.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.models.context import Lineage, SiteContext, UQNumber
+from app.services.risk import risk_scores, with_uq
+
+
+@dataclass(frozen=True)
+class Layer:
+    """One set of changes: whole ``fields`` and per-key dict ``entries``."""
+
+    fields: Mapping[str, Any] = field(default_factory=dict)
+    entries: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+    label: str = ""
+
+
+@lru_cache(maxsize=None)
+def _adapter(name: str) -> TypeAdapter:
+    return TypeAdapter(SiteContext.model_fields[name].annotation)
+
+
+class ContextOverlay:
+    """A base context plus a stack of layers; later layers win.
+
+    Overlays are immutable: :meth:`push`, :meth:`pop` and the helpers that
+    build layers return new overlays sharing the same base.
+    """
+
+    __slots__ = ("base", "layers", "_view")
+
+    def __init__(self, base: SiteContext, layers: Tuple[Layer, ...] = ()) -> None:
+        self.base = base
+        self.layers = layers
+        self._view: Optional[SiteContext] = None
+
+    def push(self, layer: Layer) -> "ContextOverlay":
+        return ContextOverlay(self.base, self.layers + (layer,))
+
+    def pop(self) -> "ContextOverlay":
+        """Return the overlay without its most recent layer."""
+        if not self.layers:
+            raise IndexError("no layer to pop")
+        return ContextOverlay(self.base, self.layers[:-1])
+
+    def get(self, name: str) -> Any:
+        """Return the current value of field ``name`` without materializing."""
+        for layer in reversed(self.layers):
+            if name in layer.fields:
+                value = layer.fields[name]
+                break
+        else:
+            value = getattr(self.base, name)
+        entries = self._entries_since(name)
+        return {**value, **entries} if entries else value
+
+    def changes(self) -> Dict[str, Any]:
+        """Return the changed fields, merged across layers."""
+        return {name: self.get(name) for name in self._touched()}
+
+    def materialize(self) -> SiteContext:
+        """Return the overlay as a ``SiteContext``, built once and then cached."""
+        if self._view is None:
+            touched = self._touched()
+            self._view = (
+                self.base.model_copy(update={name: self.get(name) for name in touched})
+                if touched
+                else self.base
+            )
+        return self._view
+
+    def counterfactual(self, delta: Mapping[str, float]) -> "ContextOverlay":
+        """Add ``delta`` to ``environment`` values; unknown keys are ignored.
+
+        Risk scores are recomputed from the new values, as
+        ``stage0_context.run_counterfactual`` always did.
+        """
+        env = self.get("environment")
+        changed: Dict[str, UQNumber] = {
+            key: with_uq(env[key].value + val, env[key].source)
+            for key, val in delta.items()
+            if key in env
+        }
+        risk = risk_scores(self.get("climate"), {**env, **changed})
+        return self.push(
+            Layer(
+                fields={"risk_scores": risk},
+                entries={"environment": changed},
+                label="counterfactual",
+            )
+        )
+
+    def patch(self, patch: Mapping[str, Any]) -> "ContextOverlay":
+        """Replace top-level fields with validated values, marking lineage.
+
+        Every lineage entry's transform gains ``+ human_override``, as
+        ``apply_patch`` always did, but in new ``Lineage`` objects.
+
+        Raises:
+            ValueError: If a key is not a ``SiteContext`` field or its value
+                does not validate.
+        """
+        unknown = [k for k in patch if k not in SiteContext.model_fields]
+        if unknown:
+            raise ValueError(f"unknown context fields: {', '.join(unknown)}")
+        fields = {k: _adapter(k).validate_python(v) for k, v in patch.items()}
+        lineage = fields.pop("lineage", None)
+        lineage = self.get("lineage") if lineage is None else lineage
+        marked = {
+            key: Lineage(
+                source_id=ln.source_id,
+                license=ln.license,
+                transform=ln.transform + "+ human_override",
+            )
+            for key, ln in lineage.items()
+        }
+        fields["lineage"] = marked
+        return self.push(Layer(fields=fields, label="patch"))
+
+    def _touched(self) -> Tuple[str, ...]:
+        names: Dict[str, None] = {}
+        for layer in self.layers:
+            names.update(dict.fromkeys(layer.fields))
+            names.update(dict.fromkeys(layer.entries))
+        return tuple(names)
+
+    def _entries_since(self, name: str) -> Dict[str, Any]:
+        # entry changes count only after the last layer replacing the field
+        merged: Dict[str, Any] = {}
+        for layer in self.layers:
+            if name in layer.fields:
+                merged = {}
+            if name in layer.entries:
+                merged.update(layer.entries[name])
+        return merged
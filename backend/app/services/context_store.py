@@ -0,0 +1,510 @@
+"""Shared, bounded storage for built Stage 0 site contexts.
+
+A :class:`ContextStore` keeps recently used contexts in a bounded in-process
+LRU (L1) in front of a backend every worker can reach, so ``/context/{id}``,
+``/resolve`` and ``/counterfactual`` work whichever worker serves them and
+survive restarts. L1 entries expire after ``context_store_local_ttl_s`` so
+updates made through another worker become visible.
+
+Each store also keeps a :class:`~app.services.spatial_index.SpatialIndex` of
+context geometries. Its own writes are indexed immediately; geometries
+written by other workers are loaded from the backend at most every
+``context_store_index_refresh_s`` seconds when the index is queried.
+Evictions made by other workers are not seen until a restart.
+
+Contexts are stored with reduced boundaries (see
+:mod:`app.services.boundary_simplify`); the full-resolution originals are
+saved separately with :meth:`ContextStore.put_boundaries` and read back only
+on request.
+
+Patched contexts also keep their patch history (see
+:meth:`ContextStore.record_patch`): the context as it was before its first
+patch and every patch since, so patches can be reverted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Protocol, Tuple
+
+import msgpack  # type: ignore
+import shapely
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.db.models import (
+    SiteContextBoundaryRecord,
+    SiteContextPatchRecord,
+    SiteContextRecord,
+)
+from app.db.session import SessionLocal, ensure_context_tables
+from app.models.context import SiteContext
+from app.services.spatial_index import SpatialIndex, context_geometry
+from shared import cache
+from shared.codec import Codec, CodecError, default_codec
+from shared.lru import LRUCache
+
+
+#: ``(context_id, site_name, payload, geometry WKB or None)``
+Row = Tuple[str, str, bytes, Optional[bytes]]
+
+
+@dataclass(frozen=True)
+class PatchHistory:
+    """A context before its first patch, and the patches applied since.
+
+    ``boundary`` is the full-resolution boundary saved for ``base``, if any.
+    """
+
+    base: SiteContext
+    boundary: Optional[Dict[str, Any]]
+    patches: Tuple[Dict[str, Any], ...]
+
+
+class ContextBackend(Protocol):
+    name: str
+
+    def load(self, context_id: str) -> Optional[bytes]:
+        """Return the encoded context, or ``None``."""
+
+    def save(self, items: Iterable[Row]) -> None:
+        """Insert or replace ``(context_id, site_name, payload, wkb)`` rows."""
+
+    def geometries(
+        self, since: Optional[datetime] = None
+    ) -> List[Tuple[str, bytes, datetime]]:
+        """Return ``(context_id, wkb, updated_at)`` for rows updated since ``since``."""
+
+    def delete(self, context_id: str) -> bool:
+        """Delete a context, its boundary and patches; return whether it existed."""
+
+    def load_boundary(self, context_id: str) -> Optional[bytes]:
+        """Return the compressed full boundary, or ``None``."""
+
+    def save_boundaries(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        """Insert or replace ``(context_id, compressed GeoJSON)`` pairs."""
+
+    def delete_boundary(self, context_id: str) -> None:
+        """Delete a saved full boundary, if any."""
+
+    def load_patches(self, context_id: str) -> Optional[bytes]:
+        """Return the encoded patch history, or ``None``."""
+
+    def save_patches(self, context_id: str, payload: bytes) -> None:
+        """Insert or replace an encoded patch history."""
+
+    def delete_patches(self, context_id: str) -> None:
+        """Delete a patch history, if any."""
+
+    def count(self) -> Optional[int]:
+        """Return the number of stored contexts, or ``None`` if unknown."""
+
+
+class SQLContextBackend:
+    """Store contexts in the ``site_contexts`` table."""
+
+    name = "sql"
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self._session_factory = session_factory
+
+    def _session(self):
+        session = self._session_factory()
+        ensure_context_tables(session.get_bind())
+        return session
+
+    def load(self, context_id: str) -> Optional[bytes]:
+        with self._session() as session:
+            return session.scalar(
+                select(SiteContextRecord.payload).where(
+                    SiteContextRecord.context_id == context_id
+                )
+            )
+
+    def save(self, items: Iterable[Row]) -> None:
+        with self._session() as session:
+            for context_id, site_name, payload, geometry in items:
+                session.merge(
+                    SiteContextRecord(
+                        context_id=context_id,
+                        site_name=site_name,
+                        payload=payload,
+                        geometry=geometry,
+                    )
+                )
+            session.commit()
+
+    def geometries(
+        self, since: Optional[datetime] = None
+    ) -> List[Tuple[str, bytes, datetime]]:
+        """Return ``(context_id, wkb, updated_at)`` for rows updated at or after ``since``."""
+        query = select(
+            SiteContextRecord.context_id,
+            SiteContextRecord.geometry,
+            SiteContextRecord.updated_at,
+        ).where(SiteContextRecord.geometry.is_not(None))
+        if since is not None:
+            query = query.where(SiteContextRecord.updated_at >= since)
+        with self._session() as session:
+            return [tuple(row) for row in session.execute(query)]
+
+    def delete(self, context_id: str) -> bool:
+        with self._session() as session:
+            result = session.execute(
+                delete(SiteContextRecord).where(
+                    SiteContextRecord.context_id == context_id
+                )
+            )
+            session.execute(self._delete_boundary(context_id))
+            session.execute(self._delete_patches(context_id))
+            session.commit()
+            return bool(result.rowcount)
+
+    def load_boundary(self, context_id: str) -> Optional[bytes]:
+        with self._session() as session:
+            return session.scalar(
+                select(SiteContextBoundaryRecord.geojson).where(
+                    SiteContextBoundaryRecord.context_id == context_id
+                )
+            )
+
+    def save_boundaries(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        with self._session() as session:
+            for context_id, geojson in items:
+                session.merge(
+                    SiteContextBoundaryRecord(context_id=context_id, geojson=geojson)
+                )
+            session.commit()
+
+    def delete_boundary(self, context_id: str) -> None:
+        with self._session() as session:
+            session.execute(self._delete_boundary(context_id))
+            session.commit()
+
+    @staticmethod
+    def _delete_boundary(context_id: str):
+        return delete(SiteContextBoundaryRecord).where(
+            SiteContextBoundaryRecord.context_id == context_id
+        )
+
+    def load_patches(self, context_id: str) -> Optional[bytes]:
+        with self._session() as session:
+            return session.scalar(
+                select(SiteContextPatchRecord.payload).where(
+                    SiteContextPatchRecord.context_id == context_id
+                )
+            )
+
+    def save_patches(self, context_id: str, payload: bytes) -> None:
+        with self._session() as session:
+            session.merge(
+                SiteContextPatchRecord(context_id=context_id, payload=payload)
+            )
+            session.commit()
+
+    def delete_patches(self, context_id: str) -> None:
+        with self._session() as session:
+            session.execute(self._delete_patches(context_id))
+            session.commit()
+
+    @staticmethod
+    def _delete_patches(context_id: str):
+        return delete(SiteContextPatchRecord).where(
+            SiteContextPatchRecord.context_id == context_id
+        )
+
+    def count(self) -> Optional[int]:
+        with self._session() as session:
+            return session.scalar(select(func.count()).select_from(SiteContextRecord))
+
+
+class CacheContextBackend:
+    """Store contexts in Redis through :mod:`shared.cache`."""
+
+    name = "redis"
+
+    def __init__(self, ttl: Optional[int] = None) -> None:
+        self.ttl = ttl or settings.context_store_ttl_s
+
+    @staticmethod
+    def _key(context_id: str) -> str:
+        return f"stage0:ctx:{context_id}"
+
+    @staticmethod
+    def _boundary_key(context_id: str) -> str:
+        return f"stage0:ctx:{context_id}:boundary"
+
+    @staticmethod
+    def _patches_key(context_id: str) -> str:
+        return f"stage0:ctx:{context_id}:patches"
+
+    def load(self, context_id: str) -> Optional[bytes]:
+        payload = cache.get(self._key(context_id))
+        return payload.encode() if isinstance(payload, str) else payload
+
+    def save(self, items: Iterable[Row]) -> None:
+        for context_id, _, payload, _ in items:
+            cache.set(self._key(context_id), payload, self.ttl)
+
+    def geometries(
+        self, since: Optional[datetime] = None
+    ) -> List[Tuple[str, bytes, datetime]]:
+        # keys cannot be listed cheaply; only this process's writes are indexed
+        return []
+
+    def delete(self, context_id: str) -> bool:
+        existed = cache.get(self._key(context_id)) is not None
+        cache.delete(self._key(context_id))
+        self.delete_boundary(context_id)
+        self.delete_patches(context_id)
+        return existed
+
+    def load_boundary(self, context_id: str) -> Optional[bytes]:
+        payload = cache.get(self._boundary_key(context_id))
+        return payload.encode() if isinstance(payload, str) else payload
+
+    def save_boundaries(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        for context_id, geojson in items:
+            cache.set(self._boundary_key(context_id), geojson, self.ttl)
+
+    def delete_boundary(self, context_id: str) -> None:
+        cache.delete(self._boundary_key(context_id))
+
+    def load_patches(self, context_id: str) -> Optional[bytes]:
+        payload = cache.get(self._patches_key(context_id))
+        return payload.encode() if isinstance(payload, str) else payload
+
+    def save_patches(self, context_id: str, payload: bytes) -> None:
+        cache.set(self._patches_key(context_id), payload, self.ttl)
+
+    def delete_patches(self, context_id: str) -> None:
+        cache.delete(self._patches_key(context_id))
+
+    def count(self) -> Optional[int]:
+        return None
+
+
+class ContextStore:
+    """Bounded L1 cache of decoded contexts in front of a shared backend.
+
+    L1 is limited by entry count and by the encoded size of the contexts it
+    holds. Writes go to both tiers; :meth:`evict` removes a context from
+    both.
+    """
+
+    def __init__(
+        self,
+        backend: ContextBackend,
+        codec: Optional[Codec] = None,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        local_ttl: Optional[float] = None,
+        index_refresh: float = 30.0,
+    ) -> None:
+        self.backend = backend
+        self.codec = codec or default_codec()
+        self._local: LRUCache[SiteContext] = LRUCache(
+            max_entries=max_entries, max_bytes=max_bytes, default_ttl=local_ttl
+        )
+        self.backend_hits = 0
+        self.backend_misses = 0
+        self.index = SpatialIndex()
+        self.index_refresh = index_refresh
+        self._index_lock = threading.Lock()
+        self._index_synced_at: Optional[float] = None
+        self._index_high_water: Optional[datetime] = None
+
+    @classmethod
+    def from_settings(cls) -> "ContextStore":
+        backend: ContextBackend
+        if settings.context_store_backend == "redis":
+            backend = CacheContextBackend()
+        elif settings.context_store_backend == "sql":
+            backend = SQLContextBackend()
+        else:
+            raise ValueError(
+                f"unknown context store backend: {settings.context_store_backend}"
+            )
+        return cls(
+            backend,
+            max_entries=settings.context_store_max_entries,
+            max_bytes=settings.context_store_max_bytes,
+            local_ttl=settings.context_store_local_ttl_s,
+            index_refresh=settings.context_store_index_refresh_s,
+        )
+
+    def get(self, context_id: str) -> Optional[SiteContext]:
+        ctx = self._local.get(context_id)
+        if ctx is not None:
+            return ctx
+        payload = self.backend.load(context_id)
+        if payload is None:
+            self.backend_misses += 1
+            return None
+        try:
+            ctx = self.codec.decode(SiteContext, payload)
+        except CodecError:
+            self.backend_misses += 1
+            return None
+        self.backend_hits += 1
+        self._local.set(context_id, ctx, size=len(payload))
+        return ctx
+
+    def put(self, ctx: SiteContext) -> None:
+        self.put_many([ctx])
+
+    def put_many(self, ctxs: Iterable[SiteContext]) -> None:
+        """Store several contexts with one backend write."""
+        rows: List[Row] = []
+        geoms = []
+        for ctx in ctxs:
+            payload = self.codec.encode(ctx)
+            self._local.set(ctx.context_id, ctx, size=len(payload))
+            geom = context_geometry(ctx)
+            if geom is not None:
+                geoms.append((ctx.context_id, geom))
+            wkb = None if geom is None else shapely.to_wkb(geom)
+            rows.append((ctx.context_id, ctx.site_name, payload, wkb))
+        if rows:
+            self.backend.save(rows)
+            self.index.add_many(geoms)
+
+    def put_boundaries(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Save full-resolution boundaries for contexts stored with reduced ones."""
+        rows = [
+            (
+                context_id,
+                zlib.compress(json.dumps(boundary, separators=(",", ":")).encode(), 1),
+            )
+            for context_id, boundary in items
+        ]
+        if rows:
+            self.backend.save_boundaries(rows)
+
+    def drop_boundary(self, context_id: str) -> None:
+        """Forget a saved full-resolution boundary, e.g. once it is replaced."""
+        self.backend.delete_boundary(context_id)
+
+    def full_boundary(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Return the boundary as received, or the stored one if it was not reduced."""
+        payload = self.backend.load_boundary(context_id)
+        if payload is not None:
+            return json.loads(zlib.decompress(payload))
+        ctx = self.get(context_id)
+        return None if ctx is None else ctx.boundary_geojson
+
+    def record_patch(self, ctx: SiteContext, patch: Mapping[str, Any]) -> None:
+        """Append ``patch``, which must be JSON-like, to the history of ``ctx``.
+
+        ``ctx`` is the context the patch was applied to; the first patch
+        saves it and its full boundary as the base of the history. Call this
+        before replacing the saved boundary.
+        """
+        payload = self.backend.load_patches(ctx.context_id)
+        if payload is None:
+            history = {
+                "base": self.codec.encode(ctx),
+                "boundary": self.backend.load_boundary(ctx.context_id),
+                "patches": [],
+            }
+        else:
+            history = msgpack.unpackb(payload)
+        history["patches"].append(dict(patch))
+        self.backend.save_patches(
+            ctx.context_id, msgpack.packb(history, use_bin_type=True)
+        )
+
+    def patch_history(self, context_id: str) -> Optional[PatchHistory]:
+        """Return the patch history of a context, or ``None`` if it has none."""
+        payload = self.backend.load_patches(context_id)
+        if payload is None:
+            return None
+        history = msgpack.unpackb(payload)
+        boundary = history["boundary"]
+        return PatchHistory(
+            base=self.codec.decode(SiteContext, history["base"]),
+            boundary=None
+            if boundary is None
+            else json.loads(zlib.decompress(boundary)),
+            patches=tuple(history["patches"]),
+        )
+
+    def pop_patch(self, context_id: str) -> None:
+        """Drop the most recent patch from a history, and the history once empty."""
+        payload = self.backend.load_patches(context_id)
+        if payload is None:
+            return
+        history = msgpack.unpackb(payload)
+        history["patches"].pop()
+        if history["patches"]:
+            self.backend.save_patches(
+                context_id, msgpack.packb(history, use_bin_type=True)
+            )
+        else:
+            self.backend.delete_patches(context_id)
+
+    def evict(self, context_id: str) -> bool:
+        """Remove a context from both tiers; return whether it existed."""
+        local = self._local.delete(context_id)
+        self.index.remove(context_id)
+        return self.backend.delete(context_id) or local
+
+    def clear_local(self) -> None:
+        """Drop every L1 entry, e.g. to release memory; the backend is kept."""
+        self._local.clear()
+
+    def spatial_index(self) -> SpatialIndex:
+        """Return the spatial index, first loading geometries other workers stored."""
+        with self._index_lock:
+            now = time.monotonic()
+            if (
+                self._index_synced_at is not None
+                and now - self._index_synced_at < self.index_refresh
+            ):
+                return self.index
+            rows = self.backend.geometries(self._index_high_water)
+            if rows:
+                ids, wkbs, stamps = zip(*rows)
+                self.index.add_many(zip(ids, shapely.from_wkb(list(wkbs))))
+                self._index_high_water = max(stamps)
+            self._index_synced_at = now
+        return self.index
+
+    async def aget(self, context_id: str) -> Optional[SiteContext]:
+        ctx = self._local.get(context_id)
+        if ctx is not None:
+            return ctx
+        return await asyncio.to_thread(self.get, context_id)
+
+    async def aput(self, ctx: SiteContext) -> None:
+        await asyncio.to_thread(self.put, ctx)
+
+    async def aput_many(self, ctxs: Iterable[SiteContext]) -> None:
+        await asyncio.to_thread(self.put_many, list(ctxs))
+
+    async def aput_boundaries(
+        self, items: Iterable[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        await asyncio.to_thread(self.put_boundaries, list(items))
+
+    async def afull_boundary(self, context_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.full_boundary, context_id)
+
+    async def aevict(self, context_id: str) -> bool:
+        return await asyncio.to_thread(self.evict, context_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "stored": self.backend.count(),
+            "backend_hits": self.backend_hits,
+            "backend_misses": self.backend_misses,
+            "local": self._local.stats(),
+            "spatial": self.index.stats(),
+        }
@@ -0,0 +1,204 @@
+"""Incremental parsing of large GeoJSON uploads.
+
+:func:`iter_features` reads a file object in fixed-size chunks and yields
+one feature (or bare geometry) at a time, so memory stays proportional to
+the largest single feature rather than to the file. It accepts:
+
+* a ``FeatureCollection``, whose ``features`` array is streamed element by
+  element while its other members are skipped;
+* a single ``Feature`` or geometry object;
+* newline-delimited GeoJSON, i.e. any sequence of such objects separated by
+  whitespace.
+
+:func:`iter_values` reads plain JSON or NDJSON the same way but yields each
+top-level value whole, for uploads that are not GeoJSON.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import IO, Any, Dict, Iterator, Optional
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+# the longest token a chunk boundary can cut so it fails to decode
+# (``-Infinit``; an escape such as ``\u00e`` is shorter)
+_MAX_CUT = 8
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds its size cap."""
+
+
+class _Reader:
+    """A text buffer over a binary file with ``raw_decode`` that refills."""
+
+    def __init__(
+        self,
+        fileobj: IO[bytes],
+        max_bytes: Optional[int],
+        chunk_size: int,
+        kind: str = "GeoJSON",
+    ) -> None:
+        self.fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        # names the format in error messages
+        self.kind = kind
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buf = ""
+        self.pos = 0
+        self.bytes_read = 0
+        self.eof = False
+
+    def _fill(self, at_least: int = 1) -> bool:
+        """Append chunks until ``at_least`` more characters are buffered."""
+        if self.eof:
+            return False
+        if self.pos:
+            self.buf, self.pos = self.buf[self.pos :], 0
+        target = len(self.buf) + at_least
+        while len(self.buf) < target:
+            chunk = self.fileobj.read(self.chunk_size)
+            if not chunk:
+                self.buf += self.decoder.decode(b"", final=True)
+                self.eof = True
+                break
+            self.bytes_read += len(chunk)
+            if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+                raise UploadTooLarge(f"upload exceeds {self.max_bytes} bytes")
+            self.buf += self.decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, or ``""`` at the end."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(
+                f"invalid {self.kind}: expected {' or '.join(chars)} at byte ~{self.offset}"
+            )
+        self.pos += 1
+        return ch
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more input until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                # an incomplete value fails at the end of the buffer; grow it
+                # geometrically so a huge value is not re-decoded per chunk
+                if not _truncated(exc, len(self.buf)):
+                    raise ValueError(f"invalid {self.kind}: {exc.msg}") from exc
+                if not self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                    raise ValueError(f"invalid {self.kind}: {exc.msg}") from exc
+                continue
+            # a number cut at a chunk boundary decodes as a shorter number
+            # (``12.`` as ``12``, ``1e`` as ``1``); read on before trusting it
+            if (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and not self.eof
+                and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)
+            ):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    @property
+    def offset(self) -> int:
+        return (
+            self.bytes_read
+            - len(self.buf.encode())
+            + len(self.buf[: self.pos].encode())
+        )
+
+
+def _truncated(exc: json.JSONDecodeError, size: int) -> bool:
+    """Whether ``exc`` could be due to a value cut off at ``size`` characters.
+
+    Errors anywhere else are real, and raised without reading further.
+    """
+    if exc.msg.startswith("Unterminated string"):
+        # reported at the opening quote, however long the string
+        return True
+    return size - exc.pos <= _MAX_CUT and exc.msg.startswith(
+        ("Expecting", "Invalid \\uXXXX escape")
+    )
+
+
+def iter_features(
+    fileobj: IO[bytes], max_bytes: Optional[int] = None, chunk_size: int = 1 << 16
+) -> Iterator[Dict[str, Any]]:
+    """Yield features or geometries from a GeoJSON or NDJSON upload.
+
+    Raises:
+        UploadTooLarge: Once more than ``max_bytes`` have been read.
+        ValueError: On malformed JSON or a top-level value that is not an
+            object.
+    """
+    reader = _Reader(fileobj, max_bytes, chunk_size)
+    while reader.peek():
+        reader.expect("{")
+        members: Dict[str, Any] = {}
+        streamed = False
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                if not isinstance(key, str):
+                    raise ValueError("invalid GeoJSON: object keys must be strings")
+                reader.expect(":")
+                if key == "features" and reader.peek() == "[":
+                    reader.pos += 1
+                    streamed = True
+                    if reader.peek() == "]":
+                        reader.pos += 1
+                    else:
+                        while True:
+                            feature = reader.value()
+                            if not isinstance(feature, dict):
+                                raise ValueError(
+                                    "invalid GeoJSON: features must be objects"
+                                )
+                            yield feature
+                            if reader.expect(",]") == "]":
+                                break
+                else:
+                    members[key] = reader.value()
+                if reader.expect(",}") == "}":
+                    break
+        if not streamed and members.get("type") != "FeatureCollection":
+            yield members
+
+
+def iter_values(
+    fileobj: IO[bytes], max_bytes: Optional[int] = None, chunk_size: int = 1 << 16
+) -> Iterator[Any]:
+    """Yield each top-level value of a JSON or NDJSON upload, as decoded.
+
+    Unlike :func:`iter_features`, no member is treated specially: a value
+    with a ``features`` array or of ``type`` ``FeatureCollection`` is
+    yielded whole, like any other.
+
+    Raises:
+        UploadTooLarge: Once more than ``max_bytes`` have been read.
+        ValueError: On malformed JSON.
+    """
+    reader = _Reader(fileobj, max_bytes, chunk_size, kind="JSON")
+    while reader.peek():
+        yield reader.value()
@@ -0,0 +1,84 @@
+"""Keyword scanning of policy documents for zoning change signals.
+
+A :class:`PolicyScanner` compiles a keyword-to-weight table into one regular
+expression, so a document is scanned in a single pass however many keywords
+there are, and reports where each keyword occurs. Matching is on the
+lowercased text and counts substrings, as ``policy_watch`` always has, so
+``"tod"`` also matches ``"today"``.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Mapping, Optional
+
+
+class PolicyScanner:
+    """Score documents by which weighted keywords they contain.
+
+    A document's probability is ``base`` plus the weight of every keyword it
+    contains at least once, added in table order and clamped to ``[0, 1]``.
+    """
+
+    def __init__(self, weights: Mapping[str, float], base: float = 0.1) -> None:
+        if not weights or not all(weights):
+            raise ValueError("keywords must be non-empty strings")
+        self.weights = dict(weights)
+        self.base = base
+        self._topics = {k.lower(): k for k in self.weights}
+        needles = sorted(self._topics, key=len, reverse=True)
+        # longest first, so a match is the longest keyword at its position;
+        # shorter keywords it starts with are added from _prefixes
+        self._pattern = re.compile("|".join(map(re.escape, needles)))
+        self._prefixes = {
+            a: [b for b in needles if b != a and a.startswith(b)] for a in needles
+        }
+        # finditer resumes after each match, so keywords that could begin
+        # inside a match are checked at those offsets directly
+        self._inner = {
+            a: [
+                (i, b)
+                for i in range(1, len(a))
+                for b in needles
+                if a.startswith(b, i) or b.startswith(a[i:])
+            ]
+            for a in needles
+        }
+
+    def matches(self, text: Optional[str]) -> Dict[str, List[int]]:
+        """Return the start offsets of each keyword found, by keyword.
+
+        Offsets index the lowercased text, which matches the original for
+        all but a few non-ASCII characters.
+        """
+        found: Dict[str, List[int]] = {}
+        txt = (text or "").lower()
+        for m in self._pattern.finditer(txt):
+            start, needle = m.start(), m.group()
+            for hit in (needle, *self._prefixes[needle]):
+                found.setdefault(self._topics[hit], []).append(start)
+            for i, hit in self._inner[needle]:
+                if txt.startswith(hit, start + i):
+                    found.setdefault(self._topics[hit], []).append(start + i)
+        return found
+
+    def watch(
+        self, text: Optional[str], url: Optional[str], offsets: bool = False
+    ) -> Dict[str, Any]:
+        """Estimate the zoning change probability of one document."""
+        found = self.matches(text)
+        prob = self.base
+        topics: List[str] = []
+        for keyword, weight in self.weights.items():
+            if keyword in found:
+                prob += weight
+                topics.append(keyword)
+        result: Dict[str, Any] = {
+            "zoning_change_prob_0_1": max(0.0, min(1.0, prob)),
+            "topics": topics,
+            "citations": [url] if url else [],
+            "explain": "keywords detected" if topics else "baseline probability",
+        }
+        if offsets:
+            result["matches"] = {k: found[k] for k in topics}
+        return result
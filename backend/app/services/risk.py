@@ -0,0 +1,57 @@
+"""Risk scores derived from a site context's climate and environment.
+
+These are the counterfactual helpers retained from the mock Stage 0
+implementation, shared by :mod:`app.services.stage0_context` and
+:mod:`app.services.context_overlay`.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Mapping
+
+import numpy as np
+
+from app.models.context import RiskScores, UQNumber
+
+
+def with_uq(x: float, src: str, band: float = 0.15) -> UQNumber:
+    low = x * (1 - band)
+    high = x * (1 + band)
+    return UQNumber(
+        value=x, ci95_low=max(0.0, low), ci95_high=max(low, high), source=src
+    )
+
+
+def risk_scores(
+    climate: Dict[str, UQNumber], environment: Dict[str, UQNumber]
+) -> RiskScores:
+    flood = int(min(100, environment["water_pct"].value * 800))
+    heat = int(
+        min(
+            100,
+            climate["avg_temp_c"].value * 3 - environment["greenspace_pct"].value * 50,
+        )
+    )
+    quake = 50
+    pollution = int(min(100, 60 - environment["greenspace_pct"].value * 50))
+    return RiskScores(
+        flood_0_100=flood, quake_0_100=quake, heat_0_100=heat, pollution_0_100=pollution
+    )
+
+
+def risk_columns(
+    avg_temp_c: float, env: Mapping[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """Array form of :func:`risk_scores`; ``int()`` truncates toward zero."""
+    green = env["greenspace_pct"]
+    n = len(green)
+    return {
+        "flood_0_100": np.trunc(np.minimum(100, env["water_pct"] * 800)).astype(
+            np.int64
+        ),
+        "quake_0_100": np.full(n, 50, dtype=np.int64),
+        "heat_0_100": np.trunc(np.minimum(100, avg_temp_c * 3 - green * 50)).astype(
+            np.int64
+        ),
+        "pollution_0_100": np.trunc(np.minimum(100, 60 - green * 50)).astype(np.int64),
+    }
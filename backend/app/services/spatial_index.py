@@ -0,0 +1,165 @@
+"""STRtree index over stored site context geometries.
+
+Each context is indexed by its boundary polygon, or by its ``bbox`` when it
+has no usable boundary. shapely's ``STRtree`` is immutable, so additions
+collect in a small pending set that is scanned alongside the tree and folded
+into a rebuilt tree once it grows past a fraction of the indexed size;
+removals are tombstoned the same way. Stored and query geometries are
+prepared, so repeated predicate checks do not rebuild their edge indexes.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import box, shape
+from shapely.geometry.base import BaseGeometry
+
+from app.models.context import SiteContext
+
+
+def context_geometry(ctx: SiteContext) -> Optional[BaseGeometry]:
+    """Return the geometry to index for ``ctx``, or ``None`` if it has none."""
+    if ctx.boundary_geojson:
+        try:
+            geom = shape(ctx.boundary_geojson)
+            if not geom.is_empty:
+                return geom if geom.is_valid else shapely.make_valid(geom)
+        except Exception:
+            pass
+    if len(ctx.bbox) == 4:
+        return box(*ctx.bbox)
+    return None
+
+
+class SpatialIndex:
+    """Map context ids to geometries and answer bbox, intersects and nearest."""
+
+    def __init__(
+        self, min_rebuild: int = 256, rebuild_fraction: float = 1 / 64
+    ) -> None:
+        self.min_rebuild = min_rebuild
+        self.rebuild_fraction = rebuild_fraction
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._geoms = np.empty(0, dtype=object)
+        self._tree = shapely.STRtree(self._geoms)
+        self._pos: Dict[str, int] = {}
+        self._dead: set[int] = set()
+        self._pending: Dict[str, BaseGeometry] = {}
+        self._pending_geoms: Optional[np.ndarray] = None
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._pos) + len(self._pending)
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._pos or context_id in self._pending
+
+    def add(self, context_id: str, geom: BaseGeometry) -> None:
+        self.add_many([(context_id, geom)])
+
+    def add_many(self, items: Iterable[Tuple[str, BaseGeometry]]) -> None:
+        with self._lock:
+            for context_id, geom in items:
+                self._drop(context_id)
+                shapely.prepare(geom)
+                self._pending[context_id] = geom
+            self._pending_geoms = None
+            self._maybe_rebuild()
+
+    def remove(self, context_id: str) -> bool:
+        with self._lock:
+            found = self._drop(context_id)
+            self._maybe_rebuild()
+            return found
+
+    def bbox(self, minx: float, miny: float, maxx: float, maxy: float) -> List[str]:
+        """Return ids of contexts intersecting the given box."""
+        return self.intersects(box(minx, miny, maxx, maxy))
+
+    def intersects(self, geom: BaseGeometry) -> List[str]:
+        """Return ids of contexts whose geometry intersects ``geom``."""
+        shapely.prepare(geom)
+        with self._lock:
+            hits = self._tree.query(geom, predicate="intersects")
+            ids = [self._ids[i] for i in hits if i not in self._dead]
+            if self._pending:
+                mask = shapely.intersects(geom, self._pending_array())
+                ids += [cid for cid, hit in zip(self._pending, mask) if hit]
+        return ids
+
+    def nearest(self, geom: BaseGeometry, k: int = 1) -> List[Tuple[str, float]]:
+        """Return up to ``k`` ``(id, distance)`` pairs, closest first."""
+        if k < 1:
+            return []
+        with self._lock:
+            live = len(self._ids) - len(self._dead)
+            cands: Sequence[int] = []
+            if live:
+                # widen a distance query around the single nearest hit until
+                # it holds k live geometries (or everything)
+                _, dist = self._tree.query_nearest(
+                    geom, return_distance=True, all_matches=False
+                )
+                radius = float(dist[0]) if len(dist) else 0.0
+                step = max(radius, 1e-9)
+                while True:
+                    hits = self._tree.query(geom, predicate="dwithin", distance=radius)
+                    cands = [i for i in hits if i not in self._dead]
+                    if len(cands) >= min(k, live):
+                        break
+                    step *= 2
+                    radius += step
+            ids = [self._ids[i] for i in cands] + list(self._pending)
+            geoms = np.concatenate([self._geoms[list(cands)], self._pending_array()])
+        if not ids:
+            return []
+        dists = shapely.distance(geom, geoms)
+        order = np.argsort(dists, kind="stable")[:k]
+        return [(ids[i], float(dists[i])) for i in order]
+
+    def _pending_array(self) -> np.ndarray:
+        if self._pending_geoms is None:
+            self._pending_geoms = np.array(list(self._pending.values()), dtype=object)
+        return self._pending_geoms
+
+    def _drop(self, context_id: str) -> bool:
+        if self._pending.pop(context_id, None) is not None:
+            self._pending_geoms = None
+            return True
+        pos = self._pos.pop(context_id, None)
+        if pos is None:
+            return False
+        self._dead.add(pos)
+        return True
+
+    def _maybe_rebuild(self) -> None:
+        limit = max(self.min_rebuild, int(len(self._ids) * self.rebuild_fraction))
+        if len(self._pending) > limit or len(self._dead) > limit:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        ids = list(self._pos) + list(self._pending)
+        geoms = np.concatenate(
+            [self._geoms[list(self._pos.values())], self._pending_array()]
+        )
+        self._ids = ids
+        self._geoms = geoms
+        self._tree = shapely.STRtree(geoms)
+        self._pos = {cid: i for i, cid in enumerate(ids)}
+        self._dead = set()
+        self._pending = {}
+        self._pending_geoms = None
+        self.rebuilds += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "indexed": len(self),
+            "pending": len(self._pending),
+            "tombstones": len(self._dead),
+            "rebuilds": self.rebuilds,
+        }
@@ -1,35 +1,207 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-from typing import Dict, List, Optional
+import time
+from math import prod
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import numpy as np
+import shapely
 from shapely.geometry import Polygon, shape
 
-from app.models.context import RiskScores, SiteContext, Stage0Request, UQNumber
-from shared.cache import get as cache_get, set as cache_set
-from shared.stage0_client import fetch_context
+from app.core.config import settings
+from app.models.context import SiteContext, Stage0Request
+from app.services.boundary_simplify import reduce_boundary
+from app.services.context_overlay import ContextOverlay
+from app.services.context_store import ContextStore
+from app.services.geojson_stream import UploadTooLarge, iter_features
+from app.services.policy_scan import PolicyScanner
+from app.services.risk import risk_columns
+from shared import async_cache
+from shared.cache import get_or_load as cache_get_or_load, set as cache_set
+from shared.codec import CodecError, default_codec
+from shared.lru import LRUCache
+from shared.stage0_client import fetch_context, fetch_context_async
 
-# In-memory map of context_id -> SiteContext for quick lookups and mutations
-CTX_CACHE: Dict[str, SiteContext] = {}
+# Built contexts by context_id, shared across workers; see ``context_store``
+CONTEXTS = ContextStore.from_settings()
+
+# Encoding of cached contexts; see ``shared.codec`` for the payload format.
+CODEC = default_codec()
+
+# Keyword matcher behind policy_watch, compiled once
+POLICY_SCANNER = PolicyScanner(settings.policy_keywords, settings.policy_base_prob)
+
+# validate_boundary results by boundary digest
+_VALIDATIONS: LRUCache[dict] = LRUCache(max_entries=4096)
 
 
 def build_site_context(req: Stage0Request) -> SiteContext:
-    """Fetch a site context using the Stage0 adapter with Redis caching."""
+    """Fetch a site context using the Stage0 adapter with Redis caching.
+
+    Concurrent builds for the same site share a single upstream fetch.
+    """
     project_id = req.site_name
     key = f"stage0:context:{project_id}"
-    cached = cache_get(key)
-    if cached:
-        ctx = SiteContext.model_validate_json(cached)
-        CTX_CACHE[ctx.context_id] = ctx
-        return ctx
-
-    ctx = fetch_context(project_id)
-    cache_set(key, ctx.model_dump_json())
-    CTX_CACHE[ctx.context_id] = ctx
+    cached = cache_get_or_load(
+        key, lambda: CODEC.encode(_ingest(fetch_context(project_id)))
+    )
+    ctx = _decode(cached)
+    if ctx is None:
+        ctx = _ingest(fetch_context(project_id))
+        cache_set(key, CODEC.encode(ctx))
+    CONTEXTS.put(ctx)
     return ctx
 
 
+async def build_site_context_async(req: Stage0Request) -> SiteContext:
+    """Async variant of :func:`build_site_context` for use on the event loop.
+
+    Cache I/O goes through :mod:`shared.async_cache` and the upstream fetch
+    uses the pooled async client, so a slow build does not hold up other
+    requests.
+    """
+    project_id = req.site_name
+    key = f"stage0:context:{project_id}"
+
+    async def load() -> bytes:
+        return CODEC.encode(await _aingest(await fetch_context_async(project_id)))
+
+    cached = await async_cache.get_or_load(key, load)
+    ctx = _decode(cached)
+    if ctx is None:
+        ctx = await _aingest(await fetch_context_async(project_id))
+        await async_cache.set(key, CODEC.encode(ctx))
+    await CONTEXTS.aput(ctx)
+    return ctx
+
+
+async def build_site_contexts(
+    reqs: Sequence[Stage0Request], concurrency: Optional[int] = None
+) -> AsyncIterator[str]:
+    """Build contexts for many sites, yielding one NDJSON line per site.
+
+    Requests are deduplicated by ``site_name``. Cached sites are read with a
+    single ``mget``, stored with one write and emitted first; misses are
+    fetched concurrently, at most ``concurrency`` at a time, and emitted in
+    completion order, so one slow site does not hold back the rest. A failed
+    fetch produces an ``error`` line instead of ending the stream. Each
+    fetched context is cached and stored, with its full-resolution boundary,
+    before its line is emitted, so a client that stops reading keeps every
+    site it has seen.
+    """
+    sites = list(dict.fromkeys(req.site_name for req in reqs))
+    keys = [f"stage0:context:{site}" for site in sites]
+    misses: List[str] = []
+    hits: List[Tuple[str, SiteContext]] = []
+    for site, payload in zip(sites, await async_cache.mget(keys)):
+        ctx = None if payload is None else _decode(payload)
+        if ctx is None:
+            misses.append(site)
+        else:
+            hits.append((site, ctx))
+    if hits:
+        await CONTEXTS.aput_many(ctx for _, ctx in hits)
+    for site, ctx in hits:
+        yield _ndjson_line(site, ctx, cached=True)
+
+    limit = asyncio.Semaphore(concurrency or settings.stage0_batch_concurrency)
+
+    async def fetch(site: str):
+        async with limit:
+            try:
+                ctx, full = await asyncio.to_thread(
+                    _reduce, await fetch_context_async(site)
+                )
+                return site, ctx, full, None
+            except Exception as exc:
+                return site, None, None, exc
+
+    tasks = [asyncio.ensure_future(fetch(site)) for site in misses]
+    try:
+        for done in asyncio.as_completed(tasks):
+            site, ctx, full, exc = await done
+            if ctx is None:
+                yield json.dumps({"site_name": site, "error": str(exc)}) + "\n"
+                continue
+            await async_cache.set(f"stage0:context:{site}", CODEC.encode(ctx))
+            if full is not None:
+                await CONTEXTS.aput_boundaries([(ctx.context_id, full)])
+            await CONTEXTS.aput(ctx)
+            yield _ndjson_line(site, ctx, cached=False)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _reduce(ctx: SiteContext) -> Tuple[SiteContext, Optional[dict]]:
+    """Return ``ctx`` with its boundary reduced, plus the original if it changed."""
+    if not ctx.boundary_geojson:
+        return ctx, None
+    reduced = reduce_boundary(ctx.boundary_geojson)
+    if reduced is None:
+        return ctx, None
+    return ctx.model_copy(update={"boundary_geojson": reduced}), ctx.boundary_geojson
+
+
+def _ingest(ctx: SiteContext) -> SiteContext:
+    """Reduce a fetched context's boundary, keeping the original in the store."""
+    ctx, full = _reduce(ctx)
+    if full is not None:
+        CONTEXTS.put_boundaries([(ctx.context_id, full)])
+    return ctx
+
+
+async def _aingest(ctx: SiteContext) -> SiteContext:
+    ctx, full = await asyncio.to_thread(_reduce, ctx)
+    if full is not None:
+        await CONTEXTS.aput_boundaries([(ctx.context_id, full)])
+    return ctx
+
+
+def _ndjson_line(site: str, ctx: SiteContext, cached: bool) -> str:
+    head = json.dumps({"site_name": site, "cached": cached})
+    return f'{head[:-1]}, "context": {ctx.model_dump_json()}}}\n'
+
+
+def _decode(payload) -> Optional[SiteContext]:
+    """Decode a cached context; ``None`` if it was written in an unknown format."""
+    try:
+        return CODEC.decode(SiteContext, payload)
+    except CodecError:
+        return None
+
+
 def validate_boundary(boundary_geojson: dict) -> dict:
+    """Check that a boundary is a valid polygon.
+
+    Results are memoized by the geometry's canonical JSON, so clients that
+    revalidate the same boundary do not rebuild and re-check it each time.
+    """
+    key = hashlib.sha1(
+        json.dumps(boundary_geojson, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+    result = _VALIDATIONS.get(key)
+    if result is None:
+        result = _validate_boundary(boundary_geojson)
+        _VALIDATIONS.set(key, result)
+    return {"valid": result["valid"], "errors": list(result["errors"])}
+
+
+def _validate_boundary(boundary_geojson: dict) -> dict:
     errors: List[str] = []
     try:
         geom = shape(boundary_geojson)
@@ -42,82 +214,374 @@ def validate_boundary(boundary_geojson: dict) -> dict:
     return {"valid": not errors, "errors": errors}
 
 
+def validate_boundaries(
+    features: Sequence[dict], repair: bool = False
+) -> Dict[str, Any]:
+    """Validate many boundaries at once with Shapely's vectorized functions.
+
+    ``features`` are GeoJSON geometries or ``Feature`` objects. Each result
+    carries the same ``errors`` as :func:`validate_boundary`, plus errors for
+    empty and zero-area polygons, GEOS's ``reason`` for invalid shapes and a
+    ``warnings`` entry for clockwise exterior rings, which RFC 7946
+    disallows. Unparsable geometries keep the parser's message. With
+    ``repair``, anything with errors or warnings gets a ``repaired``
+    geometry from ``make_valid`` and ring reorientation, if that yields a
+    polygon or multipolygon with area.
+    """
+    start = time.perf_counter()
+    geoms, parse_errors = _geometry_array(
+        [f.get("geometry") if f.get("type") == "Feature" else f for f in features]
+    )
+    parsed = ~shapely.is_missing(geoms)
+    polygon = shapely.get_type_id(geoms) == shapely.GeometryType.POLYGON
+    empty = shapely.is_empty(geoms)
+    reasons = shapely.is_valid_reason(geoms)
+    valid = reasons == "Valid Geometry"
+    zero_area = polygon & ~empty & (shapely.area(geoms) == 0)
+    # a self-intersecting ring's lobes can cancel out; measure what it covers
+    crossed = zero_area & ~valid
+    if crossed.any():
+        zero_area[crossed] = shapely.area(shapely.make_valid(geoms[crossed])) == 0
+    clockwise = (
+        polygon
+        & ~empty
+        & ~zero_area
+        & ~shapely.is_ccw(shapely.get_exterior_ring(geoms))
+    )
+
+    repaired = None
+    if repair:
+        fixable = parsed & ~empty & (~valid | zero_area | clockwise)
+        if fixable.any():
+            fixed = shapely.orient_polygons(shapely.make_valid(geoms[fixable]))
+            areal = np.isin(
+                shapely.get_type_id(fixed),
+                [shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON],
+            ) & (shapely.area(fixed) > 0)
+            repaired = np.full(len(geoms), None, dtype=object)
+            repaired[np.flatnonzero(fixable)[areal]] = shapely.to_geojson(fixed[areal])
+
+    results = []
+    flags = zip(
+        parsed.tolist(),
+        polygon.tolist(),
+        empty.tolist(),
+        valid.tolist(),
+        zero_area.tolist(),
+        clockwise.tolist(),
+    )
+    for i, (ok, poly, void, is_valid, flat, cw) in enumerate(flags):
+        errors: List[str] = []
+        if not ok:
+            detail = parse_errors.get(i)
+            errors.append(
+                f"invalid GeoJSON geometry: {detail}"
+                if detail
+                else "invalid GeoJSON geometry"
+            )
+        elif not poly:
+            errors.append("geometry must be polygon-like")
+        elif void:
+            errors.append("empty polygon")
+        else:
+            if not is_valid:
+                reason = reasons[i]
+                errors.append(
+                    "self-intersection"
+                    if reason.startswith("Self-intersection")
+                    else reason
+                )
+            if flat:
+                errors.append("zero area")
+        item: Dict[str, Any] = {"index": i, "valid": not errors, "errors": errors}
+        if ok and not is_valid:
+            item["reason"] = reasons[i]
+        if cw:
+            item["warnings"] = ["clockwise exterior ring"]
+        if repaired is not None and repaired[i] is not None:
+            item["repaired"] = json.loads(repaired[i])
+        results.append(item)
+    elapsed = time.perf_counter() - start
+    return {
+        "count": len(results),
+        "valid": sum(r["valid"] for r in results),
+        "results": results,
+        "elapsed_ms": elapsed * 1000,
+        "features_per_s": len(results) / elapsed if elapsed > 0 else None,
+    }
+
+
+def _geometry_array(geoms: Sequence[Any]) -> Tuple[np.ndarray, Dict[int, str]]:
+    """Parse GeoJSON geometries into a Shapely array, ``None`` where unparsable.
+
+    Plain 2D polygons with closed rings, the bulk of parcel data, are
+    assembled in one ``from_ragged_array`` call straight from their
+    coordinates; anything else is serialized and read by ``from_geojson``.
+    Also returns the parser's message for each unparsable geometry, by index.
+    """
+    out = np.full(len(geoms), None, dtype=object)
+    fast: List[int] = []
+    rings: List[np.ndarray] = []
+    ring_counts: List[int] = []
+    slow: List[int] = []
+    errors: Dict[int, str] = {}
+    for i, geom in enumerate(geoms):
+        try:
+            if geom.get("type") == "Polygon":
+                rs = [np.asarray(r, dtype=np.float64) for r in geom["coordinates"]]
+                if rs and all(
+                    r.ndim == 2
+                    and r.shape[1] == 2
+                    and len(r) >= 4
+                    and (r[0] == r[-1]).all()
+                    for r in rs
+                ):
+                    fast.append(i)
+                    rings.extend(rs)
+                    ring_counts.append(len(rs))
+                    continue
+        except Exception:
+            pass
+        slow.append(i)
+    if fast:
+        ring_offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rings], out=ring_offsets[1:])
+        poly_offsets = np.zeros(len(fast) + 1, dtype=np.int64)
+        np.cumsum(ring_counts, out=poly_offsets[1:])
+        out[fast] = shapely.from_ragged_array(
+            shapely.GeometryType.POLYGON,
+            np.concatenate(rings),
+            (ring_offsets, poly_offsets),
+        )
+    if slow:
+        texts = []
+        for i in slow:
+            try:
+                texts.append(json.dumps(geoms[i]))
+            except (TypeError, ValueError) as exc:
+                errors[i] = str(exc)
+                texts.append("null")
+        out[slow] = shapely.from_geojson(
+            np.array(texts, dtype=object), on_invalid="ignore"
+        )
+        # reparse the failures one by one, which is rare, for GEOS's message
+        for i, text in zip(slow, texts):
+            if out[i] is None and i not in errors:
+                try:
+                    shapely.from_geojson(text, on_invalid="raise")
+                except shapely.errors.GEOSException as exc:
+                    errors[i] = str(exc)
+    return out, errors
+
+
 def parse_upload(file) -> dict:
+    """Read an uploaded GeoJSON or NDJSON boundary file.
+
+    A bare geometry is returned as is; features, whether from a
+    ``FeatureCollection`` or newline-delimited, are returned as a
+    ``FeatureCollection``.
+
+    Raises:
+        UploadTooLarge: If the file exceeds ``stage0_upload_max_bytes``.
+        ValueError: If no file was given or it is not GeoJSON.
+    """
     if file is None:
         raise ValueError("no file provided")
-    data = file.file.read()
     try:
-        return json.loads(data)
+        items = list(iter_features(file.file, settings.stage0_upload_max_bytes))
+    except UploadTooLarge:
+        raise
     except Exception:
         raise ValueError("unsupported file type")
+    if len(items) == 1 and items[0].get("type") != "Feature":
+        return items[0]
+    return {"type": "FeatureCollection", "features": items}
 
 
-# --- Counterfactual helpers retained from mock implementation ---
+def validate_upload(fileobj, repair: bool = False) -> Iterator[str]:
+    """Validate an uploaded file feature by feature, as NDJSON lines.
 
+    Features are read with :func:`iter_features` and checked in chunks of
+    ``stage0_upload_chunk_features`` by :func:`validate_boundaries`, so
+    memory stays flat however large the file is. Each line is one result
+    whose ``index`` counts from the start of the file, with the feature's
+    ``id`` when it has one; the last line is a ``summary``, or an ``error``
+    if the file turned out to be malformed or too large part way through.
+    """
+    start = time.perf_counter()
+    count = valid = 0
+    chunk: List[dict] = []
 
-def _with_uq(x: float, src: str, band: float = 0.15) -> UQNumber:
-    low = x * (1 - band)
-    high = x * (1 + band)
-    return UQNumber(
-        value=x, ci95_low=max(0.0, low), ci95_high=max(low, high), source=src
-    )
+    def flush() -> Iterator[str]:
+        nonlocal count, valid
+        if not chunk:
+            return
+        report = validate_boundaries(chunk, repair)
+        for feature, item in zip(chunk, report["results"]):
+            item["index"] += count
+            if feature.get("id") is not None:
+                item["id"] = feature["id"]
+            yield json.dumps(item) + "\n"
+        count += report["count"]
+        valid += report["valid"]
+        chunk.clear()
 
-
-def _risk_scores(
-    climate: Dict[str, UQNumber], environment: Dict[str, UQNumber]
-) -> RiskScores:
-    flood = int(min(100, environment["water_pct"].value * 800))
-    heat = int(
-        min(
-            100,
-            climate["avg_temp_c"].value * 3 - environment["greenspace_pct"].value * 50,
-        )
-    )
-    quake = 50
-    pollution = int(min(100, 60 - environment["greenspace_pct"].value * 50))
-    return RiskScores(
-        flood_0_100=flood, quake_0_100=quake, heat_0_100=heat, pollution_0_100=pollution
-    )
+    try:
+        for feature in iter_features(fileobj, settings.stage0_upload_max_bytes):
+            chunk.append(feature)
+            if len(chunk) >= settings.stage0_upload_chunk_features:
+                yield from flush()
+    except ValueError as exc:
+        yield from flush()
+        yield json.dumps({"error": str(exc), "count": count}) + "\n"
+        return
+    yield from flush()
+    elapsed = time.perf_counter() - start
+    summary = {
+        "count": count,
+        "valid": valid,
+        "elapsed_ms": elapsed * 1000,
+        "features_per_s": count / elapsed if elapsed > 0 else None,
+    }
+    yield json.dumps({"summary": summary}) + "\n"
 
 
 def apply_patch(ctx: SiteContext, patch: dict) -> SiteContext:
-    for key, val in patch.items():
-        setattr(ctx, key, val)
-    for ln in ctx.lineage.values():
-        ln.transform += "+ human_override"
-    CTX_CACHE[ctx.context_id] = ctx
+    """Return ``ctx`` with ``patch`` applied and store it; ``ctx`` is not mutated.
+
+    A patched boundary is reduced like a fetched one. The patch is added to
+    the context's patch history, so :func:`revert_patch` can undo it.
+
+    Raises:
+        ValueError: If the patch names an unknown field or an invalid value.
+    """
+    patched = ContextOverlay(ctx).patch(patch).materialize()
+    CONTEXTS.record_patch(ctx, patch)
+    if "boundary_geojson" in patch:
+        patched, full = _reduce(patched)
+        _save_boundary(patched.context_id, full)
+    CONTEXTS.put(patched)
+    return patched
+
+
+def revert_patch(context_id: str) -> Optional[SiteContext]:
+    """Undo the most recent :func:`apply_patch` on a context and store the result.
+
+    The context is rebuilt by replaying the remaining patches over the saved
+    base, with the same lineage marks and boundary reduction as when they
+    were applied. Returns ``None`` if the context has no patch to revert.
+    """
+    history = CONTEXTS.patch_history(context_id)
+    if history is None:
+        return None
+    patches = history.patches[:-1]
+    overlay = ContextOverlay(history.base)
+    for patch in patches:
+        overlay = overlay.patch(patch)
+    ctx = overlay.materialize()
+    if any("boundary_geojson" in patch for patch in patches):
+        ctx, full = _reduce(ctx)
+    else:
+        full = history.boundary
+    _save_boundary(context_id, full)
+    CONTEXTS.put(ctx)
+    CONTEXTS.pop_patch(context_id)
     return ctx
 
 
+def _save_boundary(context_id: str, full: Optional[dict]) -> None:
+    # the saved original belongs to the boundary being replaced
+    if full is None:
+        CONTEXTS.drop_boundary(context_id)
+    else:
+        CONTEXTS.put_boundaries([(context_id, full)])
+
+
 def run_counterfactual(ctx: SiteContext, delta: Dict[str, float]) -> SiteContext:
-    new_ctx = ctx.model_copy(deep=True)
-    for key, val in delta.items():
-        if key in new_ctx.environment:
-            base = new_ctx.environment[key].value + val
-            new_ctx.environment[key] = _with_uq(base, new_ctx.environment[key].source)
-    new_ctx.risk_scores = _risk_scores(new_ctx.climate, new_ctx.environment)
-    new_ctx.design_objectives_suggested = ctx.design_objectives_suggested
-    return new_ctx
+    return ContextOverlay(ctx).counterfactual(delta).materialize()
 
 
-def policy_watch(text: Optional[str], url: Optional[str]) -> Dict:
-    prob = 0.1
-    topics: List[str] = []
-    txt = (text or "").lower()
-    for k in ["upzone", "tod", "density bonus"]:
-        if k in txt:
-            prob += 0.2
-            topics.append(k)
-    for k in ["overlay", "heritage"]:
-        if k in txt:
-            prob -= 0.1
-            topics.append(k)
-    prob = max(0.0, min(1.0, prob))
-    citations = [url] if url else []
-    explain = "keywords detected" if topics else "baseline probability"
+def sweep_counterfactuals(
+    ctx: SiteContext,
+    deltas: Optional[Sequence[Mapping[str, float]]] = None,
+    grid: Optional[Mapping[str, Sequence[float]]] = None,
+) -> Dict[str, Any]:
+    """Evaluate risk scores for many environment deltas at once.
+
+    Pass either ``deltas``, a list of ``{key: delta}`` points, or ``grid``,
+    per-key delta values whose Cartesian product is swept (last key varying
+    fastest). Each point gives the same scores as :func:`run_counterfactual`
+    with that delta, but all points are computed together over NumPy arrays
+    and the context is never copied.
+
+    Returns:
+        Columns of equal length: ``inputs`` holds the delta applied to each
+        key and ``risk_scores`` each score per point.
+
+    Raises:
+        ValueError: If neither or both of ``deltas`` and ``grid`` are given,
+            a key is not an ``environment`` key, or the sweep exceeds
+            ``stage0_sweep_max_points``.
+    """
+    if (deltas is None) == (grid is None):
+        raise ValueError("pass exactly one of deltas or grid")
+    if grid is not None:
+        keys = list(grid)
+        n = prod(len(v) for v in grid.values()) if keys else 0
+    else:
+        keys = list(dict.fromkeys(k for point in deltas for k in point))
+        n = len(deltas)
+    unknown = [k for k in keys if k not in ctx.environment]
+    if unknown:
+        raise ValueError(f"not environment keys: {', '.join(unknown)}")
+    if n > settings.stage0_sweep_max_points:
+        raise ValueError(
+            f"sweep has {n} points, limit is {settings.stage0_sweep_max_points}"
+        )
+
+    if grid is not None:
+        axes = [np.asarray(grid[k], dtype=np.float64) for k in keys]
+        mesh = np.meshgrid(*axes, indexing="ij") if keys else []
+        inputs = {k: m.ravel() for k, m in zip(keys, mesh)}
+    else:
+        inputs = {
+            k: np.fromiter((p.get(k, 0.0) for p in deltas), dtype=np.float64, count=n)
+            for k in keys
+        }
+    env = {k: uq.value for k, uq in ctx.environment.items()}
+    columns = {
+        k: env[k] + inputs[k] if k in inputs else np.full(n, env[k]) for k in env
+    }
+    scores = risk_columns(ctx.climate["avg_temp_c"].value, columns)
     return {
-        "zoning_change_prob_0_1": prob,
-        "topics": topics,
-        "citations": citations,
-        "explain": explain,
+        "context_id": ctx.context_id,
+        "n": n,
+        "inputs": {k: v.tolist() for k, v in inputs.items()},
+        "risk_scores": {k: v.tolist() for k, v in scores.items()},
     }
+
+
+def policy_watch(text: Optional[str], url: Optional[str]) -> Dict:
+    return POLICY_SCANNER.watch(text, url)
+
+
+def policy_watch_many(docs: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+    """Scan ``{"text", "url"}`` documents, yielding one NDJSON result per document.
+
+    Each result is :func:`policy_watch`'s plus the document's ``index`` and
+    the offsets of every keyword found, under ``matches``. A document that
+    is not an object, or a stream that breaks off, yields an ``error`` line.
+    """
+    index = 0
+    try:
+        for doc in docs:
+            if isinstance(doc, Mapping):
+                result = POLICY_SCANNER.watch(
+                    doc.get("text"), doc.get("url"), offsets=True
+                )
+            else:
+                result = {"error": "document must be an object"}
+            yield json.dumps({"index": index, **result}) + "\n"
+            index += 1
+    except ValueError as exc:
+        yield json.dumps({"index": index, "error": str(exc)}) + "\n"
@@ -1,7 +1,20 @@
 """Service functions for Stage 1 variant generation."""
 
-from app.models import StageResult, Weights
-from app.ai_agents.orchestrator import run_generation
+import random
+import weakref
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import AgentConfig, StageResult, VariantOut, Weights
+from app.ai_agents.negotiator import negotiator
+from app.ai_agents import registry
+from app.ai_agents.orchestrator import run_generation, run_generation_async
+from app.ai_agents.scoring import objective_matrix, score_batch, to_score_dicts, top_k
+from app.db.models import Candidate
+from app.db.session import ensure_candidate_tables
 
 
 def run(n_variants: int = 3, weights: Weights | None = None) -> StageResult:
@@ -11,3 +24,111 @@ def run(n_variants: int = 3, weights: Weights | None = None) -> StageResult:
     variants = run_generation(n_variants, weights)
     data = {"variants": [v.model_dump() for v in variants]}
     return StageResult(stage=1, status="variants generated", data=data)
+
+
+async def run_async(
+    n_variants: int = 3,
+    weights: Weights | None = None,
+    distinct: bool = False,
+    agents: List[AgentConfig] | None = None,
+) -> StageResult:
+    """Async counterpart of :func:`run` for use inside request handlers."""
+
+    weights = weights or Weights()
+    variants = await run_generation_async(
+        n_variants, weights, distinct=distinct, agents=agents
+    )
+    data = {"variants": [v.model_dump() for v in variants]}
+    return StageResult(stage=1, status="variants generated", data=data)
+
+
+# candidate ids and objective matrix per engine, with the (row count,
+# latest created_at) they were loaded at
+_OBJECTIVES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _candidate_objectives(db: Session) -> Tuple[List[str], np.ndarray]:
+    """Return all candidate ids and their ``(N, len(OBJECTIVES))`` objectives.
+
+    The matrix is kept per process and rebuilt only when rows were added or
+    removed since it was loaded, so re-ranking does not decode every stored
+    ``scores`` blob on each call.
+    """
+    bind = db.get_bind()
+    version = tuple(
+        db.execute(select(func.count(), func.max(Candidate.created_at))).one()
+    )
+    cached = _OBJECTIVES.get(bind)
+    if cached is None or cached[0] != version:
+        rows = db.execute(
+            select(Candidate.id, Candidate.scores).order_by(
+                Candidate.created_at, Candidate.id
+            )
+        ).all()
+        cached = (
+            version,
+            [r.id for r in rows],
+            objective_matrix(r.scores or {} for r in rows),
+        )
+        _OBJECTIVES[bind] = cached
+    return cached[1], cached[2]
+
+
+def rerank(db: Session, weights: Weights, k: int = 10) -> StageResult:
+    """Re-rank persisted candidates under ``weights`` without regenerating.
+
+    Only ids and stored objective scores are loaded for the full table, and
+    they are cached between calls (see :func:`_candidate_objectives`);
+    labels and metadata are fetched for the top ``k`` alone.
+    """
+
+    ensure_candidate_tables(db.get_bind())
+    row_ids, objectives = _candidate_objectives(db)
+    scored = score_batch(objectives, weights)
+    best = top_k(scored, k)
+    ids = [row_ids[i] for i in best]
+    details = {
+        c.id: c for c in db.scalars(select(Candidate).where(Candidate.id.in_(ids)))
+    }
+    variants = [
+        VariantOut(
+            id=row_ids[i],
+            label=details[row_ids[i]].label,
+            metadata=details[row_ids[i]].meta,
+            score=score,
+            rank=rank,
+        )
+        for rank, (i, score) in enumerate(
+            zip(best, to_score_dicts(scored[best])), start=1
+        )
+    ]
+    data = {"total": len(row_ids), "variants": [v.model_dump() for v in variants]}
+    return StageResult(stage=1, status="variants reranked", data=data)
+
+
+def page_variants(
+    options: Dict[str, List[str]] | None = None, offset: int = 0, limit: int = 100
+) -> StageResult:
+    """Return one page of the negotiator's design space."""
+
+    variants = list(negotiator.iter_variants(options, offset=offset, limit=limit))
+    data = {"total": negotiator.count(options), "offset": offset, "variants": variants}
+    return StageResult(stage=1, status="variants listed", data=data)
+
+
+def sample_variants(
+    options: Dict[str, List[str]] | None = None, k: int = 10, seed: int | None = None
+) -> StageResult:
+    """Return ``k`` distinct variants sampled from the negotiator's design space."""
+
+    total = negotiator.count(options)
+    variants = negotiator.sample(min(k, total), options, rng=random.Random(seed))
+    data = {"total": total, "variants": variants}
+    return StageResult(stage=1, status="variants sampled", data=data)
+
+
+def agent_metrics() -> StageResult:
+    """Report registered agents and their call latency and timeouts."""
+
+    data = {"agents": sorted(registry.AGENTS), "metrics": registry.snapshot()}
+    return StageResult(stage=1, status="agent metrics", data=data)
@@ -0,0 +1,47 @@
+"""Measure what boundary reduction saves per stored context.
+
+For increasingly detailed boundaries, reports the stored payload size, the
+time to serve ``GET /stage0/context/{id}`` from the in-process tier, and the
+one-off cost of reducing the boundary at ingest, with and without
+reduction.
+
+Run from ``backend/``::
+
+    python -m benchmarks.boundary_simplify
+"""
+
+from __future__ import annotations
+
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import stage0_context
+from app.services.boundary_simplify import reduce_boundary
+from benchmarks.cache_codec import _per_call_us, sample_context
+
+
+def main(repeat: int = 200) -> None:
+    client = TestClient(app)
+    codec = stage0_context.CONTEXTS.codec
+    print(f"{'vertices':>9}{'mode':>9}{'bytes':>10}{'GET us':>10}{'reduce ms':>11}")
+    for vertices in (100, 2000, 20000):
+        ctx = sample_context(vertices)
+        start = time.perf_counter()
+        reduced = ctx.model_copy(
+            update={"boundary_geojson": reduce_boundary(ctx.boundary_geojson)}
+        )
+        cost = (time.perf_counter() - start) * 1000
+        for mode, item in (("full", ctx), ("reduced", reduced)):
+            stage0_context.CONTEXTS.put(item)
+            url = f"/stage0/context/{item.context_id}"
+            get = _per_call_us(lambda: client.get(url), repeat)
+            print(
+                f"{vertices:>9}{mode:>9}{len(codec.encode(item)):>10}{get:>10.0f}{cost if mode == 'reduced' else 0:>11.1f}"
+            )
+            stage0_context.CONTEXTS.evict(item.context_id)
+
+
+if __name__ == "__main__":
+    main()
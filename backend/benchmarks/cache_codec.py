@@ -0,0 +1,133 @@
+"""Compare cache codecs for SiteContext payloads.
+
+Reports payload size and encode/decode latency for the original JSON string
+path and every serializer/compression pair available in ``shared.codec``,
+for a small boundary and a detailed one.
+
+Run from ``backend/``::
+
+    python -m benchmarks.cache_codec
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable
+
+from app.models.context import SiteContext
+from shared.codec import COMPRESSORS, SERIALIZERS, Codec
+
+
+def _uq(value: float) -> dict:
+    return {
+        "value": value,
+        "ci95_low": value * 0.85,
+        "ci95_high": value * 1.15,
+        "source": "synthetic",
+    }
+
+
+def sample_context(vertices: int) -> SiteContext:
+    ring = [
+        [
+            2.0 + 0.01 * math.cos(2 * math.pi * i / vertices),
+            1.0 + 0.01 * math.sin(2 * math.pi * i / vertices),
+        ]
+        for i in range(vertices)
+    ]
+
+    def metrics(*names: str) -> dict:
+        return {n: _uq(10.0 + i) for i, n in enumerate(names)}
+
+    return SiteContext.model_validate(
+        {
+            "site_name": "bench",
+            "centroid": {"lat": 1.0, "lon": 2.0},
+            "bbox": [1.99, 0.99, 2.01, 1.01],
+            "boundary_geojson": {"type": "Polygon", "coordinates": [ring + [ring[0]]]},
+            "climate": metrics(
+                "avg_temp_c", "annual_rain_mm", "hdd", "cdd", "wind_index"
+            ),
+            "climate_scenarios": {
+                s: {"heatwave_days": _uq(12.0), "flood_return_yr": _uq(50.0)}
+                for s in ("baseline", "ssp245", "ssp585")
+            },
+            "environment": metrics(
+                "elev_m_mean", "slope_deg_mean", "greenspace_pct", "water_pct"
+            ),
+            "mobility": metrics(
+                "road_km_per_km2",
+                "intersection_density",
+                "transit_stops",
+                "walkability_0_100",
+            ),
+            "socio_econ": metrics(
+                "pop_density_km2", "median_income_index", "gentrification_risk_0_1"
+            ),
+            "constraints": ["setback_5m", "height_limit_30m"],
+            "zoning_hint": "R3",
+            "zoning_drift_pred": {
+                "p_change_1y": 0.1,
+                "p_upzone_3y": 0.2,
+                "label_1y": "no_change",
+                "explain": "stable",
+            },
+            "risk_scores": {
+                "flood_0_100": 40,
+                "quake_0_100": 50,
+                "heat_0_100": 41,
+                "pollution_0_100": 47,
+            },
+            "design_objectives_suggested": ["shade", "drainage", "transit access"],
+            "subsurface": {
+                "utility_density_hint": "medium",
+                "void_risk_hint": "low",
+                "voxels_overview": {"occupied": 120, "empty": 880},
+            },
+            "data_quality": {
+                "online": False,
+                "sources": ["osm_stub", "cmip_stub"],
+                "notes": "synthetic",
+            },
+            "lineage": {
+                k: {"source_id": f"{k}_src", "license": "ODbL", "transform": "resample"}
+                for k in ("climate", "environment", "mobility", "socio_econ")
+            },
+            "privacy_report": {"pii_found": False, "fields": []},
+            "explain": [
+                {"feature": f"f{i}", "why": "synthetic driver"} for i in range(5)
+            ],
+            "audit": {"inputs_hash": "0" * 40, "duration_ms": 12, "version": "bench"},
+        }
+    )
+
+
+def _per_call_us(fn: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(repeat: int = 2000) -> None:
+    for vertices in (16, 2000):
+        ctx = sample_context(vertices)
+        print(f"\nboundary with {vertices} vertices")
+        print(f"{'codec':<18}{'bytes':>9}{'encode us':>12}{'decode us':>12}")
+        text = ctx.model_dump_json()
+        enc = _per_call_us(ctx.model_dump_json, repeat)
+        dec = _per_call_us(lambda: SiteContext.model_validate_json(text), repeat)
+        print(f"{'json str (old)':<18}{len(text.encode()):>9}{enc:>12.1f}{dec:>12.1f}")
+        for serializer in SERIALIZERS:
+            for compression in COMPRESSORS:
+                codec = Codec(serializer, compression)
+                payload = codec.encode(ctx)
+                enc = _per_call_us(lambda: codec.encode(ctx), repeat)
+                dec = _per_call_us(lambda: codec.decode(SiteContext, payload), repeat)
+                name = f"{serializer}+{compression}"
+                print(f"{name:<18}{len(payload):>9}{enc:>12.1f}{dec:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Measure API cold start: the time to import ``app.main`` in a fresh process.
+
+Each scenario points ``REDIS_URL`` at a different kind of endpoint, since
+the cache client used to connect at import time and the cost depended on
+whether Redis answered, refused or silently dropped the connection.
+
+Run from ``backend/``::
+
+    python -m benchmarks.cold_start
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCENARIOS = {
+    "unresolvable host": "redis://redis:6379/0",
+    "connection refused": "redis://127.0.0.1:6399/0",
+    "blackholed address": "redis://10.255.255.1:6379/0",
+}
+
+
+def _import_time(redis_url: str, timeout: float) -> float:
+    env = {**os.environ, "REDIS_URL": redis_url}
+    start = time.perf_counter()
+    try:
+        subprocess.run(
+            [sys.executable, "-c", "import app.main"],
+            env=env,
+            check=True,
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return float("inf")
+    return time.perf_counter() - start
+
+
+def main(repeat: int = 3, timeout: float = 60.0) -> None:
+    for name, url in SCENARIOS.items():
+        times = [_import_time(url, timeout) for _ in range(repeat)]
+        print(f"{name:<20} median {statistics.median(times):7.3f} s  ({url})")
+
+
+if __name__ == "__main__":
+    main()
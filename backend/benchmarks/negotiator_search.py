@@ -0,0 +1,72 @@
+"""Benchmark pruned Negotiator.search against product-then-filter.
+
+Run from ``backend/``::
+
+    python -m benchmarks.negotiator_search
+"""
+
+from __future__ import annotations
+
+import time
+from itertools import product
+
+from app.ai_agents.negotiator import Exclusion, Negotiator, SearchStats
+
+
+def _space(attrs: int, values: int) -> dict[str, list[str]]:
+    return {f"a{i}": [f"v{i}{j}" for j in range(values)] for i in range(attrs)}
+
+
+def _exclusions(options: dict[str, list[str]]) -> list[Exclusion]:
+    # the first value of each early attribute rules out most of the next one
+    attrs = list(options)
+    rules: list[Exclusion] = []
+    for a, b in zip(attrs[:3], attrs[1:4]):
+        first = options[a][0]
+        rules += [((a, first), (b, v)) for v in options[b][1:]]
+    return rules
+
+
+def _filtered_product(options, exclusions) -> int:
+    attrs = list(options)
+    pairs = [
+        (attrs.index(a), va, attrs.index(b), vb) for (a, va), (b, vb) in exclusions
+    ]
+    kept = 0
+    for combo in product(*options.values()):
+        if any(combo[i] == va and combo[j] == vb for i, va, j, vb in pairs):
+            continue
+        "_".join(combo)
+        kept += 1
+    return kept
+
+
+def main() -> None:
+    for attrs, values in [(6, 6), (8, 5)]:
+        options = _space(attrs, values)
+        exclusions = _exclusions(options)
+
+        start = time.perf_counter()
+        kept = _filtered_product(options, exclusions)
+        baseline = time.perf_counter() - start
+
+        negotiator = Negotiator(options, exclusions)
+        start = time.perf_counter()
+        labels = sum(1 for _ in negotiator.search())
+        searched = time.perf_counter() - start
+
+        stats = SearchStats()
+        start = time.perf_counter()
+        codes = sum(1 for _ in negotiator.search_codes(stats=stats))
+        coded = time.perf_counter() - start
+
+        assert labels == codes == kept
+        print(
+            f"{attrs}x{values}: product+filter {baseline:.3f}s, "
+            f"search {searched:.3f}s, search_codes {coded:.3f}s, "
+            f"emitted={stats.emitted} pruned={stats.pruned}"
+        )
+
+
+if __name__ == "__main__":
+    main()
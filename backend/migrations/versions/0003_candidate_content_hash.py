@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("candidates", sa.Column("content_hash", sa.String(), nullable=True))
+    op.create_index(
+        "ix_candidates_content_hash", "candidates", ["content_hash"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_candidates_content_hash", table_name="candidates")
+    op.drop_column("candidates", "content_hash")
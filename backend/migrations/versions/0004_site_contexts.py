@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "site_contexts",
+        sa.Column("context_id", sa.String(), primary_key=True),
+        sa.Column("site_name", sa.String(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_site_contexts_site_name", "site_contexts", ["site_name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_site_contexts_site_name", table_name="site_contexts")
+    op.drop_table("site_contexts")
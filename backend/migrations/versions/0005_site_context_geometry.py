@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "site_contexts", sa.Column("geometry", sa.LargeBinary(), nullable=True)
+    )
+    op.create_index("ix_site_contexts_updated_at", "site_contexts", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_site_contexts_updated_at", table_name="site_contexts")
+    op.drop_column("site_contexts", "geometry")
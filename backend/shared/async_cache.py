@@ -0,0 +1,164 @@
+"""Asyncio-native counterpart of :mod:`shared.cache`.
+
+Uses ``redis.asyncio`` with a shared connection pool so cache round-trips
+never block the event loop, and adds batch ``mget``/``mset`` that run as a
+single pipeline. Without Redis it shares the bounded in-process fallback of
+:mod:`shared.cache`, so sync and async callers see the same entries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, List, Mapping, Optional, Sequence
+
+from . import cache as _sync
+from .cache import Value
+from .lru import LRUCache
+from .singleflight import AsyncSingleFlight
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+_local: LRUCache[Value] = LRUCache(
+    max_entries=_sync.L1_MAX_ENTRIES, default_ttl=_sync.L1_TTL
+)
+_loads: AsyncSingleFlight[Value] = AsyncSingleFlight()
+_client = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# strong references to background refreshes so they are not collected early
+_refreshes: "set[asyncio.Task]" = set()
+
+
+async def client():
+    """Return the pooled async Redis client, or ``None`` without Redis.
+
+    Availability follows :func:`shared.cache.client`: the first call makes
+    the (off-loop) connection attempt, and while its circuit breaker is open
+    this returns ``None`` without touching the network. The async pool is
+    created on first use in the running loop.
+    """
+    global _client, _client_loop
+    if _sync._redis is None:
+        if _sync._attempted or await asyncio.to_thread(_sync.client) is None:
+            return None
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        from redis import asyncio as aioredis  # type: ignore
+
+        pool = aioredis.ConnectionPool.from_url(
+            _sync.REDIS_URL,
+            decode_responses=False,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=_sync.REDIS_CONNECT_TIMEOUT,
+        )
+        _client, _client_loop = aioredis.Redis(connection_pool=pool), loop
+    return _client
+
+
+async def get(key: str) -> Optional[Value]:
+    """Retrieve a cached value, if present and not expired."""
+    return (await mget([key]))[0]
+
+
+async def set(key: str, value: Value, ttl: Optional[int] = None) -> None:
+    """Store a value with a TTL between 15 and 60 minutes."""
+    await mset({key: value}, ttl)
+
+
+async def mget(keys: Sequence[str]) -> List[Optional[Value]]:
+    """Fetch many keys, going to Redis once for all near-cache misses."""
+    redis_client = await client()
+    if redis_client is None:
+        return [_sync._memory_cache.get(k) for k in keys]
+    values: List[Optional[Value]] = [_local.get(k) for k in keys]
+    missing = [i for i, v in enumerate(values) if v is None]
+    if not missing:
+        return values
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for i in missing:
+                pipe.get(keys[i])
+                pipe.ttl(keys[i])
+            replies = await pipe.execute()
+    except Exception:
+        _sync._failed()
+        return values
+    _sync._breaker.record_success()
+    for i, val, ttl in zip(missing, replies[::2], replies[1::2]):
+        values[i] = val
+        if val is not None:
+            _remember(keys[i], val, ttl if ttl and ttl > 0 else None)
+    return values
+
+
+async def mset(items: Mapping[str, Value], ttl: Optional[int] = None) -> None:
+    """Store many values in one pipeline; each gets its own TTL if none is given."""
+    ttls = {k: ttl or random.randint(900, 3600) for k in items}
+    redis_client = await client()
+    if redis_client is not None:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.setex(key, ttls[key], value)
+                await pipe.execute()
+            _sync._breaker.record_success()
+            for key, value in items.items():
+                _remember(key, value, ttls[key])
+            return
+        except Exception:
+            _sync._failed()
+    for key, value in items.items():
+        _sync._memory_cache.set(key, value, ttls[key])
+        _sync._deadlines.set(key, time.time() + ttls[key])
+
+
+async def get_or_load(
+    key: str, loader: Callable[[], Awaitable[Value]], ttl: Optional[int] = None
+) -> Value:
+    """Return the cached value for ``key``, awaiting ``loader`` on a miss.
+
+    Concurrent misses for the same key share one ``loader`` call, and hits
+    close to expiry schedule a background reload, as in
+    :func:`shared.cache.get_or_load`.
+    """
+    val = await get(key)
+    if val is None:
+        return await _loads.do(key, lambda: _load(key, loader, ttl))
+    deadline = _sync._deadlines.get(key)
+    if deadline is not None and deadline - time.time() < _sync.REFRESH_AHEAD_S:
+        flight = ("refresh", key)
+        if not _loads.in_flight(flight):
+            task = asyncio.ensure_future(_refresh(flight, key, loader, ttl))
+            _refreshes.add(task)
+            task.add_done_callback(_refreshes.discard)
+    return val
+
+
+def _remember(key: str, value: Value, ttl: Optional[float]) -> None:
+    _local.set(key, value, min(_sync.L1_TTL, ttl) if ttl else _sync.L1_TTL)
+    if ttl:
+        _sync._deadlines.set(key, time.time() + ttl)
+
+
+async def _load(
+    key: str, loader: Callable[[], Awaitable[Value]], ttl: Optional[int]
+) -> Value:
+    val = await get(key)
+    if val is None:
+        val = await loader()
+        await set(key, val, ttl)
+    return val
+
+
+async def _refresh(flight, key: str, loader, ttl: Optional[int]) -> None:
+    async def reload() -> Value:
+        val = await loader()
+        await set(key, val, ttl)
+        return val
+
+    try:
+        await _loads.do(flight, reload)
+    except Exception:  # pragma: no cover - the stale value stays served
+        pass
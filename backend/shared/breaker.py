@@ -0,0 +1,85 @@
+"""Minimal circuit breaker for calls to an optional backing service."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while, then probe it again.
+
+    The breaker is ``closed`` while calls succeed. ``failure_threshold``
+    consecutive failures open it; while ``open``, :meth:`allow` returns
+    ``False`` so callers take their fallback path without waiting on the
+    dependency. After ``reset_timeout`` seconds one caller is let through
+    (``half_open``); its success closes the breaker and its failure opens it
+    again for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may go to the dependency now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout
+            ):
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def trip(self) -> None:
+        """Open the breaker now, e.g. after a failed connection attempt."""
+        with self._lock:
+            if self._state != self.OPEN:
+                self.trips += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self._state, "failures": self._failures, "trips": self.trips}
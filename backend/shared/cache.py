@@ -1,55 +1,234 @@
-"""Simple Redis-backed caching helpers."""
+"""Simple Redis-backed caching helpers.
+
+Reads go through a small in-process near-cache (L1) with a short TTL before
+reaching Redis (L2). :func:`get_or_load` adds single-flight loading, so
+concurrent misses for one key call the loader once, and refreshes keys in
+the background shortly before they expire.
+
+Values are ``str`` or ``bytes``; Redis hands back ``bytes`` regardless, so
+structured payloads should go through :mod:`shared.codec`.
+"""
 
 from __future__ import annotations
 
 import os
 import random
+import threading
 import time
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Union
+
+from .breaker import CircuitBreaker
+from .lru import LRUCache
+from .singleflight import SingleFlight
 
-try:
-    import redis  # type: ignore
-except Exception:  # pragma: no cover
-    redis = None  # type: ignore
+Value = Union[str, bytes]
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+REDIS_RECONNECT_INTERVAL = float(os.getenv("REDIS_RECONNECT_INTERVAL", "30"))
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "10000"))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024"))
+L1_TTL = float(os.getenv("CACHE_L1_TTL", "5"))
+REFRESH_AHEAD_S = float(os.getenv("CACHE_REFRESH_AHEAD_S", "60"))
 
-if redis is not None:  # pragma: no branch
-    try:
-        _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
-        _redis.ping()
-    except Exception:  # pragma: no cover
-        _redis = None
-else:  # pragma: no cover
-    _redis = None
+# The Redis client is created on first use, not at import, so starting the
+# API or a worker never waits on the network. While it is unavailable the
+# breaker is open, calls use the in-process fallback, and a background
+# thread retries every ``REDIS_RECONNECT_INTERVAL`` seconds.
+_redis = None
+_attempted = False
+_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=REDIS_RECONNECT_INTERVAL)
+_connect_lock = threading.RLock()
+_reconnector: Optional[threading.Thread] = None
 
-_memory_cache: dict[str, tuple[str, float]] = {}
+# Fallback when Redis is unavailable; bounded so long-lived workers cannot
+# grow without limit.
+_memory_cache: LRUCache[Value] = LRUCache(
+    max_entries=MEMORY_CACHE_MAX_ENTRIES, max_bytes=MEMORY_CACHE_MAX_BYTES
+)
+# Near-cache in front of Redis, and the wall-clock expiry of each key seen,
+# used to decide when to refresh ahead of expiry.
+_local: LRUCache[Value] = LRUCache(max_entries=L1_MAX_ENTRIES, default_ttl=L1_TTL)
+_deadlines: LRUCache[float] = LRUCache(max_entries=MEMORY_CACHE_MAX_ENTRIES)
+_loads: SingleFlight[Value] = SingleFlight()
 
 
-def get(key: str) -> Optional[str]:
-    """Retrieve a cached string value, if present and not expired."""
-    if _redis is not None:
+def get(key: str) -> Optional[Value]:
+    """Retrieve a cached value, if present and not expired."""
+    redis_client = client()
+    if redis_client is not None:
+        val = _local.get(key)
+        if val is not None:
+            return val
         try:
-            return _redis.get(key)
-        except Exception:  # pragma: no cover
+            pipe = redis_client.pipeline()
+            pipe.get(key)
+            pipe.ttl(key)
+            val, ttl = pipe.execute()
+        except Exception:
+            _failed()
             return None
-    val = _memory_cache.get(key)
-    if not val:
-        return None
-    data, exp = val
-    if exp < time.time():
-        _memory_cache.pop(key, None)
-        return None
-    return data
-
-
-def set(key: str, value: str, ttl: Optional[int] = None) -> None:
-    """Store a string value with a TTL between 15 and 60 minutes."""
+        _breaker.record_success()
+        if val is not None:
+            _remember(key, val, ttl if ttl and ttl > 0 else None)
+        return val
+    return _memory_cache.get(key)
+
+
+def set(key: str, value: Value, ttl: Optional[int] = None) -> None:
+    """Store a value with a TTL between 15 and 60 minutes."""
     ttl = ttl or random.randint(900, 3600)
-    if _redis is not None:
+    redis_client = client()
+    if redis_client is not None:
         try:
-            _redis.setex(key, ttl, value)
+            redis_client.setex(key, ttl, value)
+            _breaker.record_success()
+            _remember(key, value, ttl)
             return
-        except Exception:  # pragma: no cover
+        except Exception:
+            _failed()
+    _memory_cache.set(key, value, ttl)
+    _deadlines.set(key, time.time() + ttl)
+
+
+def delete(key: str) -> None:
+    """Remove ``key`` from every tier."""
+    _local.delete(key)
+    _deadlines.delete(key)
+    _memory_cache.delete(key)
+    redis_client = client()
+    if redis_client is not None:
+        try:
+            redis_client.delete(key)
+            _breaker.record_success()
+        except Exception:
+            _failed()
+
+
+def client():
+    """Return the Redis client, or ``None`` while Redis is unavailable.
+
+    The first call connects (bounded by ``REDIS_CONNECT_TIMEOUT``); if that
+    fails, later calls return ``None`` immediately until the background
+    reconnect succeeds.
+    """
+    global _attempted
+    if _redis is not None or _attempted:
+        return _redis
+    with _connect_lock:
+        if not _attempted:
+            if not _connect():
+                _breaker.trip()
+                _start_reconnector()
+            _attempted = True
+    return _redis
+
+
+def get_or_load(
+    key: str, loader: Callable[[], Value], ttl: Optional[int] = None
+) -> Value:
+    """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+    Concurrent misses for the same key share one ``loader`` call. A hit
+    within ``CACHE_REFRESH_AHEAD_S`` of expiry is served immediately while a
+    background thread reloads the key, so hot keys do not fall out of cache.
+    """
+    val = get(key)
+    if val is None:
+        return _loads.do(key, lambda: _load(key, loader, ttl))
+    deadline = _deadlines.get(key)
+    if deadline is not None and deadline - time.time() < REFRESH_AHEAD_S:
+        _refresh(key, loader, ttl)
+    return val
+
+
+def stats() -> Dict[str, Any]:
+    """Return counters for the in-process fallback cache and near-cache."""
+    return {
+        "backend": "redis" if _redis is not None else "memory",
+        "breaker": _breaker.stats(),
+        **_memory_cache.stats(),
+        "l1": _local.stats(),
+    }
+
+
+def _connect() -> bool:
+    global _redis
+    try:
+        import redis  # type: ignore
+    except Exception:  # pragma: no cover
+        return False
+    try:
+        conn = redis.Redis.from_url(
+            REDIS_URL,
+            decode_responses=False,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        )
+        conn.ping()
+    except Exception:
+        return False
+    _redis = conn
+    _breaker.record_success()
+    return True
+
+
+def _failed() -> None:
+    """Count a failed Redis call; once the breaker opens, drop the client."""
+    global _redis
+    _breaker.record_failure()
+    if _breaker.state == CircuitBreaker.OPEN and _redis is not None:
+        _redis = None
+        _start_reconnector()
+
+
+def _start_reconnector() -> None:
+    global _reconnector
+
+    def run() -> None:
+        while _redis is None:
+            time.sleep(_breaker.reset_timeout)
+            if _breaker.allow() and not _connect():
+                _breaker.trip()
+
+    with _connect_lock:
+        if _reconnector is None or not _reconnector.is_alive():
+            _reconnector = threading.Thread(
+                target=run, name="redis-reconnect", daemon=True
+            )
+            _reconnector.start()
+
+
+def _remember(key: str, value: Value, ttl: Optional[float]) -> None:
+    _local.set(key, value, min(L1_TTL, ttl) if ttl else L1_TTL)
+    if ttl:
+        _deadlines.set(key, time.time() + ttl)
+
+
+def _load(key: str, loader: Callable[[], Value], ttl: Optional[int]) -> Value:
+    # another thread or process may have filled the key while we queued
+    val = get(key)
+    if val is None:
+        val = loader()
+        set(key, val, ttl)
+    return val
+
+
+def _reload(key: str, loader: Callable[[], Value], ttl: Optional[int]) -> Value:
+    val = loader()
+    set(key, val, ttl)
+    return val
+
+
+def _refresh(key: str, loader: Callable[[], Value], ttl: Optional[int]) -> None:
+    flight = ("refresh", key)
+    if _loads.in_flight(flight):
+        return
+
+    def run() -> None:
+        try:
+            _loads.do(flight, lambda: _reload(key, loader, ttl))
+        except Exception:  # pragma: no cover - the stale value stays served
             pass
-    _memory_cache[key] = (value, time.time() + ttl)
+
+    threading.Thread(target=run, daemon=True).start()
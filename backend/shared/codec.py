@@ -0,0 +1,151 @@
+"""Versioned binary encoding of pydantic models for the cache.
+
+Every payload starts with a four-byte header: the magic ``b"GC"``, the
+format version, and one byte naming the serializer and compression used.
+Decoding reads the header, so entries written with any registered
+combination stay readable when the configured codec changes. Untagged
+payloads are treated as the plain JSON written before this module existed.
+
+``zstandard`` is optional; without it the default codec leaves payloads
+uncompressed.
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar, Union
+
+import msgpack  # type: ignore
+from pydantic import BaseModel
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+M = TypeVar("M", bound=BaseModel)
+
+MAGIC = b"GC"
+VERSION = 1
+HEADER_SIZE = 4
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded."""
+
+
+def _json_dump(model: BaseModel) -> bytes:
+    return model.model_dump_json().encode()
+
+
+def _json_load(cls: Type[M], data: bytes) -> M:
+    return cls.model_validate_json(data)
+
+
+def _msgpack_dump(model: BaseModel) -> bytes:
+    return msgpack.packb(model.model_dump(mode="json"), use_bin_type=True)
+
+
+def _msgpack_load(cls: Type[M], data: bytes) -> M:
+    return cls.model_validate(msgpack.unpackb(data, raw=False))
+
+
+# name -> (id, dump, load); ids are part of the stored format, never reuse one
+SERIALIZERS: Dict[str, Tuple[int, Callable[..., bytes], Callable[..., Any]]] = {
+    "json": (0, _json_dump, _json_load),
+    "msgpack": (1, _msgpack_dump, _msgpack_load),
+}
+
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# name -> (id, compress(data, level), decompress, default level)
+COMPRESSORS: Dict[
+    str, Tuple[int, Callable[[bytes, int], bytes], Callable[[bytes], bytes], int]
+] = {
+    "none": (0, lambda data, level: data, lambda data: data, 0),
+    "zlib": (1, zlib.compress, zlib.decompress, 1),
+}
+if zstandard is not None:  # pragma: no branch
+    COMPRESSORS["zstd"] = (2, _zstd_compress, _zstd_decompress, 3)
+
+_SERIALIZER_IDS = {v[0]: name for name, v in SERIALIZERS.items()}
+_COMPRESSOR_IDS = {v[0]: name for name, v in COMPRESSORS.items()}
+
+
+class Codec:
+    """Encode models with one serializer and compression, decode any.
+
+    Payloads shorter than ``min_size`` bytes are stored uncompressed, where
+    compression costs more time than it saves space.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "none",
+        level: Optional[int] = None,
+        min_size: int = 1024,
+    ) -> None:
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"unknown or unavailable serializer: {serializer}")
+        if compression not in COMPRESSORS:
+            raise ValueError(f"unknown or unavailable compression: {compression}")
+        self.serializer = serializer
+        self.compression = compression
+        self.level = COMPRESSORS[compression][3] if level is None else level
+        self.min_size = min_size
+
+    def encode(self, model: BaseModel) -> bytes:
+        sid, dump, _ = SERIALIZERS[self.serializer]
+        body = dump(model)
+        cid = 0
+        if self.compression != "none" and len(body) >= self.min_size:
+            cid, compress, _, _ = COMPRESSORS[self.compression]
+            body = compress(body, self.level)
+        return MAGIC + bytes((VERSION, sid << 4 | cid)) + body
+
+    def decode(self, cls: Type[M], payload: Union[bytes, str]) -> M:
+        """Decode ``payload`` into ``cls``.
+
+        Raises:
+            CodecError: If the payload has an unknown version or format, or
+                does not decode into ``cls``.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+        try:
+            if not payload.startswith(MAGIC):
+                return _json_load(cls, payload)
+            version, kind = payload[2], payload[3]
+            if version != VERSION:
+                raise CodecError(f"unsupported cache format version {version}")
+            serializer = _SERIALIZER_IDS.get(kind >> 4)
+            compression = _COMPRESSOR_IDS.get(kind & 0x0F)
+            if serializer is None or compression is None:
+                raise CodecError(f"unsupported cache payload kind {kind:#04x}")
+            body = COMPRESSORS[compression][2](payload[HEADER_SIZE:])
+            return SERIALIZERS[serializer][2](cls, body)
+        except CodecError:
+            raise
+        except Exception as exc:
+            raise CodecError(str(exc)) from exc
+
+
+def default_codec() -> Codec:
+    """Return the codec selected by ``CACHE_CODEC`` and ``CACHE_COMPRESSION``.
+
+    Defaults to msgpack, compressed with zstd when it is installed.
+    """
+    serializer = os.getenv("CACHE_CODEC") or "msgpack"
+    compression = os.getenv("CACHE_COMPRESSION") or (
+        "zstd" if "zstd" in COMPRESSORS else "none"
+    )
+    return Codec(serializer, compression)
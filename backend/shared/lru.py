@@ -0,0 +1,167 @@
+"""Bounded in-process LRU cache with per-entry TTLs."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def default_sizeof(value: Any) -> int:
+    """Approximate the memory held by ``value`` in bytes."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU cache bounded by entry count and total bytes.
+
+    Entries may carry a TTL. Expired entries are dropped when read and by
+    :meth:`sweep`, which also runs automatically from :meth:`set` at most once
+    per ``sweep_interval`` seconds, so keys that are never read again do not
+    linger. Hit, miss, eviction and expiry counters are kept for
+    :meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        sweep_interval: float = 60.0,
+        sizeof: Callable[[Any], int] = default_sizeof,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._sizeof = sizeof
+        self._clock = clock
+        # key -> (value, expires_at or None, size)
+        self._data: "OrderedDict[Hashable, Tuple[V, Optional[float], int]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """Return the live value for ``key`` and mark it most recently used."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self._expired(entry):
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def ttl(self, key: Hashable) -> Optional[float]:
+        """Return seconds until ``key`` expires, or ``None`` if it never does."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] is None:
+                return None
+            return entry[1] - self._clock()
+
+    def set(
+        self,
+        key: Hashable,
+        value: V,
+        ttl: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        """Store ``value``, evicting least recently used entries to fit.
+
+        ``size`` overrides ``sizeof`` when the caller already knows it.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        size = self._sizeof(value) if size is None else size
+        with self._lock:
+            now = self._clock()
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # would evict everything and still not fit
+                return
+            self._data[key] = (value, None if ttl is None else now + ttl, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry and return how many were removed."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _expired(self, entry: Tuple[V, Optional[float], int]) -> bool:
+        return entry[1] is not None and entry[1] <= self._clock()
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def _sweep(self, now: float) -> int:
+        expired = [
+            k for k, (_, exp, _) in self._data.items() if exp is not None and exp <= now
+        ]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
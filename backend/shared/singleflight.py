@@ -0,0 +1,91 @@
+"""Request coalescing: run one call per key, share its result with waiters."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls for the same key across threads.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block and receive the same result (or exception) instead of
+    repeating the work.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Any, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key: Any) -> bool:
+        return key in self._calls
+
+    def do(self, key: Any, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value  # type: ignore[return-value]
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Coalesce concurrent awaits for the same key within an event loop.
+
+    The first caller for a key awaits ``fn()``; callers arriving while it is
+    in flight await the same future instead of repeating the work.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Any, "asyncio.Future[T]"] = {}
+
+    def in_flight(self, key: Any) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[T]]) -> T:
+        fut = self._calls.get(key)
+        if fut is not None:
+            # shield so one cancelled waiter does not cancel the shared call
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._calls[key] = fut
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # retrieve it so an unawaited failure is not logged as lost
+            fut.exception()
+            raise
+        else:
+            fut.set_result(value)
+            return value
+        finally:
+            self._calls.pop(key, None)
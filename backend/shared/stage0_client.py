@@ -1,21 +1,144 @@
-"""Client for retrieving Stage0 site context."""
+"""Client for retrieving Stage0 site context.
+
+Requests share pooled keep-alive connections, over HTTP/2 where the server
+offers it, instead of opening a connection per call. Transport errors,
+``429`` and ``5xx`` responses are retried with full-jitter exponential
+backoff, and at most ``STAGE0_MAX_PER_HOST`` requests run against one host at
+a time so a burst of builds cannot overwhelm the upstream API.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
 import httpx
 
 from app.models.context import SiteContext
 
 STAGE0_API_URL = os.getenv("STAGE0_API_URL", "").rstrip("/")
+STAGE0_TIMEOUT = float(os.getenv("STAGE0_TIMEOUT", "10"))
+STAGE0_MAX_CONNECTIONS = int(os.getenv("STAGE0_MAX_CONNECTIONS", "20"))
+STAGE0_MAX_PER_HOST = int(os.getenv("STAGE0_MAX_PER_HOST", "8"))
+STAGE0_RETRIES = int(os.getenv("STAGE0_RETRIES", "3"))
+STAGE0_BACKOFF_BASE = float(os.getenv("STAGE0_BACKOFF_BASE", "0.1"))
+STAGE0_BACKOFF_MAX = float(os.getenv("STAGE0_BACKOFF_MAX", "2"))
 
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
 
-def fetch_context(project_id: str) -> SiteContext:
-    """Fetch context from the Stage0 API for the given project id."""
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_host_limits: Dict[str, threading.BoundedSemaphore] = {}
+# async clients and per-host semaphores belong to the loop that made them
+_aclient: Optional[httpx.AsyncClient] = None
+_aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+_ahost_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=STAGE0_MAX_CONNECTIONS,
+        max_keepalive_connections=STAGE0_MAX_CONNECTIONS,
+    )
+
+
+def _context_url(project_id: str) -> str:
     if not STAGE0_API_URL:
         raise RuntimeError("STAGE0_API_URL not set")
-    url = f"{STAGE0_API_URL}/projects/{project_id}/context"
-    resp = httpx.get(url, timeout=10.0)
-    resp.raise_for_status()
-    data = resp.json()
-    return SiteContext.model_validate(data)
+    return f"{STAGE0_API_URL}/projects/{project_id}/context"
+
+
+def _backoff(attempt: int) -> float:
+    cap = min(STAGE0_BACKOFF_MAX, STAGE0_BACKOFF_BASE * 2**attempt)
+    return random.uniform(0, cap)
+
+
+def _should_retry(resp: Optional[httpx.Response], attempt: int) -> bool:
+    return attempt < STAGE0_RETRIES and (
+        resp is None or resp.status_code in _RETRY_STATUS
+    )
+
+
+def client() -> httpx.Client:
+    """Return the shared synchronous client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    timeout=STAGE0_TIMEOUT, limits=_limits(), http2=True
+                )
+    return _client
+
+
+def async_client() -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+    """Return the shared async client and host limits for the running loop."""
+    global _aclient, _aclient_loop, _ahost_limits
+    loop = asyncio.get_running_loop()
+    if _aclient is None or _aclient_loop is not loop:
+        _aclient = httpx.AsyncClient(
+            timeout=STAGE0_TIMEOUT, limits=_limits(), http2=True
+        )
+        _aclient_loop, _ahost_limits = loop, {}
+    return _aclient, _ahost_limits
+
+
+def fetch_context(project_id: str) -> SiteContext:
+    """Fetch context from the Stage0 API for the given project id."""
+    url = _context_url(project_id)
+    host = httpx.URL(url).host
+    with _client_lock:
+        limit = _host_limits.setdefault(
+            host, threading.BoundedSemaphore(STAGE0_MAX_PER_HOST)
+        )
+    attempt = 0
+    while True:
+        resp = None
+        try:
+            with limit:
+                resp = client().get(url)
+        except httpx.TransportError:
+            if not _should_retry(None, attempt):
+                raise
+        if resp is not None and not _should_retry(resp, attempt):
+            resp.raise_for_status()
+            return SiteContext.model_validate_json(resp.content)
+        time.sleep(_backoff(attempt))
+        attempt += 1
+
+
+async def fetch_context_async(project_id: str) -> SiteContext:
+    """Async :func:`fetch_context` on a pooled ``httpx.AsyncClient``."""
+    url = _context_url(project_id)
+    host = httpx.URL(url).host
+    aclient, limits = async_client()
+    limit = limits.setdefault(host, asyncio.Semaphore(STAGE0_MAX_PER_HOST))
+    attempt = 0
+    while True:
+        resp = None
+        try:
+            async with limit:
+                resp = await aclient.get(url)
+        except httpx.TransportError:
+            if not _should_retry(None, attempt):
+                raise
+        if resp is not None and not _should_retry(resp, attempt):
+            resp.raise_for_status()
+            return SiteContext.model_validate_json(resp.content)
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+async def aclose() -> None:
+    """Close pooled connections; call on application shutdown."""
+    global _client, _aclient
+    if _aclient is not None and _aclient_loop is asyncio.get_running_loop():
+        await _aclient.aclose()
+    _aclient = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,98 @@
+import math
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.context import SiteContext
+from app.services.context_store import SQLContextBackend
+
+
+def _uq(value: float, source: str = "test") -> dict:
+    return {
+        "value": value,
+        "ci95_low": value * 0.85,
+        "ci95_high": value * 1.15,
+        "source": source,
+    }
+
+
+def make_site_context(
+    site_name: str = "Test", vertices: int = 16, **overrides
+) -> SiteContext:
+    """Build a complete, valid SiteContext without calling the Stage0 API."""
+    ring = [
+        [
+            2.0 + 0.01 * math.cos(2 * math.pi * i / vertices),
+            1.0 + 0.01 * math.sin(2 * math.pi * i / vertices),
+        ]
+        for i in range(vertices)
+    ]
+    data = {
+        "site_name": site_name,
+        "centroid": {"lat": 1.0, "lon": 2.0},
+        "bbox": [1.99, 0.99, 2.01, 1.01],
+        "boundary_geojson": {"type": "Polygon", "coordinates": [ring + [ring[0]]]},
+        "climate": {
+            "avg_temp_c": _uq(18.0),
+            "annual_rain_mm": _uq(900.0),
+            "hdd": _uq(1500.0),
+            "cdd": _uq(400.0),
+            "wind_index": _uq(0.4),
+        },
+        "climate_scenarios": {
+            "baseline": {"heatwave_days": _uq(12.0), "flood_return_yr": _uq(50.0)}
+        },
+        "environment": {
+            "elev_m_mean": _uq(35.0),
+            "slope_deg_mean": _uq(3.0),
+            "greenspace_pct": _uq(0.25),
+            "water_pct": _uq(0.05),
+        },
+        "mobility": {"walkability_0_100": _uq(62.0), "transit_stops": _uq(14.0)},
+        "socio_econ": {"pop_density_km2": _uq(4200.0), "median_income_index": _uq(1.1)},
+        "constraints": ["setback_5m"],
+        "zoning_hint": "R3",
+        "zoning_drift_pred": {
+            "p_change_1y": 0.1,
+            "p_upzone_3y": 0.2,
+            "label_1y": "no_change",
+            "explain": "stable",
+        },
+        "risk_scores": {
+            "flood_0_100": 40,
+            "quake_0_100": 50,
+            "heat_0_100": 41,
+            "pollution_0_100": 47,
+        },
+        "design_objectives_suggested": ["shade", "drainage"],
+        "subsurface": {"utility_density_hint": "medium", "void_risk_hint": "low"},
+        "data_quality": {"online": False, "sources": ["test"], "notes": ""},
+        "lineage": {
+            "climate": {"source_id": "test", "license": "CC0", "transform": "none"}
+        },
+        "privacy_report": {"pii_found": False},
+        "explain": [{"feature": "flood", "why": "low-lying"}],
+        "audit": {"inputs_hash": "abc", "duration_ms": 1, "version": "test"},
+    }
+    data.update(overrides)
+    return SiteContext.model_validate(data)
+
+
+@pytest.fixture
+def site_context():
+    return make_site_context
+
+
+@pytest.fixture
+def engine():
+    """A private in-memory SQLite database, shared by every session of a test."""
+    return create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+
+@pytest.fixture
+def context_backend(engine):
+    return SQLContextBackend(sessionmaker(bind=engine, future=True))
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from shapely.geometry import shape
+
+from app.main import app
+from app.routers import stage0 as stage0_router
+from app.services import stage0_context
+from app.services.boundary_simplify import reduce_boundary
+from app.services.context_store import ContextStore
+from shared import cache
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def store(context_backend, monkeypatch):
+    store = ContextStore(context_backend)
+    monkeypatch.setattr(stage0_context, "CONTEXTS", store)
+    monkeypatch.setattr(stage0_router, "CONTEXTS", store)
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+    return store
+
+
+def test_dense_boundary_is_simplified_and_quantized(site_context):
+    boundary = site_context(vertices=20000).boundary_geojson
+    reduced = reduce_boundary(boundary)
+    before, after = shape(boundary), shape(reduced)
+    assert after.is_valid and after.exterior.is_ccw
+    assert len(after.exterior.coords) < len(before.exterior.coords) / 10
+    assert len(json.dumps(reduced)) < len(json.dumps(boundary)) / 10
+    assert before.symmetric_difference(after).area < before.area * 1e-3
+    assert all(round(x, 7) == x for x, _ in after.exterior.coords)
+
+
+def test_small_or_unparsable_boundaries_are_left_alone():
+    square = {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    }
+    assert reduce_boundary(square) is None
+    assert reduce_boundary({"type": "Polygon", "coordinates": "x"}) is None
+    feature = {
+        "type": "Feature",
+        "properties": {"lot": 7},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1.123456789, 0], [1, 1], [0, 0]]],
+        },
+    }
+    reduced = reduce_boundary(feature)
+    assert reduced["properties"] == {"lot": 7}
+    assert [1.1234568, 0.0] in reduced["geometry"]["coordinates"][0]
+    assert reduce_boundary(feature, decimals=None) is None
+
+
+def test_built_contexts_store_reduced_boundary_and_keep_the_original(
+    store, site_context, monkeypatch
+):
+    original = site_context("dense", vertices=5000)
+    monkeypatch.setattr(stage0_context, "fetch_context", lambda site: original)
+    ctx = stage0_context.build_site_context(
+        stage0_context.Stage0Request(site_name="dense")
+    )
+    assert len(ctx.boundary_geojson["coordinates"][0]) < 1000
+    assert store.get(ctx.context_id).boundary_geojson == ctx.boundary_geojson
+    assert len(store.codec.encode(ctx)) < len(store.codec.encode(original)) / 4
+
+    res = client.get(
+        f"/stage0/context/{ctx.context_id}/boundary", params={"full": True}
+    )
+    assert res.json()["boundary_geojson"] == original.boundary_geojson
+    res = client.get(f"/stage0/context/{ctx.context_id}/boundary")
+    assert res.json()["boundary_geojson"] == ctx.boundary_geojson
+    assert client.get("/stage0/context/missing/boundary").status_code == 404
+
+    assert store.evict(ctx.context_id)
+    assert store.backend.load_boundary(ctx.context_id) is None
+
+
+def test_patching_the_boundary_replaces_the_saved_original(store, site_context):
+    dense = site_context("patched", vertices=2000)
+    ctx, full = stage0_context._reduce(dense)
+    store.put_boundaries([(ctx.context_id, full)])
+    store.put(ctx)
+    square = {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    }
+    patched = stage0_context.apply_patch(ctx, {"boundary_geojson": square})
+    assert patched.boundary_geojson == square
+    assert store.full_boundary(ctx.context_id) == square
+
+    stage0_context.apply_patch(patched, {"boundary_geojson": dense.boundary_geojson})
+    assert store.full_boundary(ctx.context_id) == dense.boundary_geojson
+
+    assert stage0_context.revert_patch(ctx.context_id).boundary_geojson == square
+    assert store.full_boundary(ctx.context_id) == square
+    assert stage0_context.revert_patch(ctx.context_id) == ctx
+    assert store.full_boundary(ctx.context_id) == dense.boundary_geojson
@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+from shapely.geometry import shape
+
+from app.main import app
+from app.services.stage0_context import validate_boundaries, validate_boundary
+
+client = TestClient(app)
+
+BOW = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+CCW = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+CW = {"type": "Polygon", "coordinates": [[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]]}
+POINT = {"type": "Point", "coordinates": [0, 0]}
+FLAT = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [2, 2], [0, 0]]]}
+OPEN = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1]]]}
+
+
+def test_bulk_results_agree_with_single_validation():
+    features = [
+        BOW,
+        CCW,
+        CW,
+        POINT,
+        {"type": "Feature", "geometry": BOW, "properties": {}},
+    ]
+    result = validate_boundaries(features)
+    assert result["count"] == 5 and result["valid"] == 2
+    for feature, item in zip(features, result["results"]):
+        single = validate_boundary(feature.get("geometry", feature))
+        assert item["valid"] == single["valid"]
+        assert item["errors"] == single["errors"]
+    assert result["results"][0]["reason"].startswith("Self-intersection")
+    assert result["results"][2]["warnings"] == ["clockwise exterior ring"]
+    assert result["features_per_s"] > 0
+
+
+def test_unparsable_features_do_not_fail_the_batch():
+    bad = [{"type": "Nope"}, {"type": "Polygon", "coordinates": "x"}, {}]
+    result = validate_boundaries(bad + [CCW, OPEN])
+    errors = [r["errors"] for r in result["results"]]
+    assert errors[3] == []
+    assert all(
+        len(e) == 1 and e[0].startswith("invalid GeoJSON geometry: ")
+        for e in errors[:3] + errors[4:]
+    )
+    assert "Unknown geometry type" in errors[0][0]
+    assert "closed linestring" in errors[4][0]
+
+
+def test_empty_and_zero_area_polygons_are_invalid():
+    empty = {"type": "Polygon", "coordinates": []}
+    result = validate_boundaries([empty, FLAT, BOW], repair=True)
+    empty_item, flat, bow = result["results"]
+    assert empty_item["errors"] == ["empty polygon"]
+    assert flat["errors"] == ["self-intersection", "zero area"]
+    # nothing to orient or repair into a polygon
+    assert "warnings" not in empty_item and "warnings" not in flat
+    assert "repaired" not in empty_item and "repaired" not in flat
+    # a bowtie's lobes cancel in the signed area but still cover some
+    assert bow["errors"] == ["self-intersection"]
+    assert result["valid"] == 0
+
+
+def test_repair_returns_valid_counter_clockwise_geometry():
+    result = validate_boundaries([BOW, CW, CCW], repair=True)
+    bow, cw, ccw = result["results"]
+    assert shape(bow["repaired"]).is_valid
+    assert shape(cw["repaired"]).exterior.is_ccw
+    assert "repaired" not in ccw
+
+
+def test_bulk_validate_route():
+    res = client.post(
+        "/stage0/context/validate/batch", json={"features": [BOW, CCW], "repair": True}
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["valid"] for r in body["results"]] == [False, True]
+    assert body["results"][0]["repaired"]["type"] == "MultiPolygon"
@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared import async_cache, cache
+from shared.lru import LRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_byte_budget_is_enforced():
+    cache = LRUCache(max_entries=100, max_bytes=10)
+    cache.set("a", "x" * 4)
+    cache.set("b", "y" * 4)
+    assert cache.bytes == 8
+    cache.set("c", "z" * 4)
+    assert cache.bytes == 8 and "a" not in cache
+    cache.set("huge", "w" * 11)
+    assert "huge" not in cache and cache.bytes == 8
+
+
+def test_ttl_expiry_and_sweep():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=10, sweep_interval=5, clock=clock)
+    cache.set("short", "1", ttl=1)
+    cache.set("never_read", "2", ttl=2)
+    cache.set("forever", "3")
+    clock.now = 1.5
+    assert cache.get("short") is None
+    clock.now = 10
+    # the write triggers a sweep that drops keys nobody reads again
+    cache.set("new", "4")
+    assert len(cache) == 2
+    assert cache.stats()["expirations"] == 2
+    assert cache.bytes == 2
+
+
+def test_get_or_load_coalesces_concurrent_misses():
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1)
+        return "value"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_load, "sf:key", loader) for _ in range(8)]
+        time.sleep(0.05)
+        gate.set()
+        results = [f.result() for f in futures]
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_get_or_load_refreshes_hot_keys_before_expiry(monkeypatch):
+    monkeypatch.setattr(cache, "REFRESH_AHEAD_S", 60)
+    cache.set("ra:key", "old", ttl=30)
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("ra:key", loader, ttl=3600) == "old"
+    assert refreshed.wait(1)
+    for _ in range(100):
+        if cache.get("ra:key") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("ra:key") == "new"
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data = {}
+        self.reads = 0
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client) -> None:
+        self.client = client
+        self.ops = []
+
+    def get(self, key):
+        self.ops.append(lambda: self.client.data.get(key))
+
+    def ttl(self, key):
+        self.ops.append(lambda: 600)
+
+    def execute(self):
+        self.client.reads += 1
+        return [op() for op in self.ops]
+
+
+def test_near_cache_absorbs_repeated_redis_reads(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "_redis", fake)
+    monkeypatch.setattr(cache, "_local", LRUCache(max_entries=10, default_ttl=5))
+    fake.data["hot"] = "v"
+    assert [cache.get("hot") for _ in range(5)] == ["v"] * 5
+    assert fake.reads == 1
+
+
+def test_async_mset_mget_share_memory_fallback(monkeypatch):
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+
+    async def scenario():
+        await async_cache.mset({"ak1": "x", "ak2": "y"}, ttl=60)
+        return await async_cache.mget(["ak1", "missing", "ak2"])
+
+    assert asyncio.run(scenario()) == ["x", None, "y"]
+    # the sync API reads the same fallback store
+    assert cache.get("ak1") == "x"
+
+
+def test_async_get_or_load_coalesces_concurrent_misses(monkeypatch):
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "loaded"
+
+    async def scenario():
+        return await asyncio.gather(
+            *(async_cache.get_or_load("async-coalesce", loader) for _ in range(10))
+        )
+
+    assert asyncio.run(scenario()) == ["loaded"] * 10
+    assert calls == 1
+
+
+def test_redis_connects_lazily_and_breaker_falls_back(monkeypatch):
+    from shared.breaker import CircuitBreaker
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    attempts = []
+    fake = FakeRedis()
+
+    def connect():
+        attempts.append(clock.now)
+        return False
+
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", False)
+    monkeypatch.setattr(cache, "_breaker", breaker)
+    monkeypatch.setattr(cache, "_connect", connect)
+    monkeypatch.setattr(cache, "_start_reconnector", lambda: None)
+    assert attempts == []  # nothing happens until the cache is used
+    assert cache.client() is None and cache.client() is None
+    assert attempts == [0.0] and breaker.state == "open"
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow() and breaker.state == "half_open"
+
+    # a connected client that keeps failing trips the breaker and is dropped
+    breaker.record_success()
+    monkeypatch.setattr(cache, "_redis", fake)
+    monkeypatch.setattr(fake, "pipeline", lambda: 1 / 0)
+    assert cache.get("k") is None
+    assert cache._redis is fake
+    assert cache.get("k") is None
+    assert cache._redis is None and breaker.state == "open"
@@ -0,0 +1,30 @@
+from app.ai_agents.codebook import MISSING, Codebook
+from app.ai_agents.negotiator import Negotiator
+
+
+def test_encode_decode_round_trip():
+    book = Codebook()
+    meta = {"color": "red", "energy": "solar", "structure": "timber"}
+    code = book.encode(meta.items())
+    assert code == (0, 0, 0)
+    assert book.decode(code) == meta
+    assert book.label(code) == "color:red_energy:solar_structure:timber"
+    assert book.encode([("color", "blue"), ("color", "red")]) == code[:1]
+
+
+def test_equal_variants_share_codes():
+    book = Codebook()
+    first = book.encode([("a", "x"), ("b", "y")])
+    second = book.encode([("b", "y"), ("a", "x")])
+    assert first == second and hash(first) == hash(second)
+    partial = book.encode([("b", "y")])
+    assert partial == (MISSING, 0)
+    assert book.decode(partial) == {"b": "y"}
+
+
+def test_negotiator_codes_decode_to_labels():
+    negotiator = Negotiator()
+    book = negotiator.codebook()
+    codes = list(negotiator.iter_codes())
+    assert codes[0] == (0, 0, 0) and codes[-1] == (1, 1, 1)
+    assert [book.join(c) for c in codes] == negotiator.generate_variants()
@@ -0,0 +1,60 @@
+import pytest
+
+from app.models.context import SiteContext, Stage0Request
+from app.services import stage0_context
+from shared import cache
+from shared.codec import MAGIC, Codec, CodecError
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_round_trip(site_context, compression):
+    ctx = site_context(vertices=200)
+    codec = Codec("json", compression)
+    payload = codec.encode(ctx)
+    assert payload.startswith(MAGIC)
+    assert codec.decode(SiteContext, payload) == ctx
+    if compression == "zlib":
+        assert len(payload) < len(ctx.model_dump_json())
+
+
+def test_msgpack_round_trip(site_context):
+    ctx = site_context()
+    payload = Codec("msgpack", "none").encode(ctx)
+    # any codec reads any tagged payload
+    assert Codec().decode(SiteContext, payload) == ctx
+
+
+def test_untagged_json_is_still_readable(site_context):
+    ctx = site_context()
+    assert Codec().decode(SiteContext, ctx.model_dump_json()) == ctx
+
+
+def test_unknown_version_and_garbage_are_rejected(site_context):
+    payload = bytearray(Codec().encode(site_context()))
+    payload[2] = 99
+    with pytest.raises(CodecError):
+        Codec().decode(SiteContext, bytes(payload))
+    with pytest.raises(CodecError):
+        Codec().decode(SiteContext, MAGIC + b"\x01\x0f...")
+    with pytest.raises(ValueError):
+        Codec("pickle")
+
+
+def test_build_refetches_entries_it_cannot_decode(site_context, monkeypatch):
+    ctx = site_context("codec-site")
+    calls = []
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+    monkeypatch.setattr(
+        stage0_context, "fetch_context", lambda pid: calls.append(pid) or ctx
+    )
+    cache.set("stage0:context:codec-site", MAGIC + b"\x63\x00{}")
+    expected, _ = stage0_context._reduce(ctx)
+    built = stage0_context.build_site_context(Stage0Request(site_name="codec-site"))
+    assert built == expected and calls == ["codec-site"]
+    # the entry was rewritten in the current format
+    assert (
+        stage0_context.build_site_context(Stage0Request(site_name="codec-site"))
+        == expected
+    )
+    assert calls == ["codec-site"]
@@ -0,0 +1,60 @@
+import pytest
+
+from app.services.context_overlay import ContextOverlay
+from app.services.stage0_context import run_counterfactual
+
+
+def test_counterfactual_shares_unchanged_fields(site_context):
+    ctx = site_context(vertices=500)
+    before = ctx.model_dump()
+    after = run_counterfactual(ctx, {"water_pct": 0.05, "unknown": 1.0})
+    assert ctx.model_dump() == before
+    assert after.environment["water_pct"].value == pytest.approx(0.10)
+    assert after.risk_scores.flood_0_100 == 80
+    assert after.boundary_geojson is ctx.boundary_geojson
+    assert after.environment["greenspace_pct"] is ctx.environment["greenspace_pct"]
+
+
+def test_patches_stack_and_revert(site_context):
+    ctx = site_context()
+    base = ContextOverlay(ctx)
+    once = base.patch({"zoning_hint": "C2"})
+    twice = once.patch({"constraints": ["flood_zone"]}).counterfactual(
+        {"greenspace_pct": 0.1}
+    )
+    view = twice.materialize()
+    assert view.zoning_hint == "C2" and view.constraints == ["flood_zone"]
+    assert view.lineage["climate"].transform == "none+ human_override+ human_override"
+    assert view.risk_scores.pollution_0_100 == 42
+    assert set(twice.changes()) == {
+        "zoning_hint",
+        "lineage",
+        "constraints",
+        "risk_scores",
+        "environment",
+    }
+
+    reverted = twice.pop().pop()
+    assert reverted.materialize() == once.materialize()
+    assert reverted.pop().materialize() is ctx
+    # the base was never touched
+    assert ctx.zoning_hint == "R3" and ctx.lineage["climate"].transform == "none"
+
+
+def test_patch_validates_fields(site_context):
+    overlay = ContextOverlay(site_context())
+    with pytest.raises(ValueError):
+        overlay.patch({"not_a_field": 1})
+    with pytest.raises(ValueError):
+        overlay.patch({"risk_scores": {"flood_0_100": "high"}})
+    patched = overlay.patch(
+        {
+            "risk_scores": {
+                "flood_0_100": 1,
+                "quake_0_100": 2,
+                "heat_0_100": 3,
+                "pollution_0_100": 4,
+            }
+        }
+    )
+    assert patched.materialize().risk_scores.quake_0_100 == 2
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.context import SiteContext
+from app.routers import stage0 as stage0_router
+from app.services import stage0_context
+from app.services.context_store import ContextStore
+
+client = TestClient(app)
+
+
+def test_contexts_are_shared_between_workers(context_backend, site_context):
+    worker_a, worker_b = ContextStore(context_backend), ContextStore(context_backend)
+    ctx = site_context()
+    worker_a.put(ctx)
+    assert worker_b.get(ctx.context_id) == ctx
+    assert worker_b.stats()["backend_hits"] == 1
+    # a fresh process sees it too
+    assert ContextStore(context_backend).get(ctx.context_id) == ctx
+
+
+def test_local_tier_is_bounded_and_evictable(context_backend, site_context):
+    store = ContextStore(context_backend, max_entries=2)
+    ctxs = [site_context(f"s{i}") for i in range(3)]
+    store.put_many(ctxs)
+    stats = store.stats()
+    assert stats["stored"] == 3
+    assert stats["local"]["entries"] == 2 and stats["local"]["evictions"] == 1
+    assert stats["local"]["bytes"] > 0
+    # the context dropped from L1 is reloaded from the backend
+    assert store.get(ctxs[0].context_id) == ctxs[0]
+    assert store.evict(ctxs[0].context_id)
+    assert store.get(ctxs[0].context_id) is None
+    assert not store.evict(ctxs[0].context_id)
+    assert store.stats()["stored"] == 2
+
+
+def test_context_routes_use_the_store(context_backend, site_context, monkeypatch):
+    store = ContextStore(context_backend)
+    monkeypatch.setattr(stage0_context, "CONTEXTS", store)
+    monkeypatch.setattr(stage0_router, "CONTEXTS", store)
+    ctx = site_context()
+    store.put(ctx)
+    store.clear_local()
+    assert client.get(f"/stage0/context/{ctx.context_id}").json()["site_name"] == "Test"
+    res = client.post(
+        "/stage0/resolve",
+        json={"context_id": ctx.context_id, "patch": {"zoning_hint": "C2"}},
+    )
+    assert res.json()["zoning_hint"] == "C2"
+    assert ContextStore(context_backend).get(ctx.context_id).zoning_hint == "C2"
+    assert client.get("/stage0/contexts/stats").json()["stored"] == 1
+    assert client.delete(f"/stage0/context/{ctx.context_id}").status_code == 200
+    assert client.get(f"/stage0/context/{ctx.context_id}").status_code == 404
+
+
+def test_patches_are_reverted_from_the_stored_history(
+    context_backend, site_context, monkeypatch
+):
+    store = ContextStore(context_backend)
+    monkeypatch.setattr(stage0_context, "CONTEXTS", store)
+    monkeypatch.setattr(stage0_router, "CONTEXTS", store)
+    ctx = site_context()
+    store.put(ctx)
+    for patch in ({"zoning_hint": "C2"}, {"constraints": ["flood_zone"]}):
+        res = client.post(
+            "/stage0/resolve", json={"context_id": ctx.context_id, "patch": patch}
+        )
+    twice = res.json()
+    assert (
+        twice["lineage"]["climate"]["transform"]
+        == "none+ human_override+ human_override"
+    )
+
+    # another worker reverts from the shared history
+    monkeypatch.setattr(stage0_context, "CONTEXTS", ContextStore(context_backend))
+    once = client.post(f"/stage0/resolve/{ctx.context_id}/revert").json()
+    assert once["zoning_hint"] == "C2" and once["constraints"] == ["setback_5m"]
+    assert once["lineage"]["climate"]["transform"] == "none+ human_override"
+    res = client.post(f"/stage0/resolve/{ctx.context_id}/revert")
+    assert (
+        stage0_context.CONTEXTS.get(ctx.context_id) == ctx == SiteContext(**res.json())
+    )
+    assert client.post(f"/stage0/resolve/{ctx.context_id}/revert").status_code == 404
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import stage0 as stage0_router
+from app.services.stage0_context import run_counterfactual, sweep_counterfactuals
+
+client = TestClient(app)
+
+
+def test_sweep_matches_scalar_counterfactual(site_context):
+    ctx = site_context()
+    rng = random.Random(7)
+    deltas = [
+        {"water_pct": rng.uniform(-0.2, 0.2), "greenspace_pct": rng.uniform(-1.5, 1.5)}
+        for _ in range(500)
+    ] + [{"water_pct": 0.2}, {}]
+    result = sweep_counterfactuals(ctx, deltas=deltas)
+    assert result["n"] == len(deltas)
+    for i, delta in enumerate(deltas):
+        expected = run_counterfactual(ctx, delta).risk_scores
+        got = {k: col[i] for k, col in result["risk_scores"].items()}
+        assert got == expected.model_dump()
+
+
+def test_grid_sweeps_the_cartesian_product(site_context):
+    ctx = site_context()
+    grid = {"water_pct": [0.0, 0.1], "greenspace_pct": [-0.1, 0.0, 0.1]}
+    result = sweep_counterfactuals(ctx, grid=grid)
+    assert result["n"] == 6
+    assert result["inputs"]["water_pct"] == [0.0, 0.0, 0.0, 0.1, 0.1, 0.1]
+    assert result["inputs"]["greenspace_pct"] == [-0.1, 0.0, 0.1] * 2
+    for i in range(6):
+        delta = {k: col[i] for k, col in result["inputs"].items()}
+        assert (
+            result["risk_scores"]["heat_0_100"][i]
+            == run_counterfactual(ctx, delta).risk_scores.heat_0_100
+        )
+
+
+def test_sweep_rejects_bad_input(site_context):
+    ctx = site_context()
+    with pytest.raises(ValueError):
+        sweep_counterfactuals(ctx)
+    with pytest.raises(ValueError):
+        sweep_counterfactuals(ctx, grid={"avg_temp_c": [1.0]})
+
+
+def test_sweep_route(site_context, monkeypatch):
+    ctx = site_context()
+    monkeypatch.setattr(stage0_router.CONTEXTS, "aget", _returning(ctx))
+    res = client.post(
+        "/stage0/counterfactual/sweep",
+        json={"context_id": ctx.context_id, "grid": {"water_pct": [0.0, 0.05, 0.1]}},
+    )
+    assert res.status_code == 200
+    assert res.json()["risk_scores"]["flood_0_100"] == [40, 80, 100]
+    res = client.post(
+        "/stage0/counterfactual/sweep",
+        json={"context_id": ctx.context_id, "grid": {"nope": [1]}},
+    )
+    assert res.status_code == 400
+
+
+def _returning(value):
+    async def aget(_):
+        return value
+
+    return aget
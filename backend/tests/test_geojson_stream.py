@@ -0,0 +1,129 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.geojson_stream import UploadTooLarge, iter_features, iter_values
+
+client = TestClient(app)
+
+SQUARE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+BOW = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+
+
+def _feature(i, geom=SQUARE):
+    return {
+        "type": "Feature",
+        "id": i,
+        "geometry": geom,
+        "properties": {"name": f"p{i}", "area": 1.5e3},
+    }
+
+
+def _collection(n):
+    return {
+        "type": "FeatureCollection",
+        "name": "parcels",
+        "features": [_feature(i) for i in range(n)],
+        "crs": {"type": "name"},
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_feature_collection_streams_features_across_chunks(chunk_size):
+    data = json.dumps(_collection(50), indent=1).encode()
+    features = list(iter_features(io.BytesIO(data), chunk_size=chunk_size))
+    assert features == _collection(50)["features"]
+
+
+def test_ndjson_and_bare_geometries():
+    lines = [json.dumps(_feature(1)), json.dumps(SQUARE), json.dumps(_collection(2))]
+    data = ("\n".join(lines) + "\n").encode()
+    features = list(iter_features(io.BytesIO(data), chunk_size=5))
+    assert features == [_feature(1), SQUARE, _feature(0), _feature(1)]
+
+
+@pytest.mark.parametrize(
+    "doc",
+    [
+        {"type": "Point", "coordinates": [12345.678, 9]},
+        {"type": "Feature", "id": 12.5, "bbox_area": 1e5, "geometry": None},
+        {"type": "Feature", "id": -3, "area": -2.5e-3, "geometry": None, "n": 10},
+    ],
+)
+def test_numbers_split_at_chunk_boundary(doc):
+    data = json.dumps(doc).replace("100000.0", "1e5").encode()
+    for chunk_size in range(1, len(data) + 1):
+        assert list(iter_features(io.BytesIO(data), chunk_size=chunk_size)) == [doc]
+
+
+def test_escapes_split_at_chunk_boundary():
+    doc = {
+        "type": "Feature",
+        "properties": {"név": "Straße 😀", "ç": "é"},
+        "geometry": None,
+    }
+    data = json.dumps(doc).encode()
+    assert b"\\u00e9" in data and b"\\ud83d\\ude00" in data
+    for chunk_size in range(1, len(data) + 1):
+        assert list(iter_features(io.BytesIO(data), chunk_size=chunk_size)) == [doc]
+
+
+def test_early_syntax_error_is_raised_without_reading_on():
+    data = json.dumps(_collection(2000)).replace('"id": 0,', '"id": 0 "x",').encode()
+    with pytest.raises(ValueError, match="invalid GeoJSON: Expecting") as exc:
+        list(iter_features(io.BytesIO(data), max_bytes=4096, chunk_size=1024))
+    assert not isinstance(exc.value, UploadTooLarge)
+
+
+def test_values_are_yielded_whole():
+    values = [_collection(2), _feature(1), [1, 2], "x", 12.5]
+    data = ("\n".join(json.dumps(v) for v in values)).encode()
+    assert list(iter_values(io.BytesIO(data), chunk_size=3)) == values
+    with pytest.raises(ValueError, match="invalid JSON"):
+        list(iter_values(io.BytesIO(b'{"a": 1} {"b": ')))
+
+
+def test_size_cap_and_malformed_input():
+    data = json.dumps(_collection(100)).encode()
+    with pytest.raises(UploadTooLarge):
+        list(iter_features(io.BytesIO(data), max_bytes=1000, chunk_size=256))
+    with pytest.raises(ValueError):
+        list(
+            iter_features(
+                io.BytesIO(
+                    b'{"type": "FeatureCollection", "features": [{"a": 1} {"b": 2}]}'
+                )
+            )
+        )
+    with pytest.raises(ValueError):
+        list(iter_features(io.BytesIO(b"[1, 2]")))
+
+
+def test_upload_validate_route_streams_results():
+    data = "\n".join(
+        json.dumps(_feature(i, BOW if i == 3 else SQUARE)) for i in range(5)
+    )
+    resp = client.post(
+        "/stage0/context/upload/validate",
+        files={"file": ("parcels.geojsonl", data, "application/geo+json")},
+    )
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["index"] for line in lines[:-1]] == [0, 1, 2, 3, 4]
+    assert lines[3]["id"] == 3 and lines[3]["errors"] == ["self-intersection"]
+    assert lines[-1]["summary"]["count"] == 5 and lines[-1]["summary"]["valid"] == 4
+
+
+def test_upload_routes_enforce_limits(monkeypatch):
+    monkeypatch.setattr(settings, "stage0_upload_max_bytes", 100)
+    data = json.dumps(_collection(10))
+    resp = client.post("/stage0/context/upload", files={"file": ("big.json", data)})
+    assert resp.status_code == 413
+    resp = client.post(
+        "/stage0/context/upload", files={"file": ("bad.json", "not json")}
+    )
+    assert resp.status_code == 400
@@ -1,4 +1,8 @@
-from app.ai_agents.negotiator import Negotiator
+import random
+
+import pytest
+
+from app.ai_agents.negotiator import Negotiator, SearchStats
 
 
 def test_generate_variants_default():
@@ -29,3 +33,72 @@ def test_generate_variants_empty_options():
     negotiator = Negotiator()
     assert negotiator.generate_variants({}) == []
 
+
+def test_lazy_paging_matches_full_list():
+    negotiator = Negotiator()
+    full = negotiator.generate_variants()
+    assert negotiator.count() == len(full)
+    assert [negotiator.variant_at(i) for i in range(len(full))] == full
+    assert list(negotiator.iter_variants(offset=3, limit=4)) == full[3:7]
+    assert list(negotiator.iter_variants(offset=6)) == full[6:]
+    assert list(negotiator.iter_variants(offset=8)) == []
+    assert negotiator.variant_at(-1) == full[-1]
+
+
+def test_huge_space_is_not_materialised():
+    options = {f"a{i}": [str(v) for v in range(5)] for i in range(20)}
+    negotiator = Negotiator(options)
+    total = 5**20
+    assert negotiator.count() == total
+    assert negotiator.variant_at(total - 1) == "_".join(["4"] * 20)
+    page = list(negotiator.iter_variants(offset=total - 2, limit=5))
+    assert page == ["_".join(["4"] * 19 + ["3"]), "_".join(["4"] * 20)]
+    sample = negotiator.sample(5, rng=random.Random(0))
+    assert len(set(sample)) == 5
+
+
+def test_variant_at_out_of_range():
+    with pytest.raises(IndexError):
+        Negotiator().variant_at(8)
+
+
+def test_search_prunes_excluded_subtrees():
+    options = {
+        "structure": ["steel", "timber"],
+        "finish": ["matte", "gloss", "lacquer"],
+        "color": ["red", "blue"],
+    }
+    exclusions = [
+        (("structure", "timber"), ("finish", "gloss")),
+        (("structure", "timber"), ("finish", "lacquer")),
+    ]
+    negotiator = Negotiator(options, exclusions)
+    stats = SearchStats()
+    variants = list(negotiator.search(stats=stats))
+    expected = [
+        v
+        for v in Negotiator(options).generate_variants()
+        if not (v.startswith("timber") and ("gloss" in v or "lacquer" in v))
+    ]
+    assert variants == expected
+    assert negotiator.generate_variants() == expected
+    assert list(negotiator.iter_variants(offset=2, limit=3)) == expected[2:5]
+    assert stats.emitted == len(expected)
+    assert stats.pruned == 4
+    assert stats.emitted + stats.pruned == negotiator.count()
+
+
+def test_search_exclusion_on_later_attribute():
+    options = {"a": ["1", "2"], "b": ["x", "y"], "c": ["p", "q"]}
+    negotiator = Negotiator(options, [(("c", "q"), ("a", "1"))])
+    stats = SearchStats()
+    assert list(negotiator.search(stats=stats)) == [
+        "1_x_p",
+        "1_y_p",
+        "2_x_p",
+        "2_x_q",
+        "2_y_p",
+        "2_y_q",
+    ]
+    assert (stats.emitted, stats.pruned) == (6, 2)
+    assert list(Negotiator(options).search()) == Negotiator(options).generate_variants()
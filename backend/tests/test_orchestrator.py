@@ -1,5 +1,28 @@
-from app.ai_agents.orchestrator import run_generation
-from app.models import Weights
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.ai_agents import registry
+from app.ai_agents.orchestrator import Proposal, run_generation, run_generation_async
+from app.ai_agents.registry import AGENTS, LatencyHistogram
+from app.core.config import settings
+from app.db import BatchWriter
+from app.db.models import Candidate as DBCandidate
+from app.main import app
+from app.models import AgentConfig, Weights
+from app.routers import v1
+
+
+@pytest.fixture()
+def session(engine):
+    with Session(engine) as session:
+        yield session
 
 
 def test_run_generation_returns_ranked_variants():
@@ -8,3 +31,162 @@ def test_run_generation_returns_ranked_variants():
     assert len(variants) == 5
     scores = [v.score["composite"] for v in variants]
     assert scores == sorted(scores, reverse=True)
+
+
+def test_run_generation_batches_candidate_writes(session):
+    writer = BatchWriter(session, DBCandidate, batch_size=2)
+    variants = run_generation(5, Weights(), writer=writer, distinct=True)
+    assert writer.flushes == [2, 2, 1]
+    ids = [str(v.id) for v in variants]
+    stored = session.scalars(
+        select(DBCandidate.id).where(DBCandidate.id.in_(ids))
+    ).all()
+    assert sorted(stored) == sorted(ids)
+
+
+def test_concurrent_rounds_match_serial_for_fixed_seed():
+    serial = run_generation(20, Weights(), concurrency=1, seed=42)
+    concurrent = run_generation(20, Weights(), concurrency=8, seed=42)
+
+    def key(variants):
+        return [(v.label, v.score, v.rank) for v in variants]
+
+    assert key(serial) == key(concurrent)
+    # the second run finds every candidate already stored and reuses its row
+    assert [v.id for v in serial] == [v.id for v in concurrent]
+
+
+def test_run_generation_async_inside_running_loop():
+    async def main():
+        # the sync wrapper cannot be used here; the async API must be
+        return await run_generation_async(3, Weights(), seed=7)
+
+    variants = asyncio.run(main())
+    assert [v.rank for v in variants] == [1, 2, 3]
+    assert [v.label for v in variants] == [
+        v.label for v in run_generation(3, Weights(), seed=7)
+    ]
+
+
+def test_v1_generate_queues_the_variants_for_rendering(monkeypatch):
+    job_id = uuid.uuid4()
+    chains = []
+
+    def fake_chain(*signatures):
+        chains.append(signatures)
+        return SimpleNamespace(apply_async=lambda: SimpleNamespace(id=str(job_id)))
+
+    monkeypatch.setattr(v1, "chain", fake_chain)
+    token = jwt.encode(
+        {"sub": "test"}, settings.secret_key, algorithm=settings.jwt_algorithm
+    )
+    res = TestClient(app).post(
+        "/v1/generate",
+        json={"n": 3, "distinct": True},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["id"] == str(job_id) and body["status"] == "queued"
+    variants = body["variants"]
+    assert [v["rank"] for v in variants] == [1, 2, 3]
+    assert all(v["id"] in v1.VARIANTS for v in variants)
+
+    [(render, massing, export)] = chains
+    assert render.task == "workers.render.render"
+    assert render.args == ({"variants": variants},)
+    assert [massing.task, export.task] == [
+        "workers.massing.massing",
+        "workers.export.export",
+    ]
+
+
+def test_distinct_run_dedups_and_stops_when_space_exhausted(session):
+    writer = BatchWriter(session, DBCandidate)
+    variants = run_generation(500, Weights(), writer=writer, seed=3, distinct=True)
+    # 3 colors x 2 energy x 3 cost levels x 2 features x 2 structures
+    assert len(variants) == 72
+    assert len({v.label for v in variants}) == 72
+    assert writer.rows_written == 72
+
+    again = BatchWriter(session, DBCandidate)
+    repeat = run_generation(10, Weights(), writer=again, seed=4, distinct=True)
+    assert again.rows_written == 0
+    assert session.scalar(select(func.count()).select_from(DBCandidate)) == 72
+    by_label = {v.label: v.id for v in variants}
+    assert all(by_label[v.label] == v.id for v in repeat)
+
+
+def test_repeated_designs_share_one_stored_candidate(session):
+    writer = BatchWriter(session, DBCandidate)
+    variants = run_generation(50, Weights(), writer=writer, seed=11)
+    assert len(variants) == 50
+    ids = {v.id for v in variants}
+    assert len(ids) == writer.rows_written < 50
+    assert not writer.ignore_conflicts
+    stored = dict(session.execute(select(DBCandidate.id, DBCandidate.scores)).all())
+    assert all(stored[str(v.id)] == v.score for v in variants)
+
+
+def test_concurrent_runs_share_stored_candidates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'candidates.db'}")
+
+    async def main():
+        writers = [BatchWriter(Session(engine), DBCandidate) for _ in range(2)]
+        return await asyncio.gather(
+            *(
+                run_generation_async(30, Weights(), writer=w, seed=seed)
+                for w, seed in zip(writers, (1, 2))
+            )
+        )
+
+    first, second = asyncio.run(main())
+    with Session(engine) as check:
+        stored = dict(check.execute(select(DBCandidate.label, DBCandidate.id)).all())
+        assert check.scalar(select(func.count()).select_from(DBCandidate)) == len(
+            stored
+        )
+    # both runs report the ids that ended up in the table
+    assert all(stored[v.label] == str(v.id) for v in first + second)
+    assert {v.label for v in first + second} == set(stored)
+
+
+class SlowAgent:
+    name = "slow"
+    options = {"finish": ["matte", "gloss"]}
+
+    async def propose(self, state, rng):
+        await asyncio.sleep(1)
+        return Proposal(type=self.name, data={"finish": "gloss"})
+
+
+def test_agent_timeout_falls_back_and_is_counted(session, monkeypatch):
+    monkeypatch.setitem(AGENTS, "slow", SlowAgent)
+    registry.reset_metrics()
+    agents = [
+        AgentConfig(name="aesthetics"),
+        AgentConfig(name="slow", timeout_s=0.01, fallback={"finish": "raw"}),
+    ]
+    writer = BatchWriter(session, DBCandidate)
+    variants = run_generation(4, Weights(), writer=writer, agents=agents, concurrency=4)
+    assert all(v.metadata["finish"] == "raw" for v in variants)
+    metrics = registry.snapshot()
+    assert metrics["slow"]["calls"] == 4
+    assert metrics["slow"]["timeouts"] == 4
+    assert metrics["aesthetics"]["timeouts"] == 0
+    assert metrics["slow"]["p50_ms"] >= 10
+    assert metrics["aesthetics"]["p99_ms"] < metrics["slow"]["p50_ms"]
+
+
+def test_unknown_agent_is_rejected():
+    with pytest.raises(ValueError):
+        run_generation(1, Weights(), agents=[AgentConfig(name="nope")])
+
+
+def test_latency_histogram_percentiles():
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.observe(ms / 1000)
+    assert hist.percentile(0.5) <= hist.percentile(0.95) <= hist.percentile(0.99)
+    assert 0.05 <= hist.percentile(0.5) <= 0.1024
+    assert hist.percentile(0.99) <= 0.1
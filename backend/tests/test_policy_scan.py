@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.policy_scan import PolicyScanner
+from app.services.stage0_context import policy_watch
+
+client = TestClient(app)
+
+
+def _legacy_policy_watch(text, url):
+    prob = 0.1
+    topics = []
+    txt = (text or "").lower()
+    for k in ["upzone", "tod", "density bonus"]:
+        if k in txt:
+            prob += 0.2
+            topics.append(k)
+    for k in ["overlay", "heritage"]:
+        if k in txt:
+            prob -= 0.1
+            topics.append(k)
+    prob = max(0.0, min(1.0, prob))
+    return {
+        "zoning_change_prob_0_1": prob,
+        "topics": topics,
+        "citations": [url] if url else [],
+        "explain": "keywords detected" if topics else "baseline probability",
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        None,
+        "",
+        "Nothing relevant here.",
+        "Council will UPZONE the corridor today",
+        "TOD density bonus with a heritage overlay",
+        "todensity bonus",
+        "heritage heritage overlay upzone tod",
+    ],
+)
+def test_policy_watch_output_is_unchanged(text):
+    assert policy_watch(text, "https://example.org/m") == _legacy_policy_watch(
+        text, "https://example.org/m"
+    )
+    assert policy_watch(text, None) == _legacy_policy_watch(text, None)
+
+
+def test_offsets_include_overlapping_and_nested_keywords():
+    scanner = PolicyScanner({"tod": 1, "density bonus": 1, "to": 1, "bon": 1})
+    found = scanner.matches("Todensity Bonus; to do today")
+    assert found == {
+        "tod": [0, 23],
+        "to": [0, 17, 23],
+        "density bonus": [2],
+        "bon": [10],
+    }
+    with pytest.raises(ValueError):
+        PolicyScanner({"": 1})
+
+
+def test_batch_and_upload_routes_stream_per_document_results():
+    docs = [{"text": "upzone now", "url": "a"}, {"text": "heritage overlay"}, {}]
+    res = client.post("/stage0/policy/watch/batch", json={"documents": docs})
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[0]["matches"] == {"upzone": [0]} and lines[0]["citations"] == ["a"]
+    assert lines[1]["zoning_change_prob_0_1"] == pytest.approx(0.0)
+    assert lines[2]["explain"] == "baseline probability"
+
+    archive = "\n".join(json.dumps(d) for d in docs) + "\n[1]"
+    res = client.post(
+        "/stage0/policy/watch/upload", files={"file": ("minutes.ndjson", archive)}
+    )
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line.get("topics") for line in lines[:3]] == [
+        ["upzone"],
+        ["overlay", "heritage"],
+        [],
+    ]
+    assert lines[3]["index"] == 3 and "error" in lines[3]
+
+
+def test_upload_reads_documents_whole_whatever_their_members():
+    docs = [
+        {"type": "FeatureCollection", "text": "upzone"},
+        {
+            "text": "tod corridor",
+            "features": [{"text": "heritage"}, {"text": "overlay"}],
+        },
+    ]
+    archive = "\n".join(json.dumps(d) for d in docs) + '\n{"text": "cut'
+    res = client.post(
+        "/stage0/policy/watch/upload", files={"file": ("minutes.ndjson", archive)}
+    )
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line.get("topics") for line in lines[:2]] == [["upzone"], ["tod"]]
+    assert lines[2]["error"].startswith("invalid JSON")
+
+
+def test_upload_reads_escaped_text_across_chunks():
+    text = "Überbauung: upzone " + "é" * 2000
+    archive = "\n".join(json.dumps({"text": text, "url": f"u{i}"}) for i in range(40))
+    # the reader's 64 KiB chunks end inside é escapes
+    assert (1 << 16) - archive.rfind("\\", 0, 1 << 16) < 6
+    res = client.post(
+        "/stage0/policy/watch/upload", files={"file": ("minutes.ndjson", archive)}
+    )
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line["citations"] for line in lines] == [[f"u{i}"] for i in range(40)]
+    assert all(line["topics"] == ["upzone"] for line in lines)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from app.ai_agents.scoring import (
+    OBJECTIVES,
+    objective_matrix,
+    rank_order,
+    score_batch,
+    to_score_dicts,
+)
+from app.models import Weights
+
+
+def test_score_batch_matches_scalar_composite():
+    rng = np.random.default_rng(0)
+    objectives = rng.random((100, len(OBJECTIVES)))
+    weights = Weights(aesthetic=0.5, cost=0.1)
+    scored = score_batch(objectives, weights)
+    for row, out in zip(objectives, to_score_dicts(scored)):
+        expected = sum(v * getattr(weights, k) for k, v in zip(OBJECTIVES, row))
+        assert abs(out["composite"] - expected) < 1e-12
+        assert [out[k] for k in OBJECTIVES] == row.tolist()
+
+
+def test_rank_order_is_descending_and_stable():
+    objectives = objective_matrix(
+        [{"aesthetic": 0.2}, {"aesthetic": 0.9}, {"aesthetic": 0.2}, {}]
+    )
+    scored = score_batch(objectives, Weights())
+    assert rank_order(scored).tolist() == [1, 0, 2, 3]
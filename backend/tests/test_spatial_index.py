@@ -0,0 +1,76 @@
+import random
+
+from fastapi.testclient import TestClient
+from shapely.geometry import Point, box
+
+from app.main import app
+from app.routers import stage0 as stage0_router
+from app.services.context_store import ContextStore
+from app.services.spatial_index import SpatialIndex
+
+client = TestClient(app)
+
+
+def test_queries_match_brute_force_across_rebuilds():
+    rng = random.Random(3)
+    index = SpatialIndex(min_rebuild=8)
+    geoms = {}
+    for i in range(300):
+        x, y = rng.uniform(0, 10), rng.uniform(0, 10)
+        geoms[f"c{i}"] = box(x, y, x + 0.2, y + 0.2)
+        index.add(f"c{i}", geoms[f"c{i}"])
+    for i in range(0, 300, 7):
+        assert index.remove(f"c{i}")
+        del geoms[f"c{i}"]
+    assert not index.remove("c0")
+    assert index.rebuilds > 1 and len(index) == len(geoms)
+
+    for _ in range(20):
+        x, y = rng.uniform(0, 10), rng.uniform(0, 10)
+        query = box(x, y, x + 1.5, y + 1.5)
+        expected = {cid for cid, g in geoms.items() if g.intersects(query)}
+        assert set(index.bbox(x, y, x + 1.5, y + 1.5)) == expected
+        point = Point(x, y)
+        nearest = sorted((g.distance(point), cid) for cid, g in geoms.items())[:5]
+        got = index.nearest(point, k=5)
+        assert [d for _, d in got] == [d for d, _ in nearest]
+
+
+def test_store_indexes_contexts_from_other_workers(context_backend, site_context):
+    worker_a = ContextStore(context_backend)
+    worker_b = ContextStore(context_backend, index_refresh=0)
+    near = site_context("near")
+    far = site_context("far", boundary_geojson=None, bbox=[50.0, 50.0, 51.0, 51.0])
+    worker_a.put_many([near, far])
+    assert set(worker_a.spatial_index().bbox(1.9, 0.9, 2.1, 1.1)) == {near.context_id}
+    index_b = worker_b.spatial_index()
+    assert set(index_b.bbox(49, 49, 52, 52)) == {far.context_id}
+    assert [cid for cid, _ in index_b.nearest(Point(2, 1), k=2)] == [
+        near.context_id,
+        far.context_id,
+    ]
+
+
+def test_spatial_routes(context_backend, site_context, monkeypatch):
+    store = ContextStore(context_backend)
+    monkeypatch.setattr(stage0_router, "CONTEXTS", store)
+    ctx = site_context()
+    store.put(ctx)
+    res = client.get(
+        "/stage0/contexts/bbox",
+        params={"minx": 1.9, "miny": 0.9, "maxx": 2.1, "maxy": 1.1},
+    )
+    assert res.json() == {"context_ids": [ctx.context_id]}
+    parcel = {"type": "Point", "coordinates": [2.0, 1.0]}
+    res = client.post("/stage0/contexts/intersects", json={"geometry": parcel})
+    assert res.json() == {"context_ids": [ctx.context_id]}
+    res = client.get(
+        "/stage0/contexts/nearest", params={"lon": 3.0, "lat": 1.0, "k": 3}
+    )
+    assert [r["context_id"] for r in res.json()["results"]] == [ctx.context_id]
+    assert (
+        client.post(
+            "/stage0/contexts/intersects", json={"geometry": {"type": "Nope"}}
+        ).status_code
+        == 400
+    )
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.context import Stage0Request
+from app.services import stage0_context
+from shared import cache
+
+client = TestClient(app)
+
+
+def test_batch_build_dedupes_and_streams_in_completion_order(site_context, monkeypatch):
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+    fetched = []
+
+    async def fake_fetch(site):
+        fetched.append(site)
+        if site == "batch-bad":
+            raise RuntimeError("upstream down")
+        await asyncio.sleep(0.05 if site == "batch-slow" else 0)
+        return site_context(site)
+
+    monkeypatch.setattr(stage0_context, "fetch_context_async", fake_fetch)
+    cache.set(
+        "stage0:context:batch-hit",
+        stage0_context.CODEC.encode(site_context("batch-hit")),
+    )
+    sites = ["batch-slow", "batch-hit", "batch-fast", "batch-slow", "batch-bad"]
+    body = {"requests": [{"site_name": s} for s in sites]}
+
+    res = client.post("/stage0/context/build/batch", json=body)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    by_site = {line["site_name"]: line for line in lines}
+    # one line per distinct site: the hit first, the slow fetch last
+    assert len(lines) == 4 and lines[0]["site_name"] == "batch-hit"
+    assert lines[-1]["site_name"] == "batch-slow"
+    assert by_site["batch-hit"]["cached"] is True
+    assert by_site["batch-fast"]["cached"] is False
+    assert by_site["batch-fast"]["context"]["site_name"] == "batch-fast"
+    assert by_site["batch-bad"]["error"] == "upstream down"
+    assert sorted(fetched) == ["batch-bad", "batch-fast", "batch-slow"]
+
+    # fetched contexts were written back to the cache
+    res = client.post("/stage0/context/build/batch", json=body)
+    cached = {
+        line["site_name"]: line.get("cached")
+        for line in map(json.loads, res.text.splitlines())
+    }
+    assert cached == {
+        "batch-hit": True,
+        "batch-fast": True,
+        "batch-slow": True,
+        "batch-bad": None,
+    }
+
+
+def test_batch_build_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(stage0_context.settings, "stage0_batch_max_sites", 2)
+    body = {"requests": [{"site_name": f"s{i}"} for i in range(3)]}
+    assert client.post("/stage0/context/build/batch", json=body).status_code == 413
+
+
+def test_batch_build_stores_each_site_before_its_line(site_context, monkeypatch):
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_attempted", True)
+
+    async def fake_fetch(site):
+        await asyncio.sleep(0 if site == "stream-fast" else 5)
+        return site_context(site)
+
+    monkeypatch.setattr(stage0_context, "fetch_context_async", fake_fetch)
+    reqs = [Stage0Request(site_name=s) for s in ("stream-fast", "stream-slow")]
+
+    async def first_line():
+        lines = stage0_context.build_site_contexts(reqs)
+        try:
+            line = json.loads(await lines.__anext__())
+            # stored while the slow fetch is still running, not at the end
+            stored = stage0_context.CONTEXTS.get(line["context"]["context_id"])
+            return line, stored, cache.get("stage0:context:stream-fast")
+        finally:
+            await lines.aclose()
+
+    line, stored, cached = asyncio.run(first_line())
+    assert line["site_name"] == "stream-fast"
+    assert stored is not None and cached is not None
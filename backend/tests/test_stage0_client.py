@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from shared import stage0_client
+
+
+class StubStage0:
+    """Local Stage0 API serving one context, optionally failing first."""
+
+    def __init__(self, body: bytes, failures: int = 0, delay: float = 0.0) -> None:
+        self.body = body
+        self.failures = failures
+        self.delay = delay
+        self.requests = 0
+        self.ports = set()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    stub.ports.add(self.client_address[1])
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                    fail = stub.failures > 0
+                    stub.failures -= fail
+                threading.Event().wait(stub.delay)
+                status, body = (503, b"busy") if fail else (200, stub.body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with stub.lock:
+                    stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(site_context, monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        server = StubStage0(site_context().model_dump_json().encode(), **kwargs)
+        servers.append(server)
+        monkeypatch.setattr(stage0_client, "STAGE0_API_URL", server.url)
+        return server
+
+    monkeypatch.setattr(stage0_client, "STAGE0_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(stage0_client, "_client", None)
+    monkeypatch.setattr(stage0_client, "_aclient", None)
+    yield start
+    if stage0_client._client is not None:
+        stage0_client._client.close()
+    for server in servers:
+        server.close()
+
+
+def test_sync_fetch_reuses_pooled_connection(stub):
+    server = stub()
+    for _ in range(5):
+        assert stage0_client.fetch_context("p1").site_name == "Test"
+    assert server.requests == 5 and len(server.ports) == 1
+
+
+def test_fetch_retries_transient_errors(stub):
+    server = stub(failures=2)
+    assert stage0_client.fetch_context("p1").site_name == "Test"
+    assert server.requests == 3
+
+
+def test_fetch_gives_up_after_retries(stub, monkeypatch):
+    stub(failures=10)
+    monkeypatch.setattr(stage0_client, "STAGE0_RETRIES", 1)
+    with pytest.raises(httpx.HTTPStatusError):
+        stage0_client.fetch_context("p1")
+
+
+def test_async_fetches_run_concurrently_within_host_limit(stub, monkeypatch):
+    server = stub(delay=0.05)
+    monkeypatch.setattr(stage0_client, "STAGE0_MAX_PER_HOST", 4)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                *(stage0_client.fetch_context_async(f"p{i}") for i in range(12))
+            )
+        finally:
+            await stage0_client.aclose()
+
+    results = asyncio.run(scenario())
+    assert len(results) == 12 and server.requests == 12
+    # concurrent, but never more than the per-host limit, over reused sockets
+    assert 1 < server.peak <= 4
+    assert len(server.ports) <= 4
@@ -1,6 +1,14 @@
+import uuid
+
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from app.ai_agents.orchestrator import run_generation
+from app.db import BatchWriter
+from app.db.models import Candidate
 from app.main import app
+from app.models import Weights
+from app.services import stage1
 
 client = TestClient(app)
 
@@ -56,3 +64,57 @@ def test_stage7_endpoint():
     res = client.get("/stage7")
     assert res.status_code == 200
     assert res.json()["stage"] == 7
+
+
+def test_stage1_rerank_uses_stored_scores():
+    client.post("/stage1/generate", json={"n_variants": 4})
+    weights = {
+        "aesthetic": 1,
+        "sustainability": 0,
+        "cost": 0,
+        "accessibility": 0,
+        "emotion": 0,
+    }
+    res = client.post("/stage1/rerank", json={"weights": weights, "top_k": 3})
+    assert res.status_code == 200
+    variants = res.json()["data"]["variants"]
+    assert [v["rank"] for v in variants] == [1, 2, 3]
+    composites = [v["score"]["composite"] for v in variants]
+    assert composites == sorted(composites, reverse=True)
+    assert all(v["score"]["composite"] == v["score"]["aesthetic"] for v in variants)
+
+
+def test_stage1_rerank_cache_sees_new_candidates(engine):
+    weights = Weights(aesthetic=1, sustainability=0, cost=0, accessibility=0, emotion=0)
+    with Session(engine) as db:
+        run_generation(5, Weights(), writer=BatchWriter(db, Candidate), seed=1)
+        first = stage1.rerank(db, weights, k=1).data
+        assert stage1.rerank(db, weights, k=1).data == first
+        best = str(uuid.uuid4())
+        db.add(Candidate(id=best, label="best", meta={}, scores={"aesthetic": 2.0}))
+        db.commit()
+        again = stage1.rerank(db, weights, k=1).data
+        assert again["total"] == first["total"] + 1
+        assert str(again["variants"][0]["id"]) == best
+
+
+def test_stage1_variant_paging():
+    options = {"a": ["x", "y"], "b": ["1", "2", "3"]}
+    res = client.post(
+        "/stage1/variants", json={"options": options, "offset": 2, "limit": 3}
+    )
+    assert res.status_code == 200
+    data = res.json()["data"]
+    assert data["total"] == 6
+    assert data["variants"] == ["x_3", "y_1", "y_2"]
+    res = client.post(
+        "/stage1/variants/sample", json={"options": options, "k": 10, "seed": 1}
+    )
+    assert sorted(res.json()["data"]["variants"]) == [
+        "x_1",
+        "x_2",
+        "x_3",
+        "y_1",
+        "y_2",
+        "y_3",
+    ]